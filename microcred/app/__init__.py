@@ -1,13 +1,15 @@
 from flask import Flask
 from flask_login import LoginManager, current_user
 from pathlib import Path
-from .config import CONFIG_MAP, INSTANCE_DIR  # we'll export INSTANCE_DIR from config.py
-from .extensions import db, migrate, login_manager, csrf
+from .config import CONFIG_MAP, INSTANCE_DIR, Config, missing_settings  # we'll export INSTANCE_DIR from config.py
+from .extensions import db, migrate, login_manager, csrf, instrumentation, metrics, sqlite_profile, read_routing
 
-def create_app(env_name: str | None = None) -> Flask:
+def create_app(env_name: str | None = None, overrides: dict | None = None) -> Flask:
     """
     Application factory: sets a fixed absolute instance_path so
     the database and other instance files are always in <repo>/instance.
+    ``overrides`` are applied on top of the config class (tooling uses it to
+    point an app at a scratch database).
     """
     app = Flask(
         __name__,
@@ -16,8 +18,13 @@ def create_app(env_name: str | None = None) -> Flask:
     )
 
     # Select config class from CONFIG_MAP based on env_name or Flask ENV
-    config_class = CONFIG_MAP.get(env_name or app.config.get("ENV", "development"))
+    config_class = CONFIG_MAP.get(env_name or app.config.get("ENV", "development"), Config)
     app.config.from_object(config_class)
+    if overrides:
+        app.config.update(overrides)
+    missing = missing_settings(app.config)
+    if missing:
+        raise RuntimeError(f"{config_class.__name__} needs {', '.join(missing)} set (see config.py)")
 
     # Ensure the instance folder exists (belt-and-braces)
     Path(app.instance_path).mkdir(parents=True, exist_ok=True)
@@ -25,11 +32,15 @@ def create_app(env_name: str | None = None) -> Flask:
     # Initialise extensions
 
     db.init_app(app)
+    sqlite_profile.init_app(app)
+    read_routing.init_app(app)
 
     migrate.init_app(app, db)
 
     login_manager.init_app(app)
     csrf.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
 
     # --- NEW: template helper ---
     @app.context_processor
@@ -37,8 +48,7 @@ def create_app(env_name: str | None = None) -> Flask:
         def has_role(*names: str) -> bool:
             if not getattr(current_user, "is_authenticated", False):
                 return False
-            user_roles = {r.name for r in getattr(current_user, "roles", [])}
-            return any(name in user_roles for name in names)
+            return current_user.has_role(*names)
 
         return {"has_role": has_role}
 
@@ -66,7 +76,7 @@ def create_app(env_name: str | None = None) -> Flask:
     # with app.app_context():
     #     db.create_all()
     # Register blueprints
-    from .routes import auth, participants, issuers, admin, api, main, icon_routes
+    from .routes import auth, participants, issuers, admin, api, main, icon_routes, verify, metrics as metrics_routes
     app.register_blueprint(auth.bp)
     app.register_blueprint(participants.bp)
     app.register_blueprint(issuers.bp)
@@ -74,5 +84,15 @@ def create_app(env_name: str | None = None) -> Flask:
     app.register_blueprint(api.bp)
     app.register_blueprint(main.bp)
     app.register_blueprint(icon_routes.icons_bp)
+    app.register_blueprint(verify.bp)
+    verify.init_app(app)
+    if app.config.get("METRICS_ENABLED", True):
+        app.register_blueprint(metrics_routes.bp)
+
+    from .services import cache_services
+    cache_services.init_app(app)
+
+    from .commands import register_commands
+    register_commands(app)
 
     return app
@@ -0,0 +1,593 @@
+"""
+ASGI entrypoint for the read-only JSON API (optional).
+
+With sync workers a slow API client holds a whole worker process until it
+has read its response. This app serves the same GET endpoints as
+``routes/api.py`` from one asyncio loop per process instead, so a waiting
+client only costs a coroutine. Queries are Core selects over the same models,
+run on a small pool of read-only aiosqlite connections to the database the
+Flask app writes. Responses come from the same serializers, so payloads are
+identical. Pages, writes and /verify stay on the WSGI app; send /api/ here at
+the proxy.
+
+Caches follow ``cache_versions`` like every Flask worker does, so an edit made
+through the Flask app shows up here within CACHE_COHERENCE_INTERVAL_MS.
+
+Needs ``aiosqlite`` and an ASGI server (``pip install -r requirements-asgi.txt``), e.g.
+    uvicorn microcred.app.asgi:app --workers 4 --port 8001
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, NamedTuple
+from urllib.parse import parse_qs, quote, urlencode
+
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import aliased
+
+from .config import CONFIG_MAP, Config, env_name
+from .models import Achievement, AchievementEvent, Award, CacheVersion, User
+from .serializers import (AWARD_DETAIL_FIELDS, AWARD_FIELDS, AWARD_LIST_FIELDS, HOLDER_FIELDS,
+                          PARTICIPANT_AWARD_DEFAULT, PARTICIPANT_AWARD_FIELDS, FieldSet, FieldSetError,
+                          achievement_to_dict, award_to_dict, change_to_dict, dumps, holder_to_dict)
+from .services.catalogue_services import AwardSnapshot, Catalogue
+from .sqlite_tuning import profile_pragmas
+
+try:
+    import aiosqlite
+except ImportError:  # optional; only this entrypoint needs it
+    aiosqlite = None
+
+_dialect = sqlite.dialect(paramstyle="qmark")
+
+
+class Query:
+    """A Core select compiled once for SQLite, with the converters for its result columns."""
+
+    def __init__(self, stmt) -> None:
+        compiled = stmt.compile(dialect=_dialect)
+        self.sql = str(compiled)
+        self._names = compiled.positiontup
+        self._defaults = compiled.params
+        processors = [c.type.dialect_impl(_dialect).result_processor(_dialect, None)
+                      for c in stmt.selected_columns]
+        self._processors = processors if any(processors) else None
+
+    def params(self, values: dict) -> tuple:
+        return tuple(values[n] if n in values else self._defaults[n] for n in self._names)
+
+    def rows(self, raw) -> list[tuple]:
+        if self._processors is None:
+            return raw
+        procs = self._processors
+        return [tuple(p(v) if p else v for p, v in zip(procs, row)) for row in raw]
+
+
+def _json_ids(name: str):
+    # one bound JSON array instead of a variable-length IN list, so the SQL stays compiled once
+    return select(func.json_each(bindparam(name)).table_valued("value").c.value)
+
+
+_issuer = aliased(User)
+_PERSON = (User.id, User.email, User.first_name, User.last_name)
+_HELD = (Achievement.participant_id, Achievement.award_id, Achievement.issued_at, Achievement.note,
+         _issuer.id, _issuer.first_name, _issuer.last_name)
+
+
+def _held(*where):
+    return select(*_HELD).outerjoin(_issuer, _issuer.id == Achievement.issued_by_id).where(*where)
+
+
+VERSIONS = Query(select(CacheVersion.namespace, CacheVersion.version)
+                 .where(CacheVersion.version > bindparam("since")))
+CATALOGUE = Query(select(Award.id, Award.slug, Award.name, Award.description, Award.image_filename,
+                         func.coalesce(Award.points, 0), Award.criteria, Award.category, Award.auto_grant)
+                  .order_by(Award.points.desc(), Award.name.asc()))
+PERSON = Query(select(*_PERSON).where(User.id == bindparam("id")))
+PEOPLE_BY_ID = Query(select(*_PERSON).where(User.id.in_(_json_ids("ids"))))
+PEOPLE_BY_EMAIL = Query(select(*_PERSON).where(User.email.in_(_json_ids("emails"))))
+HOLDINGS = Query(_held(Achievement.participant_id == bindparam("id")).order_by(Achievement.issued_at.desc()))
+BATCH_HOLDINGS = Query(_held(Achievement.participant_id.in_(_json_ids("ids")))
+                       .order_by(Achievement.participant_id, Achievement.issued_at.desc()))
+HOLDING = Query(_held(Achievement.participant_id == bindparam("id"),
+                      Achievement.award_id == bindparam("award_id")).limit(1))
+HOLDERS = Query(select(*_PERSON, Achievement.issued_at, _issuer.id, _issuer.first_name, _issuer.last_name)
+                .join(User, User.id == Achievement.participant_id)
+                .outerjoin(_issuer, _issuer.id == Achievement.issued_by_id)
+                .where(Achievement.award_id == bindparam("award_id"))
+                .order_by(User.last_name.asc(), User.first_name.asc()))
+_event_cols = [AchievementEvent.__table__.c[f] for f in (
+    "seq", "kind", "participant_id", "award_id", "issued_at", "note", "actor_id", "occurred_at")]
+CHANGES = Query(select(*_event_cols).where(AchievementEvent.seq > bindparam("since"))
+                .order_by(AchievementEvent.seq.asc()).limit(bindparam("limit")))
+OLDEST_SEQ = Query(select(func.min(AchievementEvent.seq)))
+LATEST_SEQ = Query(select(func.coalesce(func.max(AchievementEvent.seq), 0)))
+
+
+@dataclass(frozen=True, slots=True)
+class Person:
+    id: int
+    email: str | None
+    first_name: str | None
+    last_name: str | None
+
+    @property
+    def full_name(self) -> str:
+        return " ".join(p for p in ((self.first_name or "").strip(), (self.last_name or "").strip()) if p)
+
+
+class Held(NamedTuple):
+    participant_id: int
+    award_id: int
+    issued_at: object
+    note: str | None
+    issued_by: Person | None
+
+
+class Event(NamedTuple):
+    seq: int
+    kind: str
+    participant_id: int
+    award_id: int
+    issued_at: object
+    note: str | None
+    actor_id: int | None
+    occurred_at: object
+
+
+def _issuer_of(issuer_id, first_name, last_name) -> Person | None:
+    return Person(issuer_id, None, first_name, last_name) if issuer_id is not None else None
+
+
+def _to_held(row) -> Held:
+    return Held(row[0], row[1], row[2], row[3], _issuer_of(*row[4:7]))
+
+
+# --- database ---
+
+def database_uri(config: dict) -> str:
+    """sqlite3 URI opening the app's database file read-only."""
+    url = make_url(config.get("SQLALCHEMY_READ_DATABASE_URI") or config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        raise RuntimeError("The async API server needs a file-backed SQLite database")
+    if url.database.startswith("file:"):
+        query = {"mode": "ro", **{k: v for k, v in url.query.items() if k != "uri"}}
+        return f"{url.database}?{urlencode(query)}"
+    return f"file:{quote(url.database)}?mode=ro"
+
+
+class ConnectionPool:
+    """
+    ``size`` aiosqlite connections, each with its own thread, handed out one
+    query at a time. Requests beyond that wait on the queue, not on a thread.
+    """
+
+    def __init__(self, database: str, pragmas: list[str], size: int) -> None:
+        self.database = database
+        self.pragmas = pragmas
+        self.size = size
+        self._idle: asyncio.Queue | None = None
+        self._all: list = []
+        self._opening: asyncio.Lock | None = None
+
+    async def open(self) -> None:
+        if aiosqlite is None:
+            raise RuntimeError("The async API server needs the 'aiosqlite' package")
+        if self._opening is None:
+            self._opening = asyncio.Lock()
+        async with self._opening:
+            if self._idle is not None:
+                return
+            idle: asyncio.Queue = asyncio.Queue()
+            for _ in range(self.size):
+                conn = await aiosqlite.connect(self.database, uri=True, isolation_level=None)
+                for stmt in self.pragmas:
+                    await conn.execute(stmt)
+                self._all.append(conn)
+                idle.put_nowait(conn)
+            self._idle = idle
+
+    async def close(self) -> None:
+        conns, self._all, self._idle = self._all, [], None
+        for conn in conns:
+            await conn.close()
+
+    async def fetch(self, query: Query, **params) -> list[tuple]:
+        if self._idle is None:
+            await self.open()
+        idle = self._idle
+        conn = await idle.get()
+        try:
+            async with conn.execute(query.sql, query.params(params)) as cursor:
+                raw = await cursor.fetchall()
+        finally:
+            idle.put_nowait(conn)
+        return query.rows(raw)
+
+    async def scalar(self, query: Query, **params):
+        rows = await self.fetch(query, **params)
+        return rows[0][0] if rows else None
+
+
+# --- caches ---
+
+class ApiCaches:
+    """
+    The award catalogue and per-award holder lists, dropped when the matching
+    ``cache_versions`` namespaces move. Concurrent misses share one load.
+    """
+
+    def __init__(self, pool: ConnectionPool, interval: float) -> None:
+        self.pool = pool
+        self.interval = interval
+        self._versions: dict[str, int] = {}
+        self._high_water = 0
+        self._next_check = 0.0
+        self._catalogue: Catalogue | None = None
+        self._holders: dict[int, list[dict]] = {}
+        self._generation = {"catalogue": 0, "holders": 0}
+        self._loading: dict[tuple, asyncio.Future] = {}
+
+    async def sync(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.interval
+        rows = await self.pool.fetch(VERSIONS, since=self._high_water)
+        stale = {ns for ns, v in rows if v != self._versions.get(ns, 0)}
+        self._versions.update(dict(rows))
+        self._high_water = max((v for _, v in rows), default=self._high_water)
+        if stale & {"awards", "icons"}:
+            self._forget("catalogue")
+        if stale & {"achievements", "awards", "users"}:
+            self._forget("holders")
+
+    def _forget(self, kind: str) -> None:
+        self._generation[kind] += 1
+        if kind == "catalogue":
+            self._catalogue = None
+        else:
+            self._holders.clear()
+
+    async def _once(self, key: tuple, load: Callable[[], Awaitable]):
+        task = self._loading.get(key)
+        if task is None:
+            task = self._loading[key] = asyncio.ensure_future(load())
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def catalogue(self) -> Catalogue:
+        cached = self._catalogue
+        if cached is not None:
+            return cached
+        return await self._once(("catalogue",), self._load_catalogue)
+
+    async def _load_catalogue(self) -> Catalogue:
+        generation = self._generation["catalogue"]
+        awards = tuple(AwardSnapshot(*row[:8], bool(row[8])) for row in await self.pool.fetch(CATALOGUE))
+        catalogue = Catalogue(generation, awards, {a.id: a for a in awards}, {a.slug: a for a in awards})
+        if generation == self._generation["catalogue"]:
+            self._catalogue = catalogue
+        return catalogue
+
+    async def award(self, award_id: int) -> AwardSnapshot | None:
+        snap = (await self.catalogue()).by_id.get(award_id)
+        if snap is None:
+            # created since the last sync; reload rather than wait for the version to move
+            self._forget("catalogue")
+            snap = (await self.catalogue()).by_id.get(award_id)
+        return snap
+
+    async def holders(self, award_id: int) -> list[dict]:
+        cached = self._holders.get(award_id)
+        if cached is not None:
+            return cached
+        return await self._once(("holders", award_id), lambda: self._load_holders(award_id))
+
+    async def _load_holders(self, award_id: int) -> list[dict]:
+        generation = self._generation["holders"]
+        holders = [holder_to_dict(Person(*row[:4]), row[4], _issuer_of(*row[5:8]))
+                   for row in await self.pool.fetch(HOLDERS, award_id=award_id)]
+        if generation == self._generation["holders"]:
+            self._holders[award_id] = holders
+        return holders
+
+
+# --- requests and responses ---
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, **extra) -> None:
+        super().__init__(message)
+        self.status = status
+        self.payload = {"error": message, **extra}
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    args: dict[str, list[str]]
+    base_url: str
+    body: bytes
+
+    @classmethod
+    def from_scope(cls, scope, body: bytes) -> "Request":
+        headers = dict(scope.get("headers") or ())
+        host = headers.get(b"host", b"").decode("latin-1")
+        if not host and scope.get("server"):
+            host = "%s:%s" % scope["server"]
+        return cls(scope["method"], scope["path"], parse_qs(scope.get("query_string", b"").decode("latin-1")),
+                   f"{scope.get('scheme', 'http')}://{host}{scope.get('root_path', '')}", body)
+
+    def arg(self, name: str, default=None):
+        values = self.args.get(name)
+        return values[0] if values else default
+
+    def int_arg(self, name: str, default: int) -> int:
+        try:
+            return int(self.arg(name, default))
+        except ValueError:
+            return default  # as Flask's request.args.get(..., type=int)
+
+    def fields(self, allowed, *, default=None, nested=None) -> FieldSet:
+        try:
+            return FieldSet(self.arg("fields"), allowed, default=default, nested_allowed=nested)
+        except FieldSetError as e:
+            raise HTTPError(400, str(e)) from None
+
+
+class Response(NamedTuple):
+    status: int
+    body: bytes | None = None
+    chunks: object = None  # async iterator of bytes, for streamed bodies
+
+
+def json_response(payload, status: int = 200) -> Response:
+    return Response(status, dumps(payload))
+
+
+# --- views (GET /api/...; see routes/api.py for the Flask versions) ---
+
+class ApiApp:
+    def __init__(self, config: dict) -> None:
+        self.config = config
+        pragmas = [p for p in profile_pragmas(config) if "journal_mode" not in p]
+        self.pool = ConnectionPool(database_uri(config), pragmas, int(config.get("ASGI_DB_POOL_SIZE", 8)))
+        self.caches = ApiCaches(self.pool, float(config.get("CACHE_COHERENCE_INTERVAL_MS", 250)) / 1000)
+        self.img_base = config.get("AWARD_IMAGE_BASE", "/static/awards")
+        self.routes: list[tuple[re.Pattern, Callable, tuple[str, ...]]] = [
+            (re.compile(r"^/api/participants/(\d+)/awards$"), self.participant_awards, ("GET",)),
+            (re.compile(r"^/api/participants/awards$"), self.participants_awards, ("GET", "POST")),
+            (re.compile(r"^/api/participants/(\d+)/awards/([^/]+)$"), self.award_for_participant, ("GET",)),
+            (re.compile(r"^/api/awards$"), self.awards, ("GET",)),
+            (re.compile(r"^/api/awards/([^/]+)/participants$"), self.award_participants, ("GET",)),
+            (re.compile(r"^/api/achievements/changes$"), self.achievement_changes, ("GET",)),
+        ]
+
+    def _participant_award_fields(self, req: Request) -> FieldSet:
+        return req.fields(PARTICIPANT_AWARD_FIELDS, default=PARTICIPANT_AWARD_DEFAULT, nested={"award": AWARD_FIELDS})
+
+    @staticmethod
+    def _detail_url(req: Request, participant_id: int) -> str:
+        return f"{req.base_url}/api/participants/{participant_id}/awards/__slug__"
+
+    async def _items(self, held: list[Held], fields: FieldSet, detail_url: str) -> list[dict]:
+        return [achievement_to_dict(h, await self.caches.award(h.award_id), fields, self.img_base, detail_url)
+                for h in held]
+
+    async def participant_awards(self, req: Request, participant_id: str) -> Response:
+        fields = self._participant_award_fields(req)
+        rows = await self.pool.fetch(PERSON, id=int(participant_id))
+        if not rows:
+            raise HTTPError(404, "Not found")
+        user = Person(*rows[0])
+        held = [_to_held(r) for r in await self.pool.fetch(HOLDINGS, id=user.id)]
+        return json_response({
+            "participant": {"id": user.id, "name": user.full_name, "email": user.email},
+            "awards": await self._items(held, fields, self._detail_url(req, user.id)),
+        })
+
+    def _batch_keys(self, req: Request) -> tuple[list[int], list[str]]:
+        body = None
+        if req.method == "POST" and req.body:
+            try:
+                body = json.loads(req.body)
+            except ValueError:
+                body = None
+        if isinstance(body, dict):
+            raw_ids, raw_emails = body.get("ids") or [], body.get("emails") or []
+        else:
+            split = lambda name: [p for v in req.args.get(name, ()) for p in v.split(",")]
+            raw_ids, raw_emails = split("ids"), split("emails")
+        try:
+            ids = list(dict.fromkeys(int(str(i).strip()) for i in raw_ids if str(i).strip()))
+        except ValueError:
+            raise HTTPError(400, "ids must be integers") from None
+        emails = list(dict.fromkeys(e.strip().lower() for e in map(str, raw_emails) if e.strip()))
+        if not ids and not emails:
+            raise HTTPError(400, "Pass ids and/or emails")
+        limit = self.config["API_BATCH_MAX"]
+        if len(ids) + len(emails) > limit:
+            raise HTTPError(400, f"At most {limit} participants per request")
+        return ids, emails
+
+    async def _holdings_batches(self, req: Request, ids: list[int], emails: list[str], fields: FieldSet,
+                                missing: list):
+        chunk_size = self.config["API_BATCH_CHUNK"]
+        keyed = [(PEOPLE_BY_ID, "ids", 0, ids), (PEOPLE_BY_EMAIL, "emails", 1, emails)]
+        seen: set[int] = set()
+        for query, param, key_col, keys in keyed:
+            for start in range(0, len(keys), chunk_size):
+                chunk = keys[start:start + chunk_size]
+                users = {row[key_col]: Person(*row) for row in await self.pool.fetch(query, **{param: dumps(chunk)})}
+                holdings: dict[int, list[Held]] = {}
+                user_ids = [u.id for u in users.values() if u.id not in seen]
+                if user_ids:
+                    for row in await self.pool.fetch(BATCH_HOLDINGS, ids=dumps(user_ids)):
+                        holdings.setdefault(row[0], []).append(_to_held(row))
+                rows = []
+                for key in chunk:
+                    user = users.get(key)
+                    if user is None:
+                        missing.append(key)
+                        continue
+                    if user.id in seen:  # asked for by both id and email
+                        continue
+                    seen.add(user.id)
+                    rows.append({
+                        "id": user.id, "name": user.full_name, "email": user.email,
+                        "awards": await self._items(holdings.get(user.id, []), fields,
+                                                    self._detail_url(req, user.id)),
+                    })
+                yield rows
+
+    async def participants_awards(self, req: Request) -> Response:
+        fields = self._participant_award_fields(req)
+        ids, emails = self._batch_keys(req)
+        missing: list = []
+        batches = self._holdings_batches(req, ids, emails, fields, missing)
+
+        if len(ids) + len(emails) <= self.config["API_BATCH_STREAM_THRESHOLD"]:
+            participants = [row async for rows in batches for row in rows]
+            return json_response({"participants": participants, "missing": missing})
+
+        async def generate():
+            yield b'{"participants":['
+            first = True
+            async for rows in batches:
+                for row in rows:
+                    yield dumps(row) if first else b"," + dumps(row)
+                    first = False
+            yield b'],"missing":' + dumps(missing) + b"}"
+
+        return Response(200, chunks=generate())
+
+    async def award_for_participant(self, req: Request, participant_id: str, award_slug: str) -> Response:
+        fields = req.fields(AWARD_DETAIL_FIELDS, nested={"award": AWARD_FIELDS})
+        award = (await self.caches.catalogue()).by_slug.get(award_slug)
+        rows = await self.pool.fetch(HOLDING, id=int(participant_id), award_id=award.id) if award else None
+        if not rows:
+            raise HTTPError(404, "Not found")
+        return json_response({"participant_id": int(participant_id),
+                              **achievement_to_dict(_to_held(rows[0]), award, fields, self.img_base, "")})
+
+    async def awards(self, req: Request) -> Response:
+        fields = req.fields(AWARD_LIST_FIELDS)
+        award_fields = None if fields.top.issuperset(AWARD_FIELDS) else fields.top
+        with_url = "participants_url" in fields
+        url = f"{req.base_url}/api/awards/__slug__/participants"
+        awards = []
+        for a in await self.caches.catalogue():
+            row = award_to_dict(a, self.img_base, award_fields)
+            if with_url:
+                row["participants_url"] = url.replace("__slug__", a.slug)
+            awards.append(row)
+        return json_response({"awards": awards})
+
+    async def award_participants(self, req: Request, award_slug: str) -> Response:
+        fields = req.fields(("award", "participants"), nested={"award": AWARD_FIELDS, "participants": HOLDER_FIELDS})
+        award = (await self.caches.catalogue()).by_slug.get(award_slug)
+        if award is None:
+            raise HTTPError(404, "Not found")
+        payload = {}
+        if "award" in fields:
+            payload["award"] = award_to_dict(award, self.img_base, fields.nested("award"))
+        if "participants" in fields:
+            holders = await self.caches.holders(award.id)
+            wanted = fields.nested("participants")
+            payload["participants"] = holders if wanted is None else [
+                {k: v for k, v in h.items() if k in wanted} for h in holders]
+        return json_response(payload)
+
+    async def achievement_changes(self, req: Request) -> Response:
+        since = req.int_arg("since", 0)
+        max_limit = self.config["API_CHANGES_MAX_LIMIT"]
+        limit = min(max(req.int_arg("limit", max_limit), 1), max_limit)
+        events = [Event(*row) for row in await self.pool.fetch(CHANGES, since=since, limit=limit + 1)]
+        if events and events[0].seq > since + 1:
+            oldest = await self.pool.scalar(OLDEST_SEQ)
+            if oldest is not None and oldest > since + 1:
+                # same rule as event_services.changes_since: a gap may be pruning, so resync
+                cursor = await self.pool.scalar(LATEST_SEQ)
+                return json_response({"error": "cursor expired", "resync": True, "cursor": cursor}, 410)
+        has_more = len(events) > limit
+        events = events[:limit]
+        by_id = (await self.caches.catalogue()).by_id
+        return json_response({
+            "changes": [change_to_dict(e, by_id.get(e.award_id)) for e in events],
+            "next_cursor": events[-1].seq if events else since,
+            "has_more": has_more,
+        })
+
+    # --- ASGI ---
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.pool.open()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.pool.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send) -> None:
+        body = b""
+        if scope["method"] == "POST":
+            more = True
+            while more:
+                message = await receive()
+                body += message.get("body", b"")
+                more = message.get("more_body", False)
+        req = Request.from_scope(scope, body)
+        try:
+            resp = await self._dispatch(req)
+        except HTTPError as e:
+            resp = json_response(e.payload, e.status)
+        headers = [(b"content-type", b"application/json")]
+        if resp.body is not None:
+            headers.append((b"content-length", str(len(resp.body)).encode("ascii")))
+        await send({"type": "http.response.start", "status": resp.status, "headers": headers})
+        if resp.body is not None:
+            await send({"type": "http.response.body", "body": resp.body})
+            return
+        async for chunk in resp.chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _dispatch(self, req: Request) -> Response:
+        for pattern, view, methods in self.routes:
+            m = pattern.match(req.path)
+            if m is None:
+                continue
+            if req.method not in methods:
+                raise HTTPError(405, "Method not allowed")
+            await self.caches.sync()
+            return await view(req, *m.groups())
+        raise HTTPError(404, "Not found")
+
+
+def load_config(env: str) -> dict:
+    """The Flask config class for ``env`` as a plain dict; no Flask app is created."""
+    cls = CONFIG_MAP.get(env, Config)
+    return {k: getattr(cls, k) for k in dir(cls) if k.isupper()}
+
+
+app = ApiApp(load_config(env_name("production")))
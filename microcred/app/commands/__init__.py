@@ -0,0 +1,17 @@
+"""Flask CLI command groups (``flask <group> <command>``)."""
+from flask import Flask
+
+
+def register_commands(app: Flask) -> None:
+    from . import api, awards, badges, events, perf, rollups, rules, sqlite, transcripts, users, webhooks
+    app.cli.add_command(sqlite.cli)
+    app.cli.add_command(api.cli)
+    app.cli.add_command(events.cli)
+    app.cli.add_command(webhooks.cli)
+    app.cli.add_command(rules.cli)
+    app.cli.add_command(awards.cli)
+    app.cli.add_command(badges.cli)
+    app.cli.add_command(perf.cli)
+    app.cli.add_command(rollups.cli)
+    app.cli.add_command(transcripts.cli)
+    app.cli.add_command(users.cli)
@@ -0,0 +1,58 @@
+# microcred/app/commands/api.py
+import json
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, jsonify
+from flask.cli import with_appcontext
+
+from ..serializers import award_to_dict, dumps, orjson
+from ..services.catalogue_services import AwardSnapshot
+
+cli = click.Group("api", help="API tooling.")
+
+
+def _sample_rows(n: int) -> list[dict]:
+    award = AwardSnapshot(1, "python-novice", "Python Novice", "Wrote a first script.",
+                          "python_novice.png", 10, "Complete the intro module.")
+    issued = datetime(2024, 1, 1)
+    return [{
+        "award": award_to_dict(award, "/static/awards"),
+        "issued_at": issued + timedelta(minutes=i),
+        "issued_by": {"id": 1, "name": "Site Admin"},
+        "note": None,
+        "detail_url": f"http://localhost/api/participants/{i}/awards/python-novice",
+    } for i in range(n)]
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+@cli.command("bench-json")
+@click.option("--rows", default=10_000, show_default=True, help="Achievement rows per payload.")
+@click.option("--repeat", default=5, show_default=True, help="Best of N runs.")
+@with_appcontext
+def bench_json(rows: int, repeat: int):
+    """Compare jsonify, the stdlib encoder and the orjson path on a participant payload."""
+    payload = {"participant": {"id": 1, "name": "Alice", "email": "a@example.com"}, "awards": _sample_rows(rows)}
+    projected = {"participant": payload["participant"],
+                 "awards": [{"award": {"slug": r["award"]["slug"]}, "issued_at": r["issued_at"]}
+                            for r in payload["awards"]]}
+
+    with current_app.test_request_context():
+        cases = [("jsonify", lambda: jsonify(payload).get_data()),
+                 ("stdlib json", lambda: json.dumps(payload, default=str).encode("utf-8")),
+                 (f"dumps ({'orjson' if orjson else 'stdlib fallback'})", lambda: dumps(payload)),
+                 ("dumps, ?fields=award.slug,issued_at", lambda: dumps(projected))]
+        results = [(label, _best_of(fn, repeat), len(fn())) for label, fn in cases]
+
+    baseline = results[0][1]
+    for label, secs, size in results:
+        click.echo(f"{label:>38}: {secs * 1000:8.1f} ms  {size / 1024:8.0f} KiB  x{baseline / secs:5.1f}")
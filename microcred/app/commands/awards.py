@@ -0,0 +1,17 @@
+# microcred/app/commands/awards.py
+import click
+from flask.cli import with_appcontext
+
+from ..extensions import db
+from ..services.prerequisite_services import rebuild_closure
+
+cli = click.Group("awards", help="Award catalogue maintenance.")
+
+
+@cli.command("rebuild-closure")
+@with_appcontext
+def rebuild_closure_command():
+    """Recompute the prerequisite closure table from the direct edges."""
+    rows = rebuild_closure()
+    db.session.commit()
+    click.echo(f"Closure rebuilt: {rows} (award, ancestor) pair(s).")
@@ -0,0 +1,140 @@
+# microcred/app/commands/badges.py
+import os
+import time
+import zipfile
+from pathlib import Path
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from werkzeug.test import EnvironBuilder
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import Achievement, User
+from ..process_pool import app_pool, env_name, worker_app
+from ..serializers import dumps
+from ..services.badge_services import FORMATS, assertion_id, hosted_assertion, signed_assertion, signer
+from ..services.catalogue_services import award_catalogue
+from ..services.verify_services import reindex, verify_cache
+
+cli = click.Group("badges", help="Open Badges assertions.")
+
+
+def _export_participants(participant_ids: list[int], out_dir: str, fmt: str, award_id: int | None) -> int:
+    """Write <out_dir>/<participant id>.zip for each participant; returns assertions written."""
+    written = 0
+    by_id = award_catalogue().by_id
+    users = {u.id: u for u in User.query.filter(User.id.in_(participant_ids))}
+    achs = Achievement.query.filter(Achievement.participant_id.in_(participant_ids))
+    if award_id is not None:
+        achs = achs.filter(Achievement.award_id == award_id)
+    held: dict[int, list] = {}
+    for ach in achs.order_by(Achievement.participant_id, Achievement.issued_at):
+        held.setdefault(ach.participant_id, []).append(ach)
+    for pid, rows in held.items():
+        user = users.get(pid)
+        if user is None:
+            continue
+        tmp = Path(out_dir) / f"{pid}.zip.part"
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+            for ach in rows:
+                award = by_id.get(ach.award_id)
+                if award is None:
+                    continue
+                zf.writestr(f"{award.slug}.json", dumps(hosted_assertion(ach, award, user.email, fmt)))
+                zf.writestr(f"{award.slug}.jws", signed_assertion(ach, award, user.email, fmt))
+                written += 1
+        os.replace(tmp, tmp.with_suffix(""))
+    return written
+
+
+def _export_chunk(args) -> int:
+    with worker_app().app_context():
+        return _export_participants(*args)
+
+
+@cli.command("export")
+@click.argument("out_dir", type=click.Path(file_okay=False))
+@click.option("--award", "award_slug", default=None, help="Only this award (a cohort); default all.")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default="ob2", show_default=True)
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="Signing processes.")
+@click.option("--chunk", "chunk_size", default=200, show_default=True, help="Participants per work unit.")
+@with_appcontext
+def export(out_dir: str, award_slug: str | None, fmt: str, workers: int, chunk_size: int):
+    """Sign assertions and write one zip per participant into OUT_DIR."""
+    award_id = None
+    if award_slug:
+        award = award_catalogue().by_slug.get(award_slug)
+        if award is None:
+            raise click.ClickException(f"No award {award_slug!r}")
+        award_id = award.id
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+
+    stmt = select(Achievement.participant_id).distinct().order_by(Achievement.participant_id)
+    if award_id is not None:
+        stmt = stmt.where(Achievement.award_id == award_id)
+    ids = db.session.scalars(stmt).all()
+    chunks = [(ids[i:i + chunk_size], out_dir, fmt, award_id) for i in range(0, len(ids), chunk_size)]
+
+    started = time.perf_counter()
+    procs = workers if workers > 1 and len(chunks) > 1 else 1
+    if procs > 1:
+        with app_pool(workers, env_name()) as pool:
+            written = sum(pool.map(_export_chunk, chunks))
+    else:
+        written = sum(_export_participants(*c) for c in chunks)
+    elapsed = time.perf_counter() - started
+    click.echo(f"Wrote {written} {fmt} assertion(s) for {len(ids)} participant(s) in {elapsed:.1f}s "
+               f"({signer().alg}, {procs} process(es)).")
+
+
+@cli.command("reindex-verify")
+@click.option("--all", "everything", is_flag=True, help="Recompute every hash (after rotating the HMAC secret).")
+@with_appcontext
+def reindex_verify(everything: bool):
+    """Fill achievements.verify_hash, which /verify/<id> looks credentials up by."""
+    click.echo(f"Indexed {reindex(everything=everything)} achievement(s).")
+
+
+@cli.command("bench-verify")
+@click.option("--requests", "n", default=20_000, show_default=True, help="Requests to send.")
+@click.option("--ids", "id_count", default=500, show_default=True, help="Distinct credentials to spread them over.")
+@click.option("--html", is_flag=True, help="Ask for the HTML page instead of JSON.")
+@with_appcontext
+def bench_verify(n: int, id_count: int, html: bool):
+    """Drive /verify/<id> through the full WSGI stack in this process and report requests/sec."""
+    ids = db.session.scalars(select(Achievement.id).order_by(Achievement.id).limit(id_count)).all()
+    if not ids:
+        raise click.ClickException("No achievements to verify.")
+    if db.session.scalar(select(Achievement.id).where(Achievement.verify_hash.is_(None)).limit(1)) is not None:
+        raise click.ClickException("Some achievements have no verify_hash; run 'flask badges reindex-verify'.")
+    accept = "text/html" if html else "application/json"
+    # environs built once and fed straight to the WSGI app, as a server would; the test
+    # client's own request building would otherwise dominate the numbers
+    environs = [EnvironBuilder(path=f"/verify/{assertion_id(i)}", headers={"Accept": accept}).get_environ()
+                for i in ids]
+    app = current_app._get_current_object()
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(status)
+
+    def request(environ):
+        for _ in app(dict(environ), start_response):
+            pass
+
+    verify_cache.clear()
+    started = time.perf_counter()
+    for environ in environs:
+        request(environ)
+    cold = time.perf_counter() - started
+    if any(not s.startswith("200") for s in statuses):
+        raise click.ClickException(f"Unexpected responses: {sorted(set(statuses))}")
+
+    started = time.perf_counter()
+    for i in range(n):
+        request(environs[i % len(environs)])
+    warm = time.perf_counter() - started
+    click.echo(f"cold: {len(environs) / cold:8.0f} req/s ({len(environs)} first lookups)")
+    click.echo(f"warm: {n / warm:8.0f} req/s ({n} requests, one process, one thread)")
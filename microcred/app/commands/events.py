@@ -0,0 +1,27 @@
+# microcred/app/commands/events.py
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from ..services import event_services
+
+cli = click.Group("events", help="Achievement change feed maintenance.")
+
+
+@cli.command("compact")
+@click.option("--compact-after", type=int, default=None,
+              help="Days after which superseded events are dropped (default: ACHIEVEMENT_EVENTS_COMPACT_AFTER_DAYS).")
+@click.option("--retention", type=int, default=None,
+              help="Days of history to keep at all (default: ACHIEVEMENT_EVENTS_RETENTION_DAYS).")
+@with_appcontext
+def compact(compact_after: int | None, retention: int | None):
+    """Drop superseded events, then everything past the retention window."""
+    cfg = current_app.config
+    compact_after = cfg["ACHIEVEMENT_EVENTS_COMPACT_AFTER_DAYS"] if compact_after is None else compact_after
+    retention = cfg["ACHIEVEMENT_EVENTS_RETENTION_DAYS"] if retention is None else retention
+    compacted = event_services.compact(timedelta(days=compact_after))
+    pruned = event_services.prune(timedelta(days=retention))
+    click.echo(f"Compacted {compacted} superseded event(s); pruned {pruned} older than {retention} days.")
+    click.echo(f"Latest cursor: {event_services.latest_cursor()}")
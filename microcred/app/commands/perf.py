@@ -0,0 +1,504 @@
+# microcred/app/commands/perf.py
+import asyncio
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+import click
+from sqlalchemy import event, insert, select, text
+
+from ..extensions import db
+from ..models import Achievement, AchievementEvent, Award, Role, User
+from ..models.associations import user_roles
+from ..models.icons import Icon
+from ..process_pool import env_name
+
+cli = click.Group("perf", help="Performance checks.")
+
+# Read whole by design (catalogues, version rows) and small enough that a scan is the right plan
+SMALL_TABLES = {"awards", "roles", "cache_versions", "webhook_subscriptions",
+                "award_prerequisites", "award_prerequisite_closure",
+                "rollup_awards", "rollup_issuers", "rollup_totals"}
+
+# "SCAN t USING INDEX i" still visits every row, just in index order, so it counts too
+_SCAN = re.compile(r"^SCAN (\w+)")
+_TABLE = re.compile(r"^(?:SCAN|SEARCH) (\w+)")
+
+
+# A statement running more often than this in one request is almost always a per-row lazy load
+MAX_REPEATS = 3
+
+
+class HotPath(NamedTuple):
+    label: str
+    who: str  # "admin", "participant" or "anon"
+    url: str
+    scans: tuple[str, ...] = ()  # tables this path may read in full
+    sort: bool = False  # may sort its (bounded) result in a temp B-tree
+
+
+def _hot_paths(ids: dict) -> list[HotPath]:
+    p, slug, award_id, aid = ids["participant"], ids["slug"], ids["award_id"], ids["aid"]
+    return [
+        HotPath("participant: my awards", "participant", "/me/awards"),
+        HotPath("participant: award detail", "participant", f"/me/awards/{slug}"),
+        HotPath("participant: achievable", "participant", "/me/achievable"),
+        HotPath("participant: assertion", "participant", f"/me/awards/{slug}/assertion.json"),
+        HotPath("issuer: awardable", "admin", "/issuers/awardable"),
+        # lists every achievement, ordered by columns of three tables; needs paging, not an index
+        HotPath("issuer: issued", "admin", "/issuers/issued", ("achievements",), sort=True),
+        HotPath("admin: dashboard", "admin", "/admin/"),
+        HotPath("admin: awards", "admin", "/admin/awards"),
+        HotPath("admin: award edit", "admin", f"/admin/awards/{award_id}/edit"),
+        # the full list, walked in ix_users_name order, with every user's award count
+        HotPath("admin: users", "admin", "/admin/users", ("users", "achievements")),
+        # substring search over three columns; no index can serve it
+        HotPath("admin: user search", "admin", "/admin/users?q=user1", ("users",)),
+        HotPath("admin: user detail", "admin", f"/admin/users/{p}"),
+        # unfiltered pages walk an index and stop at LIMIT; the page count reads it all
+        HotPath("icons: index", "admin", "/icons/", ("icons",)),
+        HotPath("icons: search", "admin", "/icons/?q=star", sort=True),
+        HotPath("icons: category", "admin", "/icons/?category=cat3"),
+        HotPath("icons: picker", "admin", "/icons/picker", ("icons",)),
+        HotPath("icons: picker category", "admin", "/icons/picker?category=cat3"),
+        HotPath("api: awards", "admin", "/api/awards"),
+        HotPath("api: participant awards", "admin", f"/api/participants/{p}/awards"),
+        HotPath("api: batch", "admin", f"/api/participants/awards?ids={p},{p + 1},{p + 2}"),
+        HotPath("api: participant award", "admin", f"/api/participants/{p}/awards/{slug}"),
+        # one award's holders, ordered by the holder's name
+        HotPath("api: award holders", "admin", f"/api/awards/{slug}/participants", sort=True),
+        HotPath("api: changes", "admin", "/api/achievements/changes?since=100"),
+        HotPath("verify: credential", "anon", f"/verify/{aid}"),
+    ]
+
+
+# Service calls checked alongside the views: (label, callable taking the seeded ids, may sort)
+def _service_calls():
+    from ..services.query_services import QueryService
+    service = QueryService()
+    return [
+        ("QueryService.participant_awards", lambda ids: service.participant_awards(ids["participant"]), False),
+        ("QueryService.award_holders", lambda ids: service.award_holders(ids["slug"]), True),
+    ]
+
+
+def _scratch_config(workdir: str, **overrides) -> dict:
+    """App config for a throwaway SQLite database (and caches) in ``workdir``."""
+    return {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'perf.db')}",
+        "DB_READ_SPLIT": False, "WTF_CSRF_ENABLED": False, "PERF_INSTRUMENTATION": False, "METRICS_MULTIPROCESS_DIR": None,
+        "ASSERTION_CACHE_DIR": os.path.join(workdir, "assertions"),
+        "BADGE_IMAGE_CACHE_DIR": os.path.join(workdir, "badge_images"),
+        **overrides,
+    }
+
+
+def _seed(users: int, icons: int, rng: random.Random) -> dict:
+    db.create_all()
+    db.session.execute(insert(Role), [{"name": n} for n in ("participant", "issuer", "admin")])
+    now = datetime.utcnow()
+    user_rows = [{"id": i, "email": f"user{i}@example.com", "first_name": f"First{i % 97}",
+                  "last_name": f"Last{i % 89}", "password_hash": None} for i in range(1, users + 1)]
+    db.session.execute(insert(User), user_rows)
+    db.session.execute(insert(user_roles), [{"user_id": 1, "role_id": 2}, {"user_id": 1, "role_id": 3}]
+                       + [{"user_id": i, "role_id": 1} for i in range(2, users + 1)])
+    categories = ("python", "web", "data", "cloud", "security")
+    db.session.execute(insert(Award), [{
+        "id": i, "slug": f"award-{i}", "name": f"Award {i}", "description": "d", "points": i % 7 * 10,
+        "criteria": None, "category": categories[i % len(categories)], "auto_grant": False,
+        "image_filename": None} for i in range(1, 41)])
+    achievements, seen = [], set()
+    for uid in range(2, users + 1):
+        for award_id in rng.sample(range(1, 41), rng.randint(0, 8)):
+            seen.add((uid, award_id))
+            achievements.append({"participant_id": uid, "award_id": award_id, "issued_by_id": 1,
+                                 "issued_at": now - timedelta(minutes=rng.randint(0, 500_000)), "note": None})
+    db.session.execute(insert(Achievement), achievements)
+    db.session.execute(insert(AchievementEvent), [{
+        "kind": "granted", "achievement_id": i + 1, "participant_id": a["participant_id"],
+        "award_id": a["award_id"], "actor_id": 1, "issued_at": a["issued_at"], "note": None,
+        "occurred_at": a["issued_at"]} for i, a in enumerate(achievements)])
+    words = ("star", "book", "code", "cloud", "shield", "chart", "rocket", "bug", "key", "globe")
+    db.session.execute(insert(Icon), [{
+        "name": f"{words[i % len(words)]}-{i}", "category": f"cat{i % 12}", "filename": f"icon{i}.png"}
+        for i in range(icons)])
+    db.session.commit()
+
+    from ..services.prerequisite_services import rebuild_closure
+    from ..services.rollup_services import rebuild as rebuild_rollups
+    from ..services.verify_services import reindex
+    rebuild_closure()
+    rebuild_rollups()
+    reindex()
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+
+    participant = next(uid for uid, _ in sorted(seen))
+    award_id = min(a for uid, a in seen if uid == participant)
+    ach_id = db.session.execute(text("SELECT id FROM achievements WHERE participant_id = :p AND award_id = :a"),
+                                {"p": participant, "a": award_id}).scalar_one()
+    from ..services.badge_services import assertion_id
+    return {"participant": participant, "award_id": award_id, "slug": f"award-{award_id}",
+            "aid": assertion_id(ach_id)}
+
+
+def _problems(plan: list[str], scans: set[str], sort: bool) -> list[str]:
+    tables = {m.group(1) for line in plan if (m := _TABLE.match(line))} & set(db.metadata.tables)
+    problems = []
+    for line in plan:
+        m = _SCAN.match(line)
+        if m and m.group(1) in tables and m.group(1) not in scans:
+            problems.append(line)
+        elif line.startswith("USE TEMP B-TREE") and not sort and not tables <= SMALL_TABLES:
+            problems.append(line)
+    return problems
+
+
+@cli.command("explain")
+@click.option("--users", default=3000, show_default=True, help="Seeded users (each holds 0-8 awards).")
+@click.option("--icons", default=1200, show_default=True, help="Seeded icons.")
+@click.option("--keep", is_flag=True, help="Keep the scratch database and print its path.")
+@click.option("-v", "--verbose", is_flag=True, help="Print every plan, not just the failing ones.")
+def explain(users: int, icons: int, keep: bool, verbose: bool):
+    """
+    Seed a scratch SQLite database, drive the hot views and API routes, and
+    EXPLAIN QUERY PLAN every SELECT they run. Fails when one falls back to a
+    full table scan or a temp B-tree sort outside its allowance.
+    """
+    from .. import create_app
+
+    workdir = tempfile.mkdtemp(prefix="microcred-explain-")
+    app = create_app(env_name(), _scratch_config(workdir))
+    failures = 0
+    try:
+        with app.app_context():
+            ids = _seed(users, icons, random.Random(42))
+            engine = db.engine
+            for email in ("user1@example.com", f"user{ids['participant']}@example.com"):
+                db.session.execute(text("UPDATE users SET password_hash = :h WHERE email = :e"),
+                                   {"h": _password_hash(), "e": email})
+            db.session.commit()
+        paths = _hot_paths(ids)
+        # requests run outside any app context, as in production, so g doesn't leak between them
+        captured, failures = _capture(app, engine, ids, paths)
+        allowances = {p.label: (set(p.scans) | SMALL_TABLES, p.sort) for p in paths}
+        allowances.update((label, (SMALL_TABLES, sort)) for label, _, sort in _service_calls())
+        with app.app_context(), engine.connect() as conn:
+            for label, statements in captured.items():
+                failures += _check(conn, label, statements, *allowances[label], verbose)
+    finally:
+        if keep:
+            click.echo(f"Scratch database kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    if failures:
+        raise click.ClickException(f"{failures} hot quer{'y' if failures == 1 else 'ies'} need attention")
+    click.echo("All hot queries use indexes.")
+
+
+def _capture(app, engine, ids: dict, paths) -> tuple[dict[str, list], int]:
+    """Run every hot path and record the SELECTs each one issues."""
+    captured: dict[str, list[tuple[str, object]]] = defaultdict(list)
+    current = {"label": None}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if current["label"] and not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured[current["label"]].append((statement, parameters))
+
+    failures = 0
+    clients = {"anon": app.test_client(), "admin": app.test_client(), "participant": app.test_client()}
+    clients["admin"].post("/auth/login", data={"email": "user1@example.com", "password": "explain"})
+    clients["participant"].post("/auth/login", data={"email": f"user{ids['participant']}@example.com",
+                                                     "password": "explain"})
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        for path in paths:
+            current["label"] = path.label
+            status = clients[path.who].get(path.url).status_code
+            if status != 200:
+                click.echo(f"{path.label}: GET {path.url} returned {status}", err=True)
+                failures += 1
+        with app.app_context():
+            for label, call, _ in _service_calls():
+                current["label"] = label
+                call(ids)
+    finally:
+        current["label"] = None
+        event.remove(engine, "before_cursor_execute", capture)
+    return captured, failures
+
+
+def _check(conn, label: str, statements, scans: set[str], sort: bool, verbose: bool) -> int:
+    failures = 0
+    runs = Counter(statement for statement, _ in statements)
+    seen = set()
+    for statement, parameters in statements:
+        if statement in seen:
+            continue
+        seen.add(statement)
+        plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        problems = _problems(plan, scans, sort)
+        repeated = runs[statement] > MAX_REPEATS
+        failures += bool(problems) or repeated
+        if problems or repeated or verbose:
+            click.echo(f"{'FAIL' if problems or repeated else 'ok  '} {label}")
+            click.echo("     " + " ".join(statement.split())[:400])
+            if repeated:
+                click.echo(f"       ! ran {runs[statement]} times in one request (N+1?)")
+            for line in plan:
+                click.echo(f"       {'!' if line in problems else ' '} {line}")
+    if not verbose:
+        click.echo(f"{label:>36}: {len(seen)} quer{'y' if len(seen) == 1 else 'ies'} checked "
+                   f"({len(statements)} run)")
+    return failures
+
+
+def _password_hash() -> str:
+    from werkzeug.security import generate_password_hash
+    return generate_password_hash("explain")
+
+
+# --- load generator ---
+
+class _LoadStats:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.statuses: Counter = Counter()
+        self.errors: Counter = Counter()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple[int, bool]:
+    """Read one HTTP/1.1 response; (status, whether the server closes the connection)."""
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ", 2)[1])
+    headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(":") for line in head[1:] if line)}
+    close = headers.get("connection", "").lower() == "close" or head[0].startswith("HTTP/1.0")
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+        close = True
+    return status, close
+
+
+async def _load_client(target, paths: list[str], start: int, deadline: float, slow_delay: float,
+                       timeout: float, stats: _LoadStats) -> None:
+    host, port, host_header = target
+    reader = writer = None
+    i = start
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        request = f"GET {path} HTTP/1.1\r\nHost: {host_header}\r\nAccept: application/json\r\n".encode()
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            if slow_delay:
+                # a slow client: the server has the request line but must wait for the end of the headers
+                writer.write(request)
+                await writer.drain()
+                await asyncio.sleep(slow_delay)
+            else:
+                writer.write(request)
+            writer.write(b"\r\n")
+            status, close = await asyncio.wait_for(_read_response(reader), timeout)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, TimeoutError) as e:
+            stats.errors[type(e).__name__] += 1
+            close = True
+        else:
+            stats.latencies.append(time.perf_counter() - started - slow_delay)
+            stats.statuses[status] += 1
+        if close and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+def _report(label: str, stats: _LoadStats, elapsed: float) -> None:
+    lat = sorted(stats.latencies)
+    if not lat:
+        click.echo(f"{label}: no successful requests; errors {dict(stats.errors)}")
+        return
+    pct = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] * 1000
+    click.echo(f"{label}: {len(lat)} requests in {elapsed:.1f}s = {len(lat) / elapsed:,.0f} req/s; "
+               f"latency p50 {pct(0.5):.1f} ms, p90 {pct(0.9):.1f} ms, p99 {pct(0.99):.1f} ms, "
+               f"max {lat[-1] * 1000:.1f} ms")
+    click.echo(f"{'':>{len(label)}}  status {dict(sorted(stats.statuses.items()))}"
+               + (f", errors {dict(stats.errors)}" if stats.errors else ""))
+
+
+@cli.command("load")
+@click.argument("urls", nargs=-1, required=True)
+@click.option("-c", "--connections", default=500, show_default=True, help="Concurrent client connections.")
+@click.option("-d", "--duration", default=10.0, show_default=True, help="Seconds to run.")
+@click.option("--slow", default=0, show_default=True,
+              help="How many of the connections are slow clients, pausing mid-request.")
+@click.option("--slow-delay", default=1.0, show_default=True, help="Pause of each slow client, in seconds.")
+@click.option("--timeout", default=30.0, show_default=True, help="Per-request timeout, in seconds.")
+def load(urls: tuple[str, ...], connections: int, duration: float, slow: int, slow_delay: float, timeout: float):
+    """
+    Hold CONNECTIONS keep-alive connections against URLS (one server, paths
+    taken in turn) for DURATION seconds and report throughput and latency.
+    Run it once against the gunicorn workers and once against the ASGI API
+    server (microcred/app/asgi.py) with the same arguments to compare them.
+    """
+    parts = [urlsplit(u) for u in urls]
+    if len({p.netloc for p in parts}) != 1 or any(p.scheme != "http" for p in parts):
+        raise click.BadParameter("give http:// URLs on a single host:port", param_hint="URLS")
+    host, port = parts[0].hostname, parts[0].port or 80
+    paths = [(p.path or "/") + (f"?{p.query}" if p.query else "") for p in parts]
+    slow = min(slow, connections)
+
+    async def run() -> tuple[_LoadStats, _LoadStats, float]:
+        fast_stats, slow_stats = _LoadStats(), _LoadStats()
+        started = time.monotonic()
+        deadline = started + duration
+        target = (host, port, parts[0].netloc)
+        await asyncio.gather(*(
+            _load_client(target, paths, i, deadline, slow_delay if i < slow else 0.0, timeout,
+                         slow_stats if i < slow else fast_stats)
+            for i in range(connections)))
+        return fast_stats, slow_stats, time.monotonic() - started
+
+    click.echo(f"{connections} connections ({slow} slow) for {duration:.0f}s against {parts[0].netloc}")
+    fast_stats, slow_stats, elapsed = asyncio.run(run())
+    _report("clients", fast_stats, elapsed)
+    if slow:
+        _report("slow clients", slow_stats, elapsed)
+
+
+# --- cross-process cache coherence ---
+
+def _coherence_worker(conn, env: str, workdir: str, interval_ms: int, user_ids: list[int], award_id: int) -> None:
+    """A stand-in web worker: on each "look", sync like a request would and report what it has cached."""
+    from .. import create_app
+    from ..services.cache_services import coherence
+    from ..services.catalogue_services import award_catalogue
+    from ..services.principal_services import principals
+
+    app = create_app(env, _scratch_config(workdir, CACHE_COHERENCE_INTERVAL_MS=interval_ms))
+    conn.send("ready")
+    while conn.recv() == "look":
+        with app.app_context():
+            coherence.sync()
+            seen = {}
+            for uid in user_ids:
+                p = principals.get(uid)
+                # id() tells a cache hit (same object as last time) from a reload
+                seen[uid] = (id(p), p.version, p.first_name, tuple(sorted(p.role_names)))
+            conn.send({"principals": seen, "award": award_catalogue().by_id[award_id].name})
+    conn.close()
+
+
+@cli.command("coherence")
+@click.option("--workers", default=3, show_default=True, help="Worker processes sharing the database.")
+@click.option("--interval-ms", default=50, show_default=True, help="Their CACHE_COHERENCE_INTERVAL_MS.")
+def coherence_check(workers: int, interval_ms: int):
+    """
+    Start WORKERS processes on one scratch SQLite database, let each cache
+    two users' principals and the award catalogue, then change things from
+    this process: one user's roles through the ORM, the same user's roles
+    in bulk, the other user's name, an award's name. After every change each
+    worker must have reloaded exactly what changed and kept the rest.
+    """
+    from .. import create_app
+    from ..services.role_services import add_role, attached, remove_role
+
+    workdir = tempfile.mkdtemp(prefix="microcred-coherence-")
+    env = env_name()
+    app = create_app(env, _scratch_config(workdir))
+    with app.app_context():
+        ids = _seed(20, 10, random.Random(42))
+    a, b, award_id = ids["participant"], ids["participant"] + 1, ids["award_id"]
+
+    ctx = multiprocessing.get_context("spawn")
+    procs, pipes = [], []
+    failures = 0
+    try:
+        for _ in range(workers):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_coherence_worker,
+                               args=(child, env, workdir, interval_ms, [a, b], award_id), daemon=True)
+            proc.start()
+            procs.append(proc)
+            pipes.append(parent)
+        for pipe in pipes:
+            if not pipe.poll(60) or pipe.recv() != "ready":
+                raise click.ClickException("a worker failed to start")
+
+        def look() -> list[dict]:
+            time.sleep(2 * interval_ms / 1000)  # past every worker's next sync
+            for pipe in pipes:
+                pipe.send("look")
+            return [pipe.recv() for pipe in pipes]
+
+        def step(label: str, change, reloaded: set[int], expect) -> int:
+            nonlocal before
+            with app.app_context():
+                change()
+                db.session.commit()
+            after = look()
+            problems = []
+            for n, (old, new) in enumerate(zip(before, after), 1):
+                for uid in (a, b):
+                    moved = new["principals"][uid][:2] != old["principals"][uid][:2]
+                    if moved != (uid in reloaded):
+                        problems.append(f"worker {n}: user {uid} {'reloaded' if moved else 'not reloaded'}")
+                problems += [f"worker {n}: {p}" for p in expect(new)]
+            click.echo(f"{'FAIL' if problems else 'ok  '} {label}")
+            for p in problems:
+                click.echo(f"       ! {p}")
+            before = after
+            return bool(problems)
+
+        def roles_of(uid: int, want: set[str]):
+            return lambda seen: ([] if set(seen["principals"][uid][3]) == want
+                                 else [f"user {uid} has roles {list(seen['principals'][uid][3])}"])
+
+        def set_roles_orm():
+            user = db.session.get(User, a)
+            user.roles.extend(attached("issuer"))
+
+        def rename_user():
+            db.session.get(User, b).first_name = "Renamed"
+
+        def rename_award():
+            db.session.get(Award, award_id).name = "Renamed award"
+
+        before = look()
+        failures += step(f"user {a} given a role (ORM)", set_roles_orm, {a}, roles_of(a, {"participant", "issuer"}))
+        failures += step(f"user {a} given a role (bulk)",
+                         lambda: add_role("admin", select(User.id).where(User.id == a)), {a},
+                         roles_of(a, {"participant", "issuer", "admin"}))
+        failures += step(f"user {a} loses a role (bulk)",
+                         lambda: remove_role("issuer", select(User.id).where(User.id.in_([a, b]))), {a},
+                         roles_of(a, {"participant", "admin"}))
+        failures += step(f"user {b} renamed", rename_user, {b},
+                         lambda seen: [] if seen["principals"][b][2] == "Renamed" else [f"user {b} still has the old name"])
+        failures += step(f"award {award_id} renamed", rename_award, set(),
+                         lambda seen: [] if seen["award"] == "Renamed award" else ["catalogue still has the old name"])
+    finally:
+        for pipe in pipes:
+            pipe.send("stop")
+        for proc in procs:
+            proc.join(10)
+        shutil.rmtree(workdir, ignore_errors=True)
+    if failures:
+        raise click.ClickException(f"{failures} change(s) not picked up correctly by every worker")
+    click.echo(f"All {workers} workers saw every change, and only that.")
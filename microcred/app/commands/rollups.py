@@ -0,0 +1,35 @@
+# microcred/app/commands/rollups.py
+import click
+from flask.cli import with_appcontext
+
+from ..services import rollup_services
+
+cli = click.Group("rollups", help="Dashboard rollup tables.")
+
+
+@cli.command("rebuild")
+@click.option("--chunk-size", default=5000, show_default=True, help="Achievements fetched per round trip.")
+@with_appcontext
+def rebuild(chunk_size: int):
+    """Recompute every rollup from the achievements table (after a migration or a bulk import)."""
+    totals = rollup_services.rebuild(chunk_size).totals
+    click.echo(f"Rebuilt rollups: {totals['achievements']} achievement(s), "
+               f"{totals['participants']} participant(s) with awards, {totals['users']} user(s).")
+
+
+@cli.command("check")
+@with_appcontext
+def check():
+    """Compare the stored rollups with a fresh computation; fails on any difference."""
+    fresh = rollup_services.compute().as_rows()
+    stored = rollup_services.stored().as_rows()
+    differences = 0
+    for table, rows in fresh.items():
+        have = stored[table]
+        for key in sorted(rows.keys() | have.keys(), key=str):
+            if rows.get(key) != have.get(key):
+                differences += 1
+                click.echo(f"{table} {key}: stored {have.get(key)}, expected {rows.get(key)}")
+    if differences:
+        raise click.ClickException(f"{differences} rollup row(s) out of date; run `flask rollups rebuild`")
+    click.echo("Rollups match the achievements table.")
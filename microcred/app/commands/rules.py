@@ -0,0 +1,37 @@
+# microcred/app/commands/rules.py
+import os
+import time
+
+import click
+from flask.cli import with_appcontext
+
+from ..process_pool import env_name
+from ..services.rule_engine import backfill, rule_engine
+
+cli = click.Group("rules", help="Automatic award rules.")
+
+
+@cli.command("list")
+@with_appcontext
+def list_rules():
+    """Show the auto-granted awards and their rules."""
+    index = rule_engine.index()
+    if not index:
+        click.echo("No automatic awards.")
+    for snap, rules in index.rules:
+        click.echo(f"{snap.slug}:")
+        for text, _ in rules.rules:
+            click.echo(f"    require: {text}")
+
+
+@cli.command("backfill")
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="Evaluation processes (used from 20k users up).")
+@click.option("--chunk", "chunk_size", default=500, show_default=True, help="Users per work unit.")
+@click.option("--dry-run", is_flag=True, help="Count the grants without writing them.")
+@with_appcontext
+def backfill_command(workers: int, chunk_size: int, dry_run: bool):
+    """Grant every automatic award that existing users already qualify for."""
+    started = time.perf_counter()
+    users, grants = backfill(workers=workers, chunk_size=chunk_size, env_name=env_name(), dry_run=dry_run)
+    verb = "would grant" if dry_run else "granted"
+    click.echo(f"Checked {users} user(s), {verb} {grants} award(s) in {time.perf_counter() - started:.1f}s.")
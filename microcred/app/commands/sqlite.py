@@ -0,0 +1,121 @@
+# microcred/app/commands/sqlite.py
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from ..extensions import db
+from ..sqlite_tuning import profile_pragmas, run_maintenance
+
+cli = click.Group("sqlite", help="SQLite tuning and maintenance.")
+
+
+@cli.command("maintain")
+@click.option("--truncate", is_flag=True, help="Truncate the WAL file after checkpointing.")
+@with_appcontext
+def maintain(truncate: bool):
+    """Checkpoint the WAL and run PRAGMA optimize."""
+    run_maintenance(db.engine, "TRUNCATE" if truncate else "PASSIVE")
+    click.echo("Checkpoint + optimize done.")
+
+
+@cli.command("rebuild-icon-search")
+@with_appcontext
+def rebuild_icon_search_cmd():
+    """Create the icons_fts trigram index (and its triggers) if missing, then re-index all icons."""
+    from ..services.icon_service import rebuild_icon_search
+    rebuild_icon_search()
+    click.echo("icons_fts rebuilt.")
+
+
+@cli.command("pragmas")
+@with_appcontext
+def show_pragmas():
+    """Show the PRAGMA values a pooled connection actually runs with."""
+    with db.engine.connect() as conn:
+        for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size",
+                     "cache_size", "temp_store", "foreign_keys"):
+            value = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            click.echo(f"{name:>13} = {value}")
+
+
+def _run_workload(path: str, pragmas: list[str], writers: int, readers: int, seconds: float) -> tuple[int, int, int]:
+    """Concurrent issuing-style writes and list reads; returns (writes, reads, lock errors)."""
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def connect():
+        # timeout=0 so only the profile's busy_timeout decides how long we wait
+        con = sqlite3.connect(path, timeout=0, isolation_level=None, check_same_thread=False)
+        for stmt in pragmas:
+            con.execute(stmt)
+        return con
+
+    def writer(n: int):
+        con = connect()
+        i = 0
+        while time.monotonic() < stop:
+            try:
+                con.execute("BEGIN IMMEDIATE")
+                con.execute("INSERT INTO achievements(participant_id, award_id, note) VALUES (?, ?, 'bench')",
+                            (n * 1_000_000 + i, i % 50))
+                con.execute("COMMIT")
+                key = "writes"
+                i += 1
+            except sqlite3.OperationalError:
+                if con.in_transaction:
+                    con.execute("ROLLBACK")
+                key = "locked"
+            with lock:
+                counts[key] += 1
+        con.close()
+
+    def reader():
+        con = connect()
+        while time.monotonic() < stop:
+            try:
+                con.execute("SELECT award_id, COUNT(*) FROM achievements GROUP BY award_id").fetchall()
+                key = "reads"
+            except sqlite3.OperationalError:
+                key = "locked"
+            with lock:
+                counts[key] += 1
+        con.close()
+
+    setup = sqlite3.connect(path)
+    setup.execute("CREATE TABLE achievements (id INTEGER PRIMARY KEY, participant_id INT, award_id INT, note TEXT)")
+    setup.execute("CREATE INDEX ix_bench_award ON achievements(award_id)")
+    setup.commit()
+    setup.close()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts["writes"], counts["reads"], counts["locked"]
+
+
+@cli.command("bench")
+@click.option("--writers", default=4, show_default=True)
+@click.option("--readers", default=8, show_default=True)
+@click.option("--seconds", default=5.0, show_default=True)
+@with_appcontext
+def bench(writers: int, readers: int, seconds: float):
+    """Compare SQLite defaults with the configured profile on a scratch database."""
+    profiles = {
+        "default": ["PRAGMA busy_timeout = 5000"],  # the sqlite3 module default
+        "profile": profile_pragmas(current_app.config),
+    }
+    for label, pragmas in profiles.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            w, r, locked = _run_workload(os.path.join(tmp, "bench.db"), pragmas, writers, readers, seconds)
+        click.echo(f"{label:>8}: {w / seconds:8.0f} writes/s  {r / seconds:8.0f} reads/s  "
+                   f"{locked:6d} 'database is locked' errors")
@@ -0,0 +1,128 @@
+# microcred/app/commands/transcripts.py
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import Role, User
+from ..process_pool import app_pool, env_name, worker_app
+from ..services.transcript_services import FORMATS, load_transcripts, render
+
+cli = click.Group("transcripts", help="Participant transcripts.")
+
+
+def _write_transcripts(participant_ids: list[int], out_dir: str, formats: tuple[str, ...], title: str) -> int:
+    """Write <out_dir>/<participant id>.<fmt> for each participant; returns files written."""
+    written = 0
+    for transcript in load_transcripts(participant_ids):
+        for fmt in formats:
+            path = Path(out_dir) / f"{transcript.participant_id}.{fmt}"
+            tmp = path.with_name(path.name + ".part")
+            tmp.write_bytes(render(transcript, fmt, title))
+            os.replace(tmp, path)
+            written += 1
+    return written
+
+
+def _write_chunk(args) -> int:
+    with worker_app().app_context():
+        return _write_transcripts(*args)
+
+
+def _participant_chunks(chunk_size: int, done: set[str], formats: tuple[str, ...]):
+    """Participant ids in id order, in chunks, leaving out those whose files all exist already."""
+    stmt = (select(User.id).join(User.roles).where(Role.name == "participant")
+            .order_by(User.id).execution_options(yield_per=chunk_size))
+    chunk, skipped = [], 0
+    for uid in db.session.scalars(stmt):
+        if all(f"{uid}.{fmt}" in done for fmt in formats):
+            skipped += 1
+            continue
+        chunk.append(uid)
+        if len(chunk) == chunk_size:
+            yield chunk, skipped
+            chunk, skipped = [], 0
+    if chunk or skipped:
+        yield chunk, skipped
+
+
+def _pack(staging: Path, target: Path) -> int:
+    tmp = target.with_name(target.name + ".part")
+    names = sorted((p for p in staging.iterdir() if p.suffix.lstrip(".") in FORMATS),
+                   key=lambda p: (int(p.stem), p.suffix))
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in names:
+            zf.write(path, path.name)
+    os.replace(tmp, target)
+    shutil.rmtree(staging)
+    return len(names)
+
+
+@cli.command("export")
+@click.argument("out", type=click.Path())
+@click.option("--format", "formats", type=click.Choice(FORMATS), multiple=True,
+              help="Repeat for several; default both.")
+@click.option("--zip", "as_zip", is_flag=True, help="Write OUT as a single zip instead of a directory.")
+@click.option("--title", default="Transcript", show_default=True, help="Heading on each PDF page.")
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="Rendering processes.")
+@click.option("--chunk", "chunk_size", default=500, show_default=True, help="Participants per work unit.")
+@click.option("--fresh", is_flag=True, help="Rewrite every transcript instead of resuming.")
+@with_appcontext
+def export(out: str, formats: tuple[str, ...], as_zip: bool, title: str, workers: int, chunk_size: int,
+           fresh: bool):
+    """
+    Write a transcript for every participant into OUT.
+
+    Each file is renamed into place once complete, so an interrupted run is
+    resumed by running the same command again: participants whose files all
+    exist are skipped. With --zip the files are collected in OUT.parts/ and
+    packed into OUT at the end.
+    """
+    formats = formats or FORMATS
+    target = Path(out)
+    staging = target.with_name(target.name + ".parts") if as_zip else target
+    if fresh and staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir(parents=True, exist_ok=True)
+    done = {p.name for p in os.scandir(staging)}
+
+    started = time.perf_counter()
+    written = skipped = participants = 0
+
+    def progress():
+        click.echo(f"  {participants + skipped} participant(s), {written} file(s) "
+                   f"({time.perf_counter() - started:.0f}s)")
+
+    if workers > 1:
+        # stream chunks to the pool, keeping only a few in flight
+        with app_pool(workers, env_name()) as pool:
+            pending = set()
+            for ids, already in _participant_chunks(chunk_size, done, formats):
+                skipped += already
+                if ids:
+                    pending.add(pool.submit(_write_chunk, (ids, str(staging), formats, title)))
+                    participants += len(ids)
+                if len(pending) >= 2 * workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    written += sum(f.result() for f in finished)
+                    progress()
+            written += sum(f.result() for f in wait(pending).done)
+    else:
+        for ids, already in _participant_chunks(chunk_size, done, formats):
+            skipped += already
+            if ids:
+                written += _write_transcripts(ids, str(staging), formats, title)
+                participants += len(ids)
+                progress()
+    elapsed = time.perf_counter() - started
+    click.echo(f"Wrote {written} file(s) for {participants} participant(s) in {elapsed:.1f}s "
+               f"({skipped} already done, {workers if workers > 1 else 1} process(es)).")
+    if as_zip:
+        click.echo(f"Packed {_pack(staging, target)} file(s) into {target}.")
@@ -0,0 +1,117 @@
+# microcred/app/commands/users.py
+import csv
+import os
+import time
+from pathlib import Path
+
+import click
+from flask.cli import with_appcontext
+from werkzeug.security import generate_password_hash
+
+from ..extensions import db
+from ..process_pool import cpu_pool
+from ..services.invite_services import invite_token, invite_url
+from ..services.roster_services import RosterError, insert_users, read_roster, role_ids
+
+cli = click.Group("users", help="User accounts.")
+
+INVITE_HEADER = ("email", "first_name", "last_name", "invite_url")
+
+
+def _invited(path: str) -> set[str]:
+    """Emails that already have a line in the invites CSV."""
+    try:
+        with open(path, newline="", encoding="utf-8") as fh:
+            return {row["email"] for row in csv.DictReader(fh) if row.get("email")}
+    except FileNotFoundError:
+        return set()
+
+
+@cli.command("import")
+@click.argument("roster", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--role", "roles", multiple=True, default=("participant",), show_default=True,
+              help="Role for every imported user; repeat for several.")
+@click.option("--invites", "invites_path", type=click.Path(dir_okay=False), default=None,
+              help="Invite users whose row has no password: append their links to this CSV.")
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="Hashing processes.")
+@click.option("--batch", "batch_size", default=1000, show_default=True, help="Users per transaction.")
+@click.option("--dry-run", is_flag=True, help="Validate and report; write nothing.")
+@with_appcontext
+def import_roster(roster, roles: tuple[str, ...], invites_path: str | None, workers: int, batch_size: int,
+                  dry_run: bool):
+    """
+    Create users from ROSTER, a CSV with an email column and optional
+    first_name, last_name and password columns.
+
+    Emails already in the database are skipped, so an interrupted import can
+    simply be run again. With --invites, existing users from the roster who
+    still have no password and no line in the invites file get one, so
+    links lost to an interruption are issued on the rerun.
+    """
+    try:
+        parsed = read_roster(roster)
+        role_list = role_ids(roles) if roles else []
+    except RosterError as exc:
+        raise click.ClickException(str(exc))
+    for line, reason in parsed.invalid:
+        click.echo(f"line {line}: {reason}", err=True)
+    rows = parsed.rows
+    without_password = sum(1 for r in rows if r.password is None)
+    uninvited = []  # (row, id) of existing users an earlier run didn't get to invite
+    if invites_path:
+        invited = _invited(invites_path)
+        uninvited = [(r, uid) for r, uid in parsed.passwordless if r.email not in invited]
+    click.echo(f"{len(rows)} new user(s); {parsed.existing} already exist, {parsed.duplicates} duplicate(s), "
+               f"{len(parsed.invalid)} invalid.")
+    if without_password and not invites_path:
+        raise click.ClickException(f"{without_password} row(s) have no password; pass --invites FILE "
+                                   "to invite them instead")
+    if uninvited:
+        click.echo(f"{len(uninvited)} existing user(s) without a password have no invite in {invites_path} "
+                   "yet; they get one too.")
+    elif parsed.passwordless and not invites_path:
+        click.echo(f"{len(parsed.passwordless)} existing user(s) have no password yet; pass --invites FILE "
+                   "to invite any an earlier run missed.")
+    if dry_run or not (rows or uninvited):
+        return
+
+    started = time.perf_counter()
+    passwords = [r.password for r in rows if r.password is not None]
+    procs = workers if workers > 1 and len(passwords) > 1 else 1
+    pool = cpu_pool(procs) if procs > 1 else None
+    invites_file = None
+    try:
+        # results come back in order while later ones are still being computed,
+        # so each batch is written as soon as its hashes are ready
+        chunksize = max(1, min(64, len(passwords) // (4 * procs)))
+        hashed = (pool.map(generate_password_hash, passwords, chunksize=chunksize) if pool
+                  else map(generate_password_hash, passwords))
+        if invites_path:
+            new_file = not Path(invites_path).exists()
+            invites_file = open(invites_path, "a", newline="", encoding="utf-8")
+            invites = csv.writer(invites_file)
+            if new_file:
+                invites.writerow(INVITE_HEADER)
+            invites.writerows((r.email, r.first_name, r.last_name, invite_url(invite_token(uid)))
+                              for r, uid in uninvited)
+            invites_file.flush()
+        created = 0
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            hashes = [next(hashed) if r.password is not None else None for r in batch]
+            ids = insert_users(batch, hashes, role_list)
+            db.session.commit()
+            if invites_file is not None:
+                invites.writerows((r.email, r.first_name, r.last_name, invite_url(invite_token(ids[r.email])))
+                                  for r in batch if r.password is None)
+                invites_file.flush()
+            created += len(ids)
+            click.echo(f"  {created}/{len(rows)} ({time.perf_counter() - started:.0f}s)")
+    finally:
+        if invites_file is not None:
+            invites_file.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    click.echo(f"Created {created} user(s) in {time.perf_counter() - started:.1f}s "
+               f"({len(passwords)} password(s) hashed in {procs} process(es), "
+               f"{without_password + len(uninvited)} invite(s)).")
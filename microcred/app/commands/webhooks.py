@@ -0,0 +1,182 @@
+# microcred/app/commands/webhooks.py
+import json
+import secrets
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from ..extensions import db
+from ..models import WebhookOutbox, WebhookSubscription
+from ..services import webhook_services
+from ..webhook_dispatcher import Dispatcher
+
+cli = click.Group("webhooks", help="Webhook subscriptions and delivery.")
+
+
+def _endpoint(ctx, param, url: str) -> str:
+    parts = urlsplit(url)
+    try:
+        parts.port  # raises on a port that isn't a number in range
+    except ValueError as exc:
+        raise click.BadParameter(str(exc))
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise click.BadParameter("give an http:// or https:// URL with a host")
+    return url
+
+
+@cli.command("add")
+@click.argument("url", callback=_endpoint)
+@click.option("--events", default="granted", show_default=True, help='Comma list of event kinds, or "*".')
+@click.option("--secret", default=None, help="Signing secret (generated if omitted).")
+@click.option("--batch-size", default=50, show_default=True)
+@click.option("--concurrency", default=2, show_default=True, help="Max POSTs in flight to this endpoint.")
+@with_appcontext
+def add(url: str, events: str, secret: str | None, batch_size: int, concurrency: int):
+    """Subscribe URL to achievement events."""
+    sub = WebhookSubscription(url=url, events=events, secret=secret or secrets.token_hex(24),
+                              batch_size=batch_size, max_concurrency=concurrency)
+    db.session.add(sub)
+    db.session.commit()
+    click.echo(f"Subscription {sub.id} -> {sub.url} [{sub.events}] secret={sub.secret}")
+
+
+@cli.command("list")
+@with_appcontext
+def list_subscriptions():
+    """Show subscriptions and their outbox backlog."""
+    for sub in WebhookSubscription.query.order_by(WebhookSubscription.id):
+        pending = sub.outbox.filter(WebhookOutbox.delivered_at.is_(None), WebhookOutbox.dead_at.is_(None)).count()
+        dead = sub.outbox.filter(WebhookOutbox.dead_at.isnot(None)).count()
+        state = "active" if sub.active else "paused"
+        click.echo(f"{sub.id:>4} {state:<6} {sub.url} [{sub.events}] pending={pending} dead={dead}")
+
+
+@cli.command("remove")
+@click.argument("subscription_id", type=int)
+@with_appcontext
+def remove(subscription_id: int):
+    """Delete a subscription and its outbox rows."""
+    sub = db.session.get(WebhookSubscription, subscription_id)
+    if sub is None:
+        raise click.ClickException(f"No subscription {subscription_id}")
+    WebhookOutbox.query.filter_by(subscription_id=sub.id).delete()
+    db.session.delete(sub)
+    db.session.commit()
+    click.echo(f"Removed subscription {subscription_id}.")
+
+
+@cli.command("dispatch")
+@click.option("--drain", is_flag=True, help="Exit once nothing is left to deliver.")
+@with_appcontext
+def dispatch(drain: bool):
+    """Run the delivery loop (Ctrl-C to stop)."""
+    dispatcher = Dispatcher.from_config(db.engine, current_app.config)
+    stop = threading.Event()
+    try:
+        dispatcher.run(stop, drain=drain)
+    except KeyboardInterrupt:
+        stop.set()
+
+
+# --- benchmark against a local stand-in endpoint ---
+
+class _StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse shows up in the stats
+    server: "_StandInServer"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        received = time.time()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        failed = self.server.rng.random() < self.server.fail_rate
+        if not failed:
+            events = json.loads(body)["events"]
+            with self.server.lock:
+                self.server.posts += 1
+                for ev in events:
+                    if ev["seq"] not in self.server.seen:
+                        self.server.seen.add(ev["seq"])
+                        self.server.latencies.append(received - ev["bench_ts"])
+        self.send_response(503 if failed else 204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class _StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fail_rate: float, latency: float):
+        super().__init__(("127.0.0.1", 0), _StandIn)
+        import random
+        self.rng = random.Random(1)
+        self.fail_rate, self.latency = fail_rate, latency
+        self.lock = threading.Lock()
+        self.connections = self.posts = 0
+        self.seen: set[int] = set()
+        self.latencies: list[float] = []
+
+
+@cli.command("bench")
+@click.option("--events", "n_events", default=5000, show_default=True)
+@click.option("--endpoints", default=3, show_default=True)
+@click.option("--batch-size", default=50, show_default=True)
+@click.option("--concurrency", default=2, show_default=True, help="Per-endpoint POSTs in flight.")
+@click.option("--fail-rate", default=0.0, show_default=True, help="Fraction of POSTs answered with 503.")
+@click.option("--latency-ms", default=5.0, show_default=True, help="Stand-in endpoint response time.")
+@with_appcontext
+def bench(n_events: int, endpoints: int, batch_size: int, concurrency: int, fail_rate: float, latency_ms: float):
+    """
+    Deliver synthetic events to a local stand-in server and report throughput
+    and delivery latency. Writes to the configured database and delivers
+    anything else pending too, so point DATABASE_URL at a scratch copy.
+    """
+    server = _StandInServer(fail_rate, latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    subs = [WebhookSubscription(url=f"{base}/hook/{i}", events="*", secret="bench",
+                                batch_size=batch_size, max_concurrency=concurrency) for i in range(endpoints)]
+    db.session.add_all(subs)
+    db.session.commit()
+    sub_ids = [s.id for s in subs]
+    try:
+        started = time.time()
+        events = [{"seq": i, "kind": "granted", "participant_id": i, "award_id": 1, "bench_ts": started}
+                  for i in range(n_events)]
+        webhook_services.enqueue(db.session, events)
+        db.session.commit()
+
+        cfg = current_app.config
+        dispatcher = Dispatcher(db.engine, max_in_flight=max(cfg["WEBHOOK_MAX_IN_FLIGHT"], endpoints * concurrency),
+                                timeout=cfg["WEBHOOK_TIMEOUT"], backoff_base=0.05, backoff_max=1.0,
+                                poll_interval=0.05)
+        dispatcher.run(drain=True)
+        elapsed = time.time() - started
+    finally:
+        WebhookOutbox.query.filter(WebhookOutbox.subscription_id.in_(sub_ids)).delete()
+        WebhookSubscription.query.filter(WebhookSubscription.id.in_(sub_ids)).delete()
+        db.session.commit()
+        server.shutdown()
+
+    lat = sorted(server.latencies)
+    delivered = n_events * endpoints
+    click.echo(f"{delivered} deliveries ({n_events} events x {endpoints} endpoints) in {elapsed:.2f}s "
+               f"= {delivered / elapsed:,.0f}/s")
+    click.echo(f"{server.posts} successful POSTs over {server.connections} connection(s)")
+    if lat:
+        click.echo(f"latency (enqueue->received): p50 {statistics.median(lat) * 1000:.0f} ms, "
+                   f"p95 {lat[int(len(lat) * 0.95) - 1] * 1000:.0f} ms, max {lat[-1] * 1000:.0f} ms")
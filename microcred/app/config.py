@@ -7,6 +7,10 @@ PROJECT_ROOT: Final[Path] = Path(__file__).resolve().parents[2]
 INSTANCE_DIR: Final[Path] = PROJECT_ROOT / "instance"
 INSTANCE_DIR.mkdir(parents=True, exist_ok=True)
 
+def env_name(default: str = "development") -> str:
+    """Config to use: APP_ENV, then FLASK_ENV, then ``default``."""
+    return os.getenv("APP_ENV") or os.getenv("FLASK_ENV") or default
+
 def _bool(name: str, default: bool = False) -> bool:
     return os.getenv(name, str(default)).lower() in {"1", "true", "yes", "on"}
 
@@ -32,8 +36,28 @@ def _normalise_sqlite_uri(uri: str) -> str:
     abs_path.parent.mkdir(parents=True, exist_ok=True)
     return f"{prefix}{abs_path.as_posix()}"
 
+def missing_settings(config) -> list[str]:
+    """Names in ``REQUIRED_SETTINGS`` that are unset or empty."""
+    return [name for name in config.get("REQUIRED_SETTINGS", ()) if not config.get(name)]
+
 DEFAULT_SQLITE = f"sqlite:///{(INSTANCE_DIR / 'app.db').as_posix()}"
 
+def _engine_options(uri: str, *, pool_size: int, max_overflow: int,
+                    pool_timeout: float, pool_recycle: int) -> dict:
+    """
+    SQLAlchemy engine/pool options. In-memory SQLite uses a
+    SingletonThreadPool, which does not take queue-pool arguments.
+    """
+    if uri in ("sqlite://", "sqlite:///:memory:"):
+        return {}
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": _bool("SQLALCHEMY_POOL_PRE_PING", False),
+    }
+
 class Config:
     # Core
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-change-me")
@@ -44,6 +68,29 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Engine pool (per worker process)
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(
+        SQLALCHEMY_DATABASE_URI,
+        pool_size=int(os.getenv("SQLALCHEMY_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("SQLALCHEMY_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("SQLALCHEMY_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("SQLALCHEMY_POOL_RECYCLE", "-1")),
+    )
+
+    # Read/write split: @read_only views use a separate read engine
+    DB_READ_SPLIT = _bool("DB_READ_SPLIT", False)
+    SQLALCHEMY_READ_DATABASE_URI = os.getenv("SQLALCHEMY_READ_DATABASE_URI")  # default: mode=ro on the primary file
+
+    # SQLite performance profile, applied to every new connection
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-20000"))  # negative = KiB
+    SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+    SQLITE_FOREIGN_KEYS = _bool("SQLITE_FOREIGN_KEYS", True)
+    SQLITE_MAINTENANCE_INTERVAL = float(os.getenv("SQLITE_MAINTENANCE_INTERVAL", "300"))
+
     # App-specific
     AWARD_IMAGE_BASE = os.getenv("AWARD_IMAGE_BASE", "/static/awards")
 
@@ -56,12 +103,124 @@ class Config:
     # CSRF
     WTF_CSRF_ENABLED = _bool("WTF_CSRF_ENABLED", True)
 
+    # How often each worker polls cache_versions for changes made by other workers
+    CACHE_COHERENCE_INTERVAL_MS = int(os.getenv("CACHE_COHERENCE_INTERVAL_MS", "250"))
+
+    # API caches: fresh for API_CACHE_TTL, then served stale while one request refreshes
+    API_CACHE_TTL = float(os.getenv("API_CACHE_TTL", "30"))
+    API_CACHE_STALE_TTL = float(os.getenv("API_CACHE_STALE_TTL", "300"))
+    SINGLEFLIGHT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_TIMEOUT", "10"))
+    # Set to coalesce cache rebuilds across worker processes too (POSIX file locks)
+    SINGLEFLIGHT_LOCK_DIR = os.getenv("SINGLEFLIGHT_LOCK_DIR")
+
+    # Batch holdings endpoint: max participants per call, ids per IN (...) query
+    # (kept under SQLite's bound-parameter limit), and when to stream the body
+    API_BATCH_MAX = int(os.getenv("API_BATCH_MAX", "5000"))
+    API_BATCH_CHUNK = int(os.getenv("API_BATCH_CHUNK", "500"))
+    API_BATCH_STREAM_THRESHOLD = int(os.getenv("API_BATCH_STREAM_THRESHOLD", "200"))
+
+    # Achievement change feed: page size cap, and retention for `flask events compact`
+    API_CHANGES_MAX_LIMIT = int(os.getenv("API_CHANGES_MAX_LIMIT", "1000"))
+    ACHIEVEMENT_EVENTS_COMPACT_AFTER_DAYS = int(os.getenv("ACHIEVEMENT_EVENTS_COMPACT_AFTER_DAYS", "7"))
+    ACHIEVEMENT_EVENTS_RETENTION_DAYS = int(os.getenv("ACHIEVEMENT_EVENTS_RETENTION_DAYS", "180"))
+
+    # Optional async API server (microcred/app/asgi.py): read-only aiosqlite connections per process
+    ASGI_DB_POOL_SIZE = int(os.getenv("ASGI_DB_POOL_SIZE", "8"))
+
+    # Production server: gunicorn -c python:microcred.app.gunicorn_conf microcred.app.wsgi:app
+    # SERVER_THREADS > 1 switches to threaded workers; keep it within the engine pool size
+    SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:8000")
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(min(2 * (os.cpu_count() or 1) + 1, 9))))
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", "1"))
+    SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "30"))
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+    SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "5"))
+    SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))  # recycle a worker after N; 0 = never
+    SERVER_WARM_UP = _bool("SERVER_WARM_UP", True)
+
+    # Webhook dispatcher (`flask webhooks dispatch`)
+    WEBHOOK_MAX_IN_FLIGHT = int(os.getenv("WEBHOOK_MAX_IN_FLIGHT", "16"))
+    WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+    WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "12"))
+    WEBHOOK_BACKOFF_BASE = float(os.getenv("WEBHOOK_BACKOFF_BASE", "2"))      # seconds; doubles per attempt
+    WEBHOOK_BACKOFF_MAX = float(os.getenv("WEBHOOK_BACKOFF_MAX", "3600"))
+    WEBHOOK_LEASE_SECONDS = float(os.getenv("WEBHOOK_LEASE_SECONDS", "60"))
+    WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "1"))
+
+    # Open Badges assertions. Bump ASSERTION_KEY_ID when rotating the key: cached
+    # signatures are kept per key version. Without an RSA key (or the cryptography
+    # package) assertions are HMAC-signed with ASSERTION_HMAC_SECRET / SECRET_KEY.
+    # ASSERTION_HMAC_SECRET also derives the public assertion ids behind every
+    # shared /verify link, so it must outlive SECRET_KEY rotations; production
+    # refuses to start without it (see REQUIRED_SETTINGS).
+    PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://localhost:5000")
+    ISSUER_NAME = os.getenv("ISSUER_NAME", "Micro-Credentialling")
+    ISSUER_URL = os.getenv("ISSUER_URL", PUBLIC_BASE_URL)
+    ISSUER_EMAIL = os.getenv("ISSUER_EMAIL")
+    ASSERTION_KEY_ID = os.getenv("ASSERTION_KEY_ID", "v1")
+    ASSERTION_PRIVATE_KEY_PATH = os.getenv("ASSERTION_PRIVATE_KEY_PATH")
+    ASSERTION_HMAC_SECRET = os.getenv("ASSERTION_HMAC_SECRET")
+    ASSERTION_CACHE_DIR = os.getenv("ASSERTION_CACHE_DIR", str(INSTANCE_DIR / "assertions"))
+
+    # Public /verify pages: rendered responses kept per worker, and how long clients/CDNs may cache them
+    VERIFY_CACHE_SIZE = int(os.getenv("VERIFY_CACHE_SIZE", "20000"))
+    VERIFY_MAX_AGE = int(os.getenv("VERIFY_MAX_AGE", "3600"))
+    VERIFY_NOT_FOUND_MAX_AGE = int(os.getenv("VERIFY_NOT_FOUND_MAX_AGE", "60"))
+
+    # Shareable badge cards: rendered once, kept in a size-bounded LRU directory
+    BADGE_IMAGE_CACHE_DIR = os.getenv("BADGE_IMAGE_CACHE_DIR", str(INSTANCE_DIR / "badge_images"))
+    BADGE_IMAGE_CACHE_MAX_MB = int(os.getenv("BADGE_IMAGE_CACHE_MAX_MB", "256"))
+    BADGE_IMAGE_FONT = os.getenv("BADGE_IMAGE_FONT")  # a .ttf; DejaVu/Arial or Pillow's default otherwise
+
+    # Max age (seconds) of the principal carried in the session before it is re-checked
+    PRINCIPAL_SESSION_TTL = int(os.getenv("PRINCIPAL_SESSION_TTL", "300"))
+
+    # How long invite links from `flask users import --invites` stay valid (seconds)
+    INVITE_MAX_AGE = int(os.getenv("INVITE_MAX_AGE", str(14 * 24 * 3600)))
+
+    # Performance instrumentation (Server-Timing header + slow request/query log)
+    PERF_INSTRUMENTATION = _bool("PERF_INSTRUMENTATION", True)
+    PERF_SAMPLE_RATE = float(os.getenv("PERF_SAMPLE_RATE", "1.0"))
+    PERF_SLOW_REQUEST_MS = float(os.getenv("PERF_SLOW_REQUEST_MS", "500"))
+    PERF_SLOW_QUERY_MS = float(os.getenv("PERF_SLOW_QUERY_MS", "100"))
+    PERF_SERVER_TIMING = _bool("PERF_SERVER_TIMING", True)
+    PERF_EXPLAIN_SLOW_QUERIES = _bool("PERF_EXPLAIN_SLOW_QUERIES", True)
+
+    # Prometheus metrics at /metrics; set a multiprocess dir when running several workers
+    METRICS_ENABLED = _bool("METRICS_ENABLED", True)
+    METRICS_MULTIPROCESS_DIR = os.getenv("METRICS_MULTIPROCESS_DIR")
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+    # Settings create_app refuses to start without
+    REQUIRED_SETTINGS: tuple[str, ...] = ()
+
 class DevConfig(Config):
     DEBUG = True
 
 class ProdConfig(Config):
     DEBUG = False
 
+    # Falling back to SECRET_KEY would tie every /verify link to the session secret.
+    # Existing installs: set it to the current SECRET_KEY to keep the links already shared.
+    REQUIRED_SETTINGS = ("ASSERTION_HMAC_SECRET",)
+
+    # Only break down a small share of requests; slow requests and queries are still logged
+    PERF_SAMPLE_RATE = float(os.getenv("PERF_SAMPLE_RATE", "0.05"))
+
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(
+        Config.SQLALCHEMY_DATABASE_URI,
+        pool_size=int(os.getenv("SQLALCHEMY_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("SQLALCHEMY_MAX_OVERFLOW", "20")),
+        pool_timeout=float(os.getenv("SQLALCHEMY_POOL_TIMEOUT", "10")),
+        pool_recycle=int(os.getenv("SQLALCHEMY_POOL_RECYCLE", "3600")),
+    )
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000"))
+    DB_READ_SPLIT = _bool("DB_READ_SPLIT", True)
+
+    # gunicorn workers each keep their own registry; merge them through instance/metrics
+    METRICS_MULTIPROCESS_DIR = os.getenv("METRICS_MULTIPROCESS_DIR", str(INSTANCE_DIR / "metrics"))
+
 CONFIG_MAP = {
     "development": DevConfig,
     "production": ProdConfig,
@@ -0,0 +1,236 @@
+# microcred/app/criteria.py
+"""
+Award criteria language.
+
+``Award.criteria`` stays free text for people; lines starting with
+``require:`` are rules, and every rule must hold::
+
+    Finish the intro module and two data badges.
+    require: has(python-novice) and points >= 30
+    require: count(data) >= 2 or role(issuer)
+
+Terms: ``has(slug, ...)`` (holds all of them), ``role(name, ...)`` (has any
+of them), ``points`` (sum over held awards), ``awards`` (number held),
+``count(category)`` (held awards in a category). Comparisons use
+``>= > <= < == !=``; combine with ``and``, ``or``, ``not`` and parentheses.
+
+``compile_criteria`` turns the text into plain closures over ``Facts``, so
+evaluating a compiled rule is a handful of set lookups. Nothing here touches
+the database.
+"""
+from __future__ import annotations
+
+import operator
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Mapping
+
+RULE_PREFIX = "require:"
+
+
+class CriteriaError(ValueError):
+    """The criteria text has a rule that doesn't parse."""
+
+
+@dataclass(frozen=True, slots=True)
+class Facts:
+    """What the rules can see about one user."""
+    held: frozenset[str] = frozenset()                  # award slugs
+    points: int = 0
+    categories: Mapping[str, int] = field(default_factory=dict)
+    roles: frozenset[str] = frozenset()
+
+    def plus(self, slug: str, points: int, category: str | None) -> "Facts":
+        """These facts after one more award."""
+        categories = dict(self.categories)
+        if category:
+            categories[category] = categories.get(category, 0) + 1
+        return Facts(self.held | {slug}, self.points + points, categories, self.roles)
+
+
+Predicate = Callable[[Facts], bool]
+
+
+def split_criteria(text: str | None) -> tuple[str, list[str]]:
+    """(prose for display, rule expressions)."""
+    prose, rules = [], []
+    for line in (text or "").splitlines():
+        stripped = line.strip()
+        if stripped.lower().startswith(RULE_PREFIX):
+            rules.append(stripped[len(RULE_PREFIX):].strip())
+        else:
+            prose.append(line)
+    return "\n".join(prose).strip(), [r for r in rules if r]
+
+
+# --- parsing ---
+
+_TOKEN = re.compile(r"\s*(?:(>=|<=|==|!=|[<>(),=])|([A-Za-z0-9_.\-]+))")
+_COMPARE = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt,
+            "==": operator.eq, "!=": operator.ne}
+
+
+def _tokens(expr: str) -> Iterator[str]:
+    pos = 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        m = _TOKEN.match(expr, pos)
+        if not m:
+            raise CriteriaError(f"Unexpected {expr[pos:].strip()[:20]!r} in {expr!r}")
+        yield m.group(1) or m.group(2)
+        pos = m.end()
+
+
+class _Parser:
+    def __init__(self, expr: str) -> None:
+        self.expr = expr
+        self.toks = list(_tokens(expr))
+        self.i = 0
+        self.slugs: set[str] = set()
+        self.categories: set[str] = set()
+        self.aggregate = False  # uses points/awards, so any grant can change the outcome
+
+    def peek(self) -> str | None:
+        return self.toks[self.i] if self.i < len(self.toks) else None
+
+    def take(self, expected: str | None = None) -> str:
+        tok = self.peek()
+        if tok is None or (expected is not None and tok != expected):
+            want = f"{expected!r}" if expected else "more input"
+            raise CriteriaError(f"Expected {want} in {self.expr!r}")
+        self.i += 1
+        return tok
+
+    def parse(self) -> Predicate:
+        pred = self.or_()
+        if self.peek() is not None:
+            raise CriteriaError(f"Unexpected {self.peek()!r} in {self.expr!r}")
+        return pred
+
+    def or_(self) -> Predicate:
+        parts = [self.and_()]
+        while self.peek() == "or":
+            self.take()
+            parts.append(self.and_())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda f: any(p(f) for p in parts)
+
+    def and_(self) -> Predicate:
+        parts = [self.not_()]
+        while self.peek() == "and":
+            self.take()
+            parts.append(self.not_())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda f: all(p(f) for p in parts)
+
+    def not_(self) -> Predicate:
+        if self.peek() == "not":
+            self.take()
+            inner = self.not_()
+            return lambda f: not inner(f)
+        return self.atom()
+
+    def arg(self) -> str:
+        tok = self.take()
+        if self.peek() == "=":  # keyword form, e.g. category=data
+            self.take()
+            return f"{tok}={self.take()}"
+        return tok
+
+    def args(self) -> list[str]:
+        self.take("(")
+        out = [self.arg()]
+        while self.peek() == ",":
+            self.take()
+            out.append(self.arg())
+        self.take(")")
+        return out
+
+    def atom(self) -> Predicate:
+        tok = self.peek()
+        if tok == "(":
+            self.take()
+            inner = self.or_()
+            self.take(")")
+            return inner
+        if tok == "has":
+            self.take()
+            slugs = frozenset(self.args())
+            self.slugs |= slugs
+            return lambda f: slugs <= f.held
+        if tok == "role":
+            self.take()
+            roles = frozenset(self.args())
+            return lambda f: not roles.isdisjoint(f.roles)
+        return self.comparison()
+
+    def comparison(self) -> Predicate:
+        tok = self.take()
+        if tok == "points":
+            self.aggregate = True
+            value = lambda f: f.points
+        elif tok == "awards":
+            self.aggregate = True
+            value = lambda f: len(f.held)
+        elif tok == "count":
+            args = self.args()
+            if len(args) != 1:
+                raise CriteriaError(f"count() takes one category in {self.expr!r}")
+            category = args[0].removeprefix("category=")
+            self.categories.add(category)
+            value = lambda f: f.categories.get(category, 0)
+        else:
+            raise CriteriaError(f"Unknown term {tok!r} in {self.expr!r}")
+        op = self.take()
+        if op not in _COMPARE:
+            raise CriteriaError(f"Expected a comparison after {tok!r} in {self.expr!r}")
+        number = self.take()
+        if not number.isdigit():
+            raise CriteriaError(f"Expected a number, got {number!r} in {self.expr!r}")
+        compare, bound = _COMPARE[op], int(number)
+        return lambda f: compare(value(f), bound)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledCriteria:
+    rules: tuple[tuple[str, Predicate], ...]
+    # What the outcome depends on: awards named in has(), categories counted,
+    # and whether points/awards totals are used
+    slugs: frozenset[str]
+    categories: frozenset[str] = frozenset()
+    aggregate: bool = False
+
+    def depends_on(self, slug: str, category: str | None) -> bool:
+        """Could gaining award ``slug`` change the outcome?"""
+        return self.aggregate or slug in self.slugs or (category is not None and category in self.categories)
+
+    def check(self, facts: Facts) -> tuple[bool, str]:
+        for text, pred in self.rules:
+            if not pred(facts):
+                return False, f"requires {text}"
+        return True, "OK"
+
+    def __call__(self, facts: Facts) -> bool:
+        return all(pred(facts) for _, pred in self.rules)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+
+ALWAYS = CompiledCriteria((), frozenset())
+
+
+def compile_criteria(text: str | None) -> CompiledCriteria:
+    _, exprs = split_criteria(text)
+    if not exprs:
+        return ALWAYS
+    rules, slugs, categories, aggregate = [], set(), set(), False
+    for expr in exprs:
+        parser = _Parser(expr)
+        rules.append((expr, parser.parse()))
+        slugs |= parser.slugs
+        categories |= parser.categories
+        aggregate = aggregate or parser.aggregate
+    return CompiledCriteria(tuple(rules), frozenset(slugs), frozenset(categories), aggregate)
@@ -0,0 +1,101 @@
+# microcred/app/db_routing.py
+"""
+Read/write session routing.
+
+Views opted in with ``@read_only`` (or a whole blueprint via
+``read_only_blueprint``) run their ORM queries against a separate read
+engine: a ``mode=ro`` URI on the same SQLite file by default, or a replica
+given by ``SQLALCHEMY_READ_DATABASE_URI``. Everything else stays on the
+primary. Flushing pending changes from a read session raises
+``ReadOnlySessionError`` instead of silently writing.
+"""
+from __future__ import annotations
+
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import Blueprint, Flask, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+READ_ENGINE_KEY = "microcred.read_engine"
+READ_ONLY_FLAG = "read_only"
+
+
+class ReadOnlySessionError(RuntimeError):
+    """A write was attempted on a session routed to the read engine."""
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(READ_ONLY_FLAG):
+            engine = current_app.extensions.get(READ_ENGINE_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _guard_read_only_flush(session, flush_context, instances):
+    if session.info.get(READ_ONLY_FLAG) and (session.new or session.dirty or session.deleted):
+        raise ReadOnlySessionError(
+            "Attempted to write on a read-only session; remove @read_only from this view "
+            "or perform the write in a separate request."
+        )
+
+
+def use_read_session() -> None:
+    """Route the rest of this request's ORM queries to the read engine."""
+    from .extensions import db
+    db.session.info[READ_ONLY_FLAG] = True
+
+
+def read_only(view):
+    """View decorator: run the view on the read engine."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        use_read_session()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def read_only_blueprint(bp: Blueprint) -> Blueprint:
+    """Blueprint-level opt-in: every view (including auth checks) uses the read engine."""
+    bp.before_request(use_read_session)
+    return bp
+
+
+def read_uri_for(primary_uri: str) -> str | None:
+    """Derive a read-only SQLite URI for the same database file."""
+    url = sa.engine.make_url(primary_uri)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    if url.database.startswith("file:"):
+        return None  # already a URI filename; leave it to explicit config
+    return f"sqlite:///file:{url.database}?mode=ro&uri=true"
+
+
+class ReadRouting:
+    """Flask extension creating the read engine when the split is enabled."""
+
+    def __init__(self, app: Flask | None = None) -> None:
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        from .sqlite_tuning import apply_sqlite_profile
+
+        app.config.setdefault("DB_READ_SPLIT", False)
+        app.config.setdefault("SQLALCHEMY_READ_DATABASE_URI", None)
+        if not app.config["DB_READ_SPLIT"]:
+            return
+
+        uri = (app.config["SQLALCHEMY_READ_DATABASE_URI"]
+               or read_uri_for(app.config["SQLALCHEMY_DATABASE_URI"]))
+        if not uri:
+            app.logger.warning("DB_READ_SPLIT is on but no read URI could be derived; using the primary.")
+            return
+
+        engine = sa.create_engine(uri, **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+        apply_sqlite_profile(engine, app.config, read_only=True)
+        app.extensions[READ_ENGINE_KEY] = engine
@@ -2,12 +2,20 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_wtf import CSRFProtect
+from .instrumentation import Instrumentation
+from .metrics import Metrics
+from .sqlite_tuning import SQLiteProfile
+from .db_routing import RoutingSession, ReadRouting
 
 # Initialise extensions (app binds in create_app())
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 login_manager = LoginManager()
 csrf = CSRFProtect()
+instrumentation = Instrumentation()
+metrics = Metrics()
+sqlite_profile = SQLiteProfile()
+read_routing = ReadRouting()
 
 # Optional: basic login manager defaults
 login_manager.login_view = "auth.login"
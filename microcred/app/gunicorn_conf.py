@@ -0,0 +1,35 @@
+# microcred/app/gunicorn_conf.py
+"""
+Gunicorn settings for production:
+
+    gunicorn -c python:microcred.app.gunicorn_conf microcred.app.wsgi:app
+
+Sizes and timeouts come from the SERVER_* settings of the selected config
+class (APP_ENV, default production), so they are set the same way as
+everything else. The app is loaded and warmed once in the master and the
+workers are forked from it; see ``prefork`` for the fork-safety side.
+"""
+from microcred.app.config import CONFIG_MAP, Config, env_name
+
+_config = CONFIG_MAP.get(env_name("production"), Config)
+
+bind = _config.SERVER_BIND
+workers = _config.SERVER_WORKERS
+threads = _config.SERVER_THREADS
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = _config.SERVER_TIMEOUT
+graceful_timeout = _config.SERVER_GRACEFUL_TIMEOUT
+keepalive = _config.SERVER_KEEPALIVE
+max_requests = _config.SERVER_MAX_REQUESTS
+max_requests_jitter = max_requests // 10
+preload_app = True
+
+
+def when_ready(server):
+    from microcred.app.prefork import before_fork
+    before_fork(server.app.wsgi(), server.log)
+
+
+def post_fork(server, worker):
+    from microcred.app.prefork import after_fork
+    after_fork(worker.app.wsgi())
@@ -0,0 +1,197 @@
+# microcred/app/instrumentation.py
+"""
+Per-request performance instrumentation.
+
+SQL statements are counted and timed through SQLAlchemy engine events,
+template rendering through Flask's template signals. Each sampled request
+gets a ``Server-Timing`` header and the per-request breakdown; slow requests
+and slow queries are written to the ``microcred.perf`` logger (one JSON
+object per line) whether or not the request was sampled, so every statement
+in a request is timed.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import random
+import time
+from collections import Counter
+
+from flask import (Flask, current_app, g, has_request_context, request,
+                   before_render_template, template_rendered)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("microcred.perf")
+
+_EXPLAIN_PREFIXES = ("select", "with")
+
+
+class RequestStats:
+    """Timings collected for a single request; the breakdown only when ``sampled``."""
+    __slots__ = ("started", "sampled", "queries", "db_time", "tpl_time",
+                 "tpl_stack", "statements", "slow_queries")
+
+    def __init__(self, sampled: bool) -> None:
+        self.started = time.perf_counter()
+        self.sampled = sampled
+        self.queries = 0
+        self.db_time = 0.0
+        self.tpl_time = 0.0
+        self.tpl_stack: list[float] = []
+        self.statements: Counter[str] = Counter()
+        self.slow_queries: list[dict] = []
+
+
+def _request_stats() -> RequestStats | None:
+    """Stats for the current request, sampled or not; None outside a request."""
+    return g.get("_perf_stats") if has_request_context() else None
+
+
+def current_stats() -> RequestStats | None:
+    """Stats for the current request, or None outside a sampled request."""
+    stats = _request_stats()
+    return stats if stats is not None and stats.sampled else None
+
+
+def _explain(cursor, statement: str, parameters) -> list[str]:
+    """Run EXPLAIN QUERY PLAN on a fresh cursor of the same SQLite connection."""
+    if not statement.lstrip().lower().startswith(_EXPLAIN_PREFIXES):
+        return []
+    try:
+        plan_cur = cursor.connection.cursor()
+        try:
+            plan_cur.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [row[-1] for row in plan_cur.fetchall()]
+        finally:
+            plan_cur.close()
+    except Exception:  # never let diagnostics break the real query
+        return []
+
+
+class Instrumentation:
+    """
+    Flask extension wiring the request hooks and engine listeners.
+
+    Engine listeners are attached to the ``Engine`` class so that every engine
+    the app creates (primary or otherwise) is covered without extra setup.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        self._engine_hooked = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.config.setdefault("PERF_INSTRUMENTATION", True)
+        app.config.setdefault("PERF_SAMPLE_RATE", 1.0)
+        app.config.setdefault("PERF_SLOW_REQUEST_MS", 500.0)
+        app.config.setdefault("PERF_SLOW_QUERY_MS", 100.0)
+        app.config.setdefault("PERF_SERVER_TIMING", True)
+        app.config.setdefault("PERF_EXPLAIN_SLOW_QUERIES", True)
+        if not app.config["PERF_INSTRUMENTATION"]:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._template_start, app)
+        template_rendered.connect(self._template_end, app)
+
+        if not self._engine_hooked:
+            event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+            self._engine_hooked = True
+
+    # --- Flask hooks ---
+
+    @staticmethod
+    def _start_request() -> None:
+        rate = current_app.config["PERF_SAMPLE_RATE"]
+        g._perf_stats = RequestStats(sampled=rate >= 1.0 or random.random() < rate)
+
+    @staticmethod
+    def _finish_request(response):
+        stats: RequestStats | None = g.pop("_perf_stats", None)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        cfg = current_app.config
+
+        if stats.sampled and cfg["PERF_SERVER_TIMING"]:
+            response.headers["Server-Timing"] = ", ".join((
+                f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"',
+                f"tpl;dur={stats.tpl_time * 1000:.2f}",
+                f"total;dur={total_ms:.2f}",
+            ))
+
+        if total_ms >= cfg["PERF_SLOW_REQUEST_MS"]:
+            payload = {
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 2),
+            }
+            if stats.sampled:
+                payload.update(
+                    queries=stats.queries,
+                    db_ms=round(stats.db_time * 1000, 2),
+                    template_ms=round(stats.tpl_time * 1000, 2),
+                    # the most repeated statement is the usual N+1 suspect
+                    top_repeated=[{"count": n, "statement": s}
+                                  for s, n in stats.statements.most_common(3) if n > 1],
+                )
+            logger.warning("slow_request %s", json.dumps(payload, default=str))
+
+        for q in stats.slow_queries:
+            logger.warning("slow_query %s", json.dumps({**q, "path": request.path}, default=str))
+        return response
+
+    # --- template signals ---
+
+    @staticmethod
+    def _template_start(sender, template, context, **extra) -> None:
+        stats = current_stats()
+        if stats is not None:
+            stats.tpl_stack.append(time.perf_counter())
+
+    @staticmethod
+    def _template_end(sender, template, context, **extra) -> None:
+        stats = current_stats()
+        if stats is not None and stats.tpl_stack:
+            started = stats.tpl_stack.pop()
+            if not stats.tpl_stack:  # only count the outermost render
+                stats.tpl_time += time.perf_counter() - started
+
+    # --- engine events ---
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        if _request_stats() is not None:
+            conn.info.setdefault("_perf_query_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        stats = _request_stats()
+        if stats is None:
+            return
+        starts = conn.info.get("_perf_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if stats.sampled:
+            stats.queries += 1
+            stats.db_time += elapsed
+            stats.statements[statement] += 1
+
+        cfg = current_app.config
+        if elapsed * 1000 >= cfg["PERF_SLOW_QUERY_MS"]:
+            entry = {
+                "duration_ms": round(elapsed * 1000, 2),
+                "statement": statement,
+                "parameters": parameters if not executemany else f"<{len(parameters)} rows>",
+            }
+            if (cfg["PERF_EXPLAIN_SLOW_QUERIES"] and not executemany
+                    and conn.dialect.name == "sqlite"):
+                entry["plan"] = _explain(cursor, statement, parameters)
+            stats.slow_queries.append(entry)
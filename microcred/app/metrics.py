@@ -0,0 +1,411 @@
+# microcred/app/metrics.py
+"""
+Runtime metrics in Prometheus text format, with no external dependencies.
+
+Instruments live in a process-local registry. When ``METRICS_MULTIPROCESS_DIR``
+is set (gunicorn with several workers), every process periodically writes a
+JSON snapshot of its registry to ``<dir>/<pid>.json``; the ``/metrics`` view
+merges all snapshots so a scrape hitting any worker sees the whole server.
+Counters and histograms are summed across every process; gauges only across
+live ones. A dead worker's counters and histograms are folded into
+``<dir>/archive.json`` and its snapshot deleted, so totals never go backwards
+and a new worker that reuses the pid can't overwrite them.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+try:  # POSIX only; without it the archive is updated unlocked
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from flask import Flask, g, request
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+ARCHIVE = "archive.json"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str,
+                 labelnames: Iterable[str] = ()) -> None:
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.samples: dict[tuple[str, ...], object] = {}
+        registry.register(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self.registry.lock:
+            self.samples[key] = self.samples.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self.registry.lock:
+            self.samples[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self.registry.lock:
+            self.samples[key] = self.samples.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=LATENCY_BUCKETS) -> None:
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        # layout: one (non-cumulative) slot per bucket, +Inf slot, sum, count
+        idx = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                idx = i
+                break
+        with self.registry.lock:
+            row = self.samples.get(key)
+            if row is None:
+                row = self.samples[key] = [0.0] * (len(self.buckets) + 3)
+            row[idx] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_snapshot(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_snapshot(path: Path, data: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.metrics: dict[str, _Metric] = {}
+        self.multiprocess_dir: Path | None = None
+        self.flush_interval = 5.0
+        self._last_flush = 0.0
+        # pid whose <pid>.json this registry has written; a file under any other pid is a dead process's
+        self._owner_pid: int | None = None
+
+    def register(self, metric: _Metric) -> None:
+        self.metrics[metric.name] = metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return Counter(self, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return Gauge(self, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return Histogram(self, name, help, labelnames, buckets)
+
+    def reset(self) -> None:
+        """Drop every sample (e.g. what a preloading parent counted before forking workers)."""
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.samples.clear()
+
+    # --- multiprocess snapshots ---
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {name: [[list(k), v] for k, v in m.samples.items()]
+                    for name, m in self.metrics.items()}
+
+    def flush(self) -> None:
+        """Write this process's snapshot atomically into the shared directory."""
+        if self.multiprocess_dir is None:
+            return
+        self._last_flush = time.monotonic()
+        pid = os.getpid()
+        target = self.multiprocess_dir / f"{pid}.json"
+        if self._owner_pid != pid:
+            # a snapshot already under our pid was left by a dead worker the pid was reused from
+            with self._archive_lock():
+                if target.exists():
+                    self._archive([target])
+            self._owner_pid = pid
+        _write_snapshot(target, self.snapshot())
+
+    def maybe_flush(self) -> None:
+        if self.multiprocess_dir is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+            try:
+                self.flush()
+            except OSError:
+                pass  # metrics must never fail a request
+
+    @contextmanager
+    def _archive_lock(self) -> Iterator[None]:
+        """Serialise archive updates (and the reads that must not see one half-done) across processes."""
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.multiprocess_dir / "archive.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _archive(self, paths: list[Path]) -> None:
+        """Fold the counters/histograms of dead processes' snapshots into the archive; hold the lock."""
+        archive = self.multiprocess_dir / ARCHIVE
+        merged = self._merge([(False, _read_snapshot(archive) or {})])
+        for path in paths:
+            data = _read_snapshot(path)
+            if data is not None:
+                self._merge([(False, data)], merged)
+        _write_snapshot(archive, {name: [[list(k), v] for k, v in samples.items()]
+                                  for name, samples in merged.items()})
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    def _merge(self, sources: list[tuple[bool, dict]],
+               merged: dict[str, dict[tuple[str, ...], object]] | None = None,
+               ) -> dict[str, dict[tuple[str, ...], object]]:
+        """Sum snapshots per metric and labels; gauges only from live (``True``) sources."""
+        if merged is None:
+            merged = {n: {} for n in self.metrics}
+        for alive, data in sources:
+            for name, samples in data.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.kind == "gauge" and not alive):
+                    continue
+                out = merged[name]
+                for labels, value in samples:
+                    key = tuple(labels)
+                    if isinstance(value, list):
+                        prev = out.get(key)
+                        out[key] = value[:] if prev is None else [a + b for a, b in zip(prev, value)]
+                    else:
+                        out[key] = out.get(key, 0.0) + value
+        return merged
+
+    def _collect(self) -> dict[str, dict[tuple[str, ...], object]]:
+        """Merge the live registry with the snapshots of every other process and the archive."""
+        sources: list[tuple[bool, dict]] = [(True, self.snapshot())]
+        if self.multiprocess_dir is not None:
+            me = os.getpid()
+            with self._archive_lock():
+                dead: list[Path] = []
+                for path in self.multiprocess_dir.glob("*.json"):
+                    try:
+                        pid = int(path.stem)
+                    except ValueError:
+                        continue
+                    if pid == me and self._owner_pid == me:
+                        continue
+                    if pid == me or not _pid_alive(pid):
+                        dead.append(path)
+                        continue
+                    data = _read_snapshot(path)
+                    if data is not None:
+                        sources.append((True, data))
+                if dead:
+                    try:
+                        self._archive(dead)
+                    except OSError:
+                        # can't update the archive: count the dead snapshots where they are
+                        sources.extend((False, d) for d in map(_read_snapshot, dead) if d is not None)
+                archived = _read_snapshot(self.multiprocess_dir / ARCHIVE)
+                if archived is not None:
+                    sources.append((False, archived))
+        return self._merge(sources)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        for name, samples in self._collect().items():
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(samples.items()):
+                pairs = [f'{n}="{_escape(v)}"' for n, v in zip(metric.labelnames, key)]
+                if metric.kind == "histogram":
+                    running = 0.0
+                    bounds = [*metric.buckets, math.inf]  # type: ignore[attr-defined]
+                    for bound, count in zip(bounds, value):
+                        running += count
+                        labels = ",".join([*pairs, f'le="{_fmt(bound)}"'])
+                        lines.append(f"{name}_bucket{{{labels}}} {_fmt(running)}")
+                    suffix = "{" + ",".join(pairs) + "}" if pairs else ""
+                    lines.append(f"{name}_sum{suffix} {_fmt(value[-2])}")
+                    lines.append(f"{name}_count{suffix} {_fmt(value[-1])}")
+                else:
+                    suffix = "{" + ",".join(pairs) + "}" if pairs else ""
+                    lines.append(f"{name}{suffix} {_fmt(value)}")
+            if name == CACHE_REQUESTS.name:
+                lines.extend(_cache_ratio_lines(samples))
+        return "\n".join(lines) + "\n"
+
+
+def _cache_ratio_lines(samples: dict[tuple[str, ...], object]) -> list[str]:
+    totals: dict[str, list[float]] = {}
+    for (cache, result), value in samples.items():
+        hit_miss = totals.setdefault(cache, [0.0, 0.0])
+        hit_miss[0 if result == "hit" else 1] += value  # type: ignore[operator]
+    lines = ["# HELP microcred_cache_hit_ratio Share of cache lookups served from cache.",
+             "# TYPE microcred_cache_hit_ratio gauge"]
+    for cache, (hits, misses) in sorted(totals.items()):
+        ratio = hits / (hits + misses) if hits + misses else 0.0
+        lines.append(f'microcred_cache_hit_ratio{{cache="{_escape(cache)}"}} {_fmt(round(ratio, 6))}')
+    return lines
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    "microcred_http_request_duration_seconds", "Request latency by endpoint.",
+    ("blueprint", "endpoint", "method", "status"))
+RESPONSE_SIZE = registry.histogram(
+    "microcred_http_response_size_bytes", "Response body size by endpoint.",
+    ("blueprint", "endpoint"), buckets=SIZE_BUCKETS)
+POOL_CHECKOUT = registry.histogram(
+    "microcred_db_pool_checkout_seconds", "How long a pooled DB connection stays checked out.")
+POOL_CHECKED_OUT = registry.gauge(
+    "microcred_db_pool_checked_out", "DB connections currently checked out of the pool.")
+CACHE_REQUESTS = registry.counter(
+    "microcred_cache_requests_total", "Cache lookups by cache and result (hit/miss).",
+    ("cache", "result"))
+IMAGE_PROCESSING = registry.histogram(
+    "microcred_image_processing_seconds", "Time spent decoding/resizing/encoding images.",
+    ("operation",))
+EMAIL_QUEUE_DEPTH = registry.gauge(
+    "microcred_email_queue_depth", "Award notification emails waiting to be sent.")
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class Metrics:
+    """Flask extension: request hooks, pool listeners and snapshot flushing."""
+
+    def __init__(self, app: Flask | None = None) -> None:
+        self._pool_hooked = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.config.setdefault("METRICS_ENABLED", True)
+        app.config.setdefault("METRICS_MULTIPROCESS_DIR", None)
+        app.config.setdefault("METRICS_FLUSH_INTERVAL", 5.0)
+        app.config.setdefault("METRICS_TOKEN", None)
+        if not app.config["METRICS_ENABLED"]:
+            return
+
+        mp_dir = app.config["METRICS_MULTIPROCESS_DIR"]
+        if mp_dir:
+            registry.multiprocess_dir = Path(mp_dir)
+            registry.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+            registry.flush_interval = float(app.config["METRICS_FLUSH_INTERVAL"])
+            atexit.register(registry.flush)
+
+        app.before_request(self._start_timer)
+        app.after_request(self._observe)
+
+        if not self._pool_hooked:
+            event.listen(Pool, "checkout", self._on_checkout)
+            event.listen(Pool, "checkin", self._on_checkin)
+            self._pool_hooked = True
+
+    @staticmethod
+    def _start_timer() -> None:
+        g._metrics_started = time.perf_counter()
+
+    @staticmethod
+    def _observe(response):
+        started = g.pop("_metrics_started", None)
+        endpoint = request.endpoint or "<unmatched>"
+        if started is not None and endpoint != "metrics.scrape":
+            blueprint = request.blueprint or ""
+            REQUEST_LATENCY.observe(time.perf_counter() - started, blueprint=blueprint,
+                                    endpoint=endpoint, method=request.method,
+                                    status=response.status_code)
+            size = response.calculate_content_length()
+            if size is not None:
+                RESPONSE_SIZE.observe(size, blueprint=blueprint, endpoint=endpoint)
+        registry.maybe_flush()
+        return response
+
+    @staticmethod
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["_metrics_checkout"] = time.perf_counter()
+        POOL_CHECKED_OUT.inc()
+
+    @staticmethod
+    def _on_checkin(dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("_metrics_checkout", None)
+        if started is not None:
+            POOL_CHECKOUT.observe(time.perf_counter() - started)
+            POOL_CHECKED_OUT.dec()
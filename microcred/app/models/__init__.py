@@ -4,5 +4,11 @@ from .user import User
 from .role import Role
 from .award import Award
 from .achievement import Achievement
+from .cache_version import CacheVersion
+from .achievement_event import AchievementEvent
+from .webhook import WebhookSubscription, WebhookOutbox
+from .rollup import DailyIssuance, WeeklyIssuance, AwardIssuance, IssuerIssuance, RollupTotal
 
-__all__ = ["User", "Role", "Award", "Achievement"]
+__all__ = ["User", "Role", "Award", "Achievement", "CacheVersion", "AchievementEvent",
+           "WebhookSubscription", "WebhookOutbox", "DailyIssuance", "WeeklyIssuance", "AwardIssuance",
+           "IssuerIssuance", "RollupTotal"]
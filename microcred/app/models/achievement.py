@@ -9,12 +9,14 @@ class Achievement(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    participant_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    participant_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     award_id = db.Column(db.Integer, db.ForeignKey("awards.id"), nullable=False, index=True)
     issued_by_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
 
     issued_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     note = db.Column(db.String(255), nullable=True)
+    # sha256 of the public assertion id; /verify looks achievements up by this
+    verify_hash = db.Column(db.String(64), nullable=True, unique=True, index=True)
 
     # Relationships
     participant = db.relationship("User", foreign_keys=[participant_id], back_populates="achievements")
@@ -23,3 +25,7 @@ class Achievement(db.Model):
 
     def __repr__(self) -> str:  # pragma: no cover
         return f"<Achievement user={self.participant_id} award={self.award_id} at={self.issued_at:%Y-%m-%d}>"
+
+
+# A participant's awards, newest first (my awards, user detail, the API, batched by participant)
+db.Index("ix_achievements_participant_issued", Achievement.participant_id, Achievement.issued_at.desc())
@@ -0,0 +1,28 @@
+from datetime import datetime
+from ..extensions import db
+
+class AchievementEvent(db.Model):
+    """Append-only log of achievement changes; ``seq`` is the change-feed cursor."""
+    __tablename__ = "achievement_events"
+    __table_args__ = (
+        # consumers page by seq; compaction looks up the newest event per (participant, award)
+        db.Index("ix_achievement_events_pair", "participant_id", "award_id", "seq"),
+        # AUTOINCREMENT: seq values are never reused, even after pruning
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)  # "granted" | "revoked" | "note_updated"
+
+    # No foreign keys: events outlive the rows they describe
+    achievement_id = db.Column(db.Integer, nullable=False)
+    participant_id = db.Column(db.Integer, nullable=False)
+    award_id = db.Column(db.Integer, nullable=False)
+    actor_id = db.Column(db.Integer, nullable=True)
+
+    issued_at = db.Column(db.DateTime, nullable=True)
+    note = db.Column(db.String(255), nullable=True)
+    occurred_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<AchievementEvent #{self.seq} {self.kind} user={self.participant_id} award={self.award_id}>"
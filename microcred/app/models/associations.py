@@ -6,3 +6,21 @@ user_roles = db.Table(
     db.Column("user_id", db.Integer, db.ForeignKey("users.id"), primary_key=True),
     db.Column("role_id", db.Integer, db.ForeignKey("roles.id"), primary_key=True),
 )
+
+# Prerequisite graph between awards: award_id requires prerequisite_id (direct edges)
+award_prerequisites = db.Table(
+    "award_prerequisites",
+    db.Column("award_id", db.Integer, db.ForeignKey("awards.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("prerequisite_id", db.Integer, db.ForeignKey("awards.id", ondelete="CASCADE"),
+              primary_key=True, index=True),
+)
+
+# Transitive closure of award_prerequisites, rebuilt whenever the edges change:
+# one row per (award, ancestor) with the length of the shortest path
+award_prerequisite_closure = db.Table(
+    "award_prerequisite_closure",
+    db.Column("award_id", db.Integer, db.ForeignKey("awards.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("ancestor_id", db.Integer, db.ForeignKey("awards.id", ondelete="CASCADE"),
+              primary_key=True, index=True),
+    db.Column("depth", db.Integer, nullable=False),
+)
@@ -1,4 +1,6 @@
 from ..extensions import db
+from ..criteria import split_criteria
+from .associations import award_prerequisites
 from ..routes.main import index
 
 
@@ -11,15 +13,28 @@ class Award(db.Model):
     description = db.Column(db.Text, nullable=False)
     image_filename = db.Column(db.String(255), nullable=True)
     points = db.Column(db.Integer, nullable=False, default=0)
-    criteria = db.Column(db.Text, nullable=True)
+    criteria = db.Column(db.Text, nullable=True)  # prose, plus optional "require:" rule lines
+    category = db.Column(db.String(64), nullable=True, index=True)  # grouping for count(...) rules
+    auto_grant = db.Column(db.Boolean, nullable=False, default=False)  # granted by the rule engine once criteria hold
 
     # achievements: one-to-many via Achievement.award relationship
     achievements = db.relationship("Achievement", back_populates="award", lazy="dynamic")
+    # direct prerequisites; the closure table is maintained by prerequisite_services
+    prerequisites = db.relationship(
+        "Award", secondary=award_prerequisites,
+        primaryjoin=lambda: Award.id == award_prerequisites.c.award_id,
+        secondaryjoin=lambda: Award.id == award_prerequisites.c.prerequisite_id,
+        order_by=lambda: Award.name)
 
     def image_url(self, base: str | None) -> str | None:
         if not self.image_filename:
             return None
         return f"{base.rstrip('/')}/{self.image_filename}" if base else self.image_filename
 
+    @property
+    def criteria_text(self) -> str:
+        """Criteria without the rule lines, for display."""
+        return split_criteria(self.criteria)[0]
+
     def __repr__(self) -> str:  # pragma: no cover
         return f"<Award {self.slug}:{self.name} ({self.points} pts)>"
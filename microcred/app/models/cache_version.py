@@ -0,0 +1,12 @@
+from ..extensions import db
+
+class CacheVersion(db.Model):
+    """Version per cache namespace, shared by every worker process; all rows draw from one sequence."""
+    __tablename__ = "cache_versions"
+
+    # "awards" | "icons" | "users" | "roles" | "achievements" | "users:<id>"
+    namespace = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0, index=True)  # workers read the rows above what they've seen
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<CacheVersion {self.namespace}={self.version}>"
@@ -1,6 +1,6 @@
 # app/models/icon.py
 from microcred.app.extensions import db
-from sqlalchemy import func, UniqueConstraint, Index
+from sqlalchemy import DDL, event, func, UniqueConstraint, Index
 
 class Icon(db.Model):
     __tablename__ = 'icons'
@@ -15,7 +15,7 @@ class Icon(db.Model):
     __table_args__ = (
         db.UniqueConstraint('category', 'filename', name='uq_icon_category_filename'),
         Index('ix_icon_category_name', 'category', 'name'),
-        Index('ix_icon_name_ilike', 'name'),  # helps LIKE/ILIKE
+        # name's unique index serves ORDER BY name; substring search goes through icons_fts below
     )
 
     # def compute_url(self) -> str:
@@ -23,3 +23,20 @@ class Icon(db.Model):
 
     def __repr__(self):
         return f"<Icon {self.id} {self.name} -> {self.compute_url()}>"
+
+
+# Trigram full-text index over icon names. A B-tree can't serve "name LIKE '%q%'",
+# this can (for q of 3+ characters); triggers keep it in step with the table.
+ICON_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS icons_fts USING fts5("
+    "name, content='icons', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS icons_fts_ai AFTER INSERT ON icons BEGIN "
+    "INSERT INTO icons_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS icons_fts_ad AFTER DELETE ON icons BEGIN "
+    "INSERT INTO icons_fts(icons_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS icons_fts_au AFTER UPDATE OF name ON icons BEGIN "
+    "INSERT INTO icons_fts(icons_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO icons_fts(rowid, name) VALUES (new.id, new.name); END",
+)
+for _stmt in ICON_SEARCH_DDL:
+    event.listen(Icon.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
@@ -0,0 +1,61 @@
+from ..extensions import db
+
+# Dashboard rollups, kept up to date by services/rollup_services.py.
+# They count the achievements that exist now; `flask rollups rebuild` recomputes them.
+
+
+class DailyIssuance(db.Model):
+    """Achievements issued on ``day`` and the number of participants who earned them."""
+    __tablename__ = "rollup_daily"
+
+    day = db.Column(db.Date, primary_key=True)
+    issued = db.Column(db.Integer, nullable=False, default=0)
+    earners = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<DailyIssuance {self.day} issued={self.issued} earners={self.earners}>"
+
+
+class WeeklyIssuance(db.Model):
+    """As ``DailyIssuance``, per ISO week (``week`` is its Monday)."""
+    __tablename__ = "rollup_weekly"
+
+    week = db.Column(db.Date, primary_key=True)
+    issued = db.Column(db.Integer, nullable=False, default=0)
+    earners = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<WeeklyIssuance {self.week} issued={self.issued} earners={self.earners}>"
+
+
+class AwardIssuance(db.Model):
+    """Current holders of each award."""
+    __tablename__ = "rollup_awards"
+
+    award_id = db.Column(db.Integer, primary_key=True)
+    holders = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<AwardIssuance award={self.award_id} holders={self.holders}>"
+
+
+class IssuerIssuance(db.Model):
+    """Achievements each issuer has granted; ``issuer_id`` 0 collects automatic grants."""
+    __tablename__ = "rollup_issuers"
+
+    issuer_id = db.Column(db.Integer, primary_key=True)
+    issued = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<IssuerIssuance issuer={self.issuer_id} issued={self.issued}>"
+
+
+class RollupTotal(db.Model):
+    """Named counters: "users", "achievements", "participants" (holding at least one award)."""
+    __tablename__ = "rollup_totals"
+
+    name = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<RollupTotal {self.name}={self.value}>"
@@ -12,6 +12,10 @@ class User(UserMixin, db.Model):
     first_name = db.Column(db.String(64))
     last_name = db.Column(db.String(64))
 
+    __table_args__ = (
+        db.Index("ix_users_name", "first_name", "last_name", "email"),  # admin user list order
+    )
+
     roles = db.relationship("Role", secondary=user_roles, backref="users", lazy="joined")
     # Fix: Specify foreign_keys to resolve ambiguity
     achievements = db.relationship("Achievement",
@@ -45,7 +49,9 @@ class User(UserMixin, db.Model):
 
 @login_manager.user_loader
 def load_user(user_id: str):
+    # Returns a cached Principal; the ORM row is only loaded if a view asks for it
+    from ..services.principal_services import load_principal
     try:
-        return User.query.get(int(user_id))
-    except Exception:
+        return load_principal(int(user_id))
+    except (TypeError, ValueError):
         return None
\ No newline at end of file
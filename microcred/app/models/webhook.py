@@ -0,0 +1,54 @@
+from datetime import datetime
+from ..extensions import db
+
+class WebhookSubscription(db.Model):
+    """A partner endpoint that wants achievement events POSTed to it."""
+    __tablename__ = "webhook_subscriptions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(500), nullable=False)
+    secret = db.Column(db.String(128), nullable=False)  # HMAC-SHA256 key for X-Microcred-Signature
+    events = db.Column(db.String(255), nullable=False, default="granted")  # comma list, or "*"
+    active = db.Column(db.Boolean, nullable=False, default=True)
+
+    batch_size = db.Column(db.Integer, nullable=False, default=50)       # events per POST
+    max_concurrency = db.Column(db.Integer, nullable=False, default=2)   # POSTs in flight at once
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    outbox = db.relationship("WebhookOutbox", back_populates="subscription", lazy="dynamic",
+                             cascade="all, delete-orphan", passive_deletes=True)
+
+    def wants(self, kind: str) -> bool:
+        return self.events == "*" or kind in self.events.split(",")
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<WebhookSubscription {self.id} {self.url} [{self.events}]>"
+
+
+class WebhookOutbox(db.Model):
+    """One pending (or delivered/dead) event for one subscription."""
+    __tablename__ = "webhook_outbox"
+    __table_args__ = (
+        # the dispatcher's claim query: undelivered, due rows of one subscription in id order
+        db.Index("ix_webhook_outbox_due", "subscription_id", "delivered_at", "dead_at", "next_attempt_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    subscription_id = db.Column(db.Integer, db.ForeignKey("webhook_subscriptions.id", ondelete="CASCADE"),
+                                nullable=False)
+    event = db.Column(db.String(32), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = db.Column(db.String(32), nullable=True, index=True)
+    claimed_until = db.Column(db.DateTime, nullable=True)
+    delivered_at = db.Column(db.DateTime, nullable=True)
+    dead_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.String(255), nullable=True)
+
+    subscription = db.relationship("WebhookSubscription", back_populates="outbox")
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<WebhookOutbox {self.id} sub={self.subscription_id} {self.event} attempts={self.attempts}>"
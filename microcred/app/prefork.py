@@ -0,0 +1,86 @@
+# microcred/app/prefork.py
+"""
+Preloading the app in a parent process and forking workers from it.
+
+A pooled SQLite connection must never be used by two processes. The parent
+may open connections while it warms up, so it closes them before forking,
+and each worker then drops the pool it inherited without closing anything
+(``dispose(close=False)``), leaving the parent's file handles alone.
+
+Warm-up happens once in the parent: the cache versions, the award catalogue,
+the icon lists and every compiled Jinja template are inherited by each
+worker, which starts serving hot instead of paying for them on its first
+requests. The cache versions are read first; a worker that didn't know them
+would treat its first sync as a change in every namespace and drop what the
+parent loaded.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+from flask import Flask
+from sqlalchemy.engine import Engine
+
+from .db_routing import READ_ENGINE_KEY
+from .extensions import db
+from .metrics import registry
+
+logger = logging.getLogger("microcred.server")
+
+
+def app_engines(app: Flask) -> list[Engine]:
+    """Every engine the app holds: the Flask-SQLAlchemy binds and the read engine."""
+    with app.app_context():
+        engines = list(db.engines.values())
+    read_engine = app.extensions.get(READ_ENGINE_KEY)
+    if read_engine is not None:
+        engines.append(read_engine)
+    return engines
+
+
+def dispose_engines(app: Flask, *, close: bool = True) -> None:
+    """Empty every pool; with ``close=False`` (in a forked child) the connections are just forgotten."""
+    for engine in app_engines(app):
+        engine.dispose(close=close)
+
+
+def warm_up(app: Flask, log=logger) -> None:
+    from .services.cache_services import coherence
+    from .services.catalogue_services import award_catalogue
+    from .services.icon_service import icon_categories, icon_search_available
+
+    started = time.perf_counter()
+    with app.app_context():
+        coherence.sync(force=True)
+        catalogue = award_catalogue()
+        categories = icon_categories()
+        icon_search_available()
+        db.session.remove()
+    templates = 0
+    for name in app.jinja_env.list_templates(extensions=("html",)):
+        app.jinja_env.get_template(name)
+        templates += 1
+    # warm-up isn't traffic; workers shouldn't all report the parent's cache misses
+    registry.reset()
+    log.info("warmed up in %.0f ms: %d awards, %d icon categories, %d templates",
+             (time.perf_counter() - started) * 1000, len(catalogue), len(categories), templates)
+
+
+def before_fork(app: Flask, log=logger) -> None:
+    """
+    In the parent, once the app is loaded and before any worker exists.
+    ``log`` is anything with ``info``/``exception`` (gunicorn passes its own).
+    """
+    if app.config.get("SERVER_WARM_UP", True):
+        try:
+            warm_up(app, log)
+        except Exception:
+            # a cold start is slower, not broken
+            log.exception("warm-up failed; workers will start with empty caches")
+    dispose_engines(app)
+
+
+def after_fork(app: Flask) -> None:
+    """In each worker, straight after the fork."""
+    dispose_engines(app, close=False)
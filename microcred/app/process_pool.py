@@ -0,0 +1,42 @@
+# microcred/app/process_pool.py
+"""
+Process pools for CPU-heavy CLI jobs.
+
+Workers are spawned (not forked, so no inherited DB connections or locks)
+and each builds its own app once; task functions run inside
+``with worker_app().app_context():``. Only pass picklable arguments and
+return plain data; writes usually belong in the parent. Pure functions that
+need no app (password hashing, say) can use ``cpu_pool`` and skip the
+per-worker app start-up.
+"""
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import Flask
+
+from .config import env_name
+
+_app: Flask | None = None
+
+
+def _init(env_name: str | None) -> None:
+    global _app
+    from . import create_app
+    _app = create_app(env_name)
+
+
+def worker_app() -> Flask:
+    if _app is None:
+        raise RuntimeError("worker_app() called outside an app_pool() worker")
+    return _app
+
+
+def app_pool(workers: int, env: str | None = None) -> ProcessPoolExecutor:
+    ctx = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init, initargs=(env or env_name(),))
+
+
+def cpu_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
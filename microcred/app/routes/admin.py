@@ -2,6 +2,7 @@
 from ..models import User, Award, Achievement
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
+from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
 from ..extensions import db
 from ..models import Award
@@ -9,20 +10,24 @@ from ._utils import roles_required
 from .forms import AwardForm, slugify
 
 from .forms import AwardEditForm, slugify
+from ..services.principal_services import invalidate_principal
+from ..services.catalogue_services import award_catalogue
+from ..services.award_services import AwardService
+from ..services.badge_services import assertion_cache
+from ..services.prerequisite_services import PrerequisiteCycleError, set_prerequisites
+from ..services import rollup_services
+from ..services.role_services import add_role, attached, remove_role, role_names, user_ids_matching
 from ..services.storage_services import (
     save_award_icon, delete_award_icon, award_img_url, rename_icon_if_slug_changed )
 
 bp = Blueprint("admin", __name__, url_prefix="/admin")
+awards = AwardService()
 
 @bp.get("/")
 @roles_required("admin")
 def dashboard():
-    return render_template(
-        "admin/dashboard.html",
-        users_count=User.query.count(),
-        awards_count=Award.query.count(),
-        achievements_count=Achievement.query.count(),
-    )
+    # rollup tables only: the cost doesn't grow with the number of achievements
+    return render_template("admin/dashboard.html", stats=rollup_services.dashboard())
 
 @bp.route("/awards/new", methods=["GET", "POST"])
 @login_required
@@ -41,6 +46,9 @@ def award_create():
             slug=slug,
             description=(form.description.data or "").strip(),
             points=form.points.data or 0,
+            category=(form.category.data or "").strip() or None,
+            criteria=(form.criteria.data or "").strip() or None,
+            auto_grant=bool(form.auto_grant.data),
         )
 
         if form.icon.data:
@@ -63,8 +71,7 @@ def award_create():
 @login_required
 @roles_required("admin", "issuer")
 def award_list():
-    awards = Award.query.order_by(Award.points.desc(), Award.name.asc()).all()
-    return render_template("admin/award_list.html", awards=awards,
+    return render_template("admin/award_list.html", awards=award_catalogue().awards,
                            img_base=current_app.config.get("AWARD_IMAGE_BASE", "/static/awards"))
 
 @bp.route("/awards/<int:award_id>/edit", methods=["GET", "POST"])
@@ -75,12 +82,25 @@ def award_edit(award_id: int):
     old_slug = award.slug or ""
 
     form = AwardEditForm(obj=award)
+    form.prerequisite_ids.choices = [(a.id, a.name) for a in award_catalogue() if a.id != award.id]
+    if request.method == "GET":
+        form.prerequisite_ids.data = [p.id for p in award.prerequisites]
     if form.validate_on_submit():
         # update core fields
         award.name = form.name.data.strip()
         award.slug = (form.slug.data or slugify(award.name)).strip()
         award.description = (form.description.data or "").strip()
         award.points = form.points.data or 0
+        award.category = (form.category.data or "").strip() or None
+        award.criteria = (form.criteria.data or "").strip() or None
+        award.auto_grant = bool(form.auto_grant.data)
+        try:
+            set_prerequisites(award, form.prerequisite_ids.data or [])
+        except PrerequisiteCycleError as e:
+            db.session.rollback()
+            form.prerequisite_ids.errors.append(str(e))
+            return render_template("admin/award_edit.html", form=form, award=award,
+                                   icon_url=award_img_url(award.image_filename))
 
         # icon removal
         if form.remove_icon.data:
@@ -122,12 +142,42 @@ def user_list():
     q = request.args.get("q", "").strip()
     users = User.query
     if q:
-        like = f"%{q}%"
-        users = users.filter(db.or_(User.email.ilike(like),
-                                    User.first_name.ilike(like),
-                                    User.last_name.ilike(like)))
+        users = users.filter(User.id.in_(user_ids_matching(q)))
     users = users.order_by(User.first_name.asc(), User.last_name.asc(), User.email.asc()).all()
-    return render_template("admin/user_list.html", users=users)
+    held = select(Achievement.participant_id, func.count()).group_by(Achievement.participant_id)
+    if q:
+        held = held.where(Achievement.participant_id.in_(user_ids_matching(q)))
+    counts = dict(db.session.execute(held).all())
+    return render_template("admin/user_list.html", users=users, counts=counts, q=q, role_names=role_names())
+
+@bp.post("/users/roles")
+@roles_required("admin")
+def bulk_roles():
+    """Add or remove one role for the ticked users, or for everyone the search matches."""
+    q = (request.form.get("q") or "").strip()
+    role = request.form.get("role") or ""
+    action = request.form.get("action")
+    back = redirect(url_for("admin.user_list", q=q or None))
+    if role not in role_names() or action not in ("add", "remove"):
+        flash("Choose a role and whether to add or remove it.", "warning")
+        return back
+
+    if request.form.get("scope") == "search":
+        users = user_ids_matching(q) if q else select(User.id)
+    else:
+        ids = request.form.getlist("user_ids", type=int)
+        if not ids:
+            flash("No users selected.", "warning")
+            return back
+        users = select(User.id).where(User.id.in_(ids))
+    if action == "remove" and role == "admin":
+        users = users.where(User.id != current_user.id)  # don't lock yourself out
+
+    changed = (add_role if action == "add" else remove_role)(role, users)
+    db.session.commit()
+    flash(f"{'Added' if action == 'add' else 'Removed'} {role} {'to' if action == 'add' else 'from'} "
+          f"{changed} user(s).", "success")
+    return back
 
 @bp.route("/users/<int:user_id>", methods=["GET", "POST"])
 @roles_required("admin")
@@ -146,10 +196,9 @@ def user_detail(user_id: int):
             user.email = new_email
 
         # roles checkboxes
-        role_names = {r.name for r in Role.query.all()}
-        selected = {name for name in request.form.getlist("roles") if name in role_names}
-        user.roles = [Role.query.filter_by(name=name).first() for name in sorted(selected)]
+        user.roles = attached(*sorted(set(request.form.getlist("roles"))))
         db.session.commit()
+        invalidate_principal(user.id)
         flash("User saved.", "success")
         return redirect(url_for("admin.user_detail", user_id=user.id))
 
@@ -167,6 +216,9 @@ def user_detail(user_id: int):
         try:
             db.session.commit()
             flash(f"Award “{award.name}” granted.", "success")
+            unlocked = awards.unlock_after(user.id, [award.id])
+            if unlocked:
+                flash(f"Also unlocked: {', '.join(s.name for s in unlocked)}.", "info")
         except IntegrityError:
             db.session.rollback()
             flash("That user already has this award.", "warning")
@@ -181,13 +233,15 @@ def user_detail(user_id: int):
             return redirect(url_for("admin.user_detail", user_id=user.id))
         db.session.delete(ach)
         db.session.commit()
+        # the /verify pages follow the change feed; signed downloads are dropped here
+        assertion_cache().discard(achievement_id)
         flash("Award revoked.", "success")
         return redirect(url_for("admin.user_detail", user_id=user.id))
 
-    awards_all = Award.query.order_by(Award.points.desc(), Award.name.asc()).all()
+    awards_all = award_catalogue().awards
     achievements = (user.achievements
                         .order_by(Achievement.issued_at.desc())
                         .all())
     return render_template("admin/user_detail.html",
-                           user=user, awards_all=awards_all, achievements=achievements)
+                           user=user, awards_all=awards_all, achievements=achievements, role_names=role_names())
 
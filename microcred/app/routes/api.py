@@ -1,96 +1,244 @@
-from flask import Blueprint, jsonify, current_app, url_for
-from ..models import User, Award, Achievement
-
-bp = Blueprint("api", __name__, url_prefix="/api")
-
-def award_to_dict(a: Award):
-    return {
-        "id": a.id,
-        "slug": a.slug,
-        "name": a.name,
-        "description": a.description,
-        "image": a.image_url(current_app.config.get("AWARD_IMAGE_BASE", "/static/awards")),  # type: ignore[attr-defined]
-        "points": a.points,
-        "criteria": a.criteria,
-    }
+from collections import defaultdict
+
+from flask import Blueprint, abort, current_app, request, stream_with_context, url_for
+from sqlalchemy.orm import joinedload, lazyload, load_only
+from ..extensions import csrf, db
+from ..models import User, Achievement
+from ..db_routing import read_only_blueprint
+from ..serializers import (AWARD_DETAIL_FIELDS, AWARD_FIELDS, AWARD_LIST_FIELDS, HOLDER_FIELDS,
+                           PARTICIPANT_AWARD_DEFAULT, PARTICIPANT_AWARD_FIELDS, FieldSet, FieldSetError,
+                           achievement_to_dict, award_to_dict, change_to_dict, dumps, holder_to_dict)
+from ..services.cache_services import coherence
+from ..services.catalogue_services import award_catalogue, award_snapshot
+from ..services.event_services import changes_since
+from ..singleflight import SingleFlight, SWRCache
+
+bp = read_only_blueprint(Blueprint("api", __name__, url_prefix="/api"))
+
+def json_response(payload, status: int = 200):
+    return current_app.response_class(dumps(payload), status=status, mimetype="application/json")
+
+_HTTP_ERRORS = {404: "Not found", 405: "Method not allowed"}
+
+@bp.app_errorhandler(404)
+@bp.app_errorhandler(405)
+def _json_error(e):
+    """JSON errors under /api (unmatched URLs too), the same as the ASGI server's; HTML elsewhere."""
+    if not request.path.startswith(f"{bp.url_prefix}/"):
+        return e
+    response = json_response({"error": _HTTP_ERRORS[e.code]}, e.code)
+    if getattr(e, "valid_methods", None):
+        response.headers["Allow"] = ", ".join(e.valid_methods)
+    return response
+
+def _fields(allowed, *, default=None, nested=None) -> FieldSet:
+    try:
+        return FieldSet(request.args.get("fields"), allowed, default=default, nested_allowed=nested)
+    except FieldSetError as e:
+        abort(json_response({"error": str(e)}, 400))
+
+def _img_base() -> str:
+    return current_app.config.get("AWARD_IMAGE_BASE", "/static/awards")
+
+def _url_template(endpoint: str, placeholder_arg: str, **values) -> str:
+    """Build an external URL once and fill in the per-row part with str.replace."""
+    return url_for(endpoint, **{placeholder_arg: "__slug__"}, **values, _external=True)
+
+def _achievement_query(fields: FieldSet):
+    """Achievement columns for ``fields``; the award itself comes from the catalogue."""
+    cols = [Achievement.id, Achievement.participant_id, Achievement.award_id, Achievement.issued_at]
+    options = []
+    if "note" in fields:
+        cols.append(Achievement.note)
+    if "issued_by" in fields:
+        cols.append(Achievement.issued_by_id)
+        options.append(joinedload(Achievement.issued_by)
+                       .options(load_only(User.id, User.first_name, User.last_name), lazyload(User.roles)))
+    return Achievement.query.options(load_only(*cols), *options)
+
+def _person(user_id: int):
+    return db.session.get(User, user_id, options=[load_only(User.id, User.email, User.first_name, User.last_name),
+                                                  lazyload(User.roles)])
+
+def _participant_award_fields() -> FieldSet:
+    return _fields(PARTICIPANT_AWARD_FIELDS, default=PARTICIPANT_AWARD_DEFAULT, nested={"award": AWARD_FIELDS})
 
 @bp.get("/participants/<int:participant_id>/awards")
 def api_participant_awards(participant_id: int):
-    user = User.query.get_or_404(participant_id)
-    achs = (Achievement.query
-            .filter_by(participant_id=user.id)
-            .join(Award)
+    fields = _participant_award_fields()
+    user = _person(participant_id) or abort(404)
+    achs = (_achievement_query(fields)
+            .filter(Achievement.participant_id == user.id)
             .order_by(Achievement.issued_at.desc())
             .all())
-    return jsonify({
-        "participant": {
-            "id": user.id,
-            "name": user.full_name() if hasattr(user, "full_name") else f"{user.first_name or ''} {user.last_name or ''}".strip(),
-            "email": user.email,
-        },
-        "awards": [{
-            "award": award_to_dict(ach.award),
-            "issued_at": ach.issued_at.isoformat(),
-            "issued_by": {
-                "id": ach.issued_by.id if ach.issued_by else None,
-                "name": ach.issued_by.full_name() if getattr(ach, "issued_by", None) and hasattr(ach.issued_by, "full_name") else (
-                    f"{getattr(ach.issued_by, 'first_name', '')} {getattr(ach.issued_by, 'last_name', '')}".strip() if ach.issued_by else None
-                ),
-            },
-            "detail_url": url_for("api.api_award_for_participant",
-                                  participant_id=user.id, award_slug=ach.award.slug, _external=True)
-        } for ach in achs]
+
+    base = _img_base()
+    detail_url = _url_template("api.api_award_for_participant", "award_slug", participant_id=user.id)
+    return json_response({
+        "participant": {"id": user.id, "name": user.full_name, "email": user.email},
+        "awards": [achievement_to_dict(a, award_snapshot(a.award_id), fields, base, detail_url) for a in achs],
     })
 
+def _batch_keys() -> tuple[list[int], list[str]]:
+    """Participant ids and emails from ?ids=1,2&emails=a@x or a JSON body {"ids": [...], "emails": [...]}."""
+    body = request.get_json(silent=True) if request.method == "POST" else None
+    if isinstance(body, dict):
+        raw_ids, raw_emails = body.get("ids") or [], body.get("emails") or []
+    else:
+        split = lambda name: [p for v in request.values.getlist(name) for p in v.split(",")]
+        raw_ids, raw_emails = split("ids"), split("emails")
+    try:
+        ids = list(dict.fromkeys(int(str(i).strip()) for i in raw_ids if str(i).strip()))
+    except ValueError:
+        abort(json_response({"error": "ids must be integers"}, 400))
+    emails = list(dict.fromkeys(e.strip().lower() for e in map(str, raw_emails) if e.strip()))
+    if not ids and not emails:
+        abort(json_response({"error": "Pass ids and/or emails"}, 400))
+    limit = current_app.config["API_BATCH_MAX"]
+    if len(ids) + len(emails) > limit:
+        abort(json_response({"error": f"At most {limit} participants per request"}, 400))
+    return ids, emails
+
+def _holdings_batches(ids: list[int], emails: list[str], fields: FieldSet, missing: list):
+    """
+    Yield participant holdings one chunk at a time: one IN (...) query for the
+    users and one for their achievements per chunk. Unknown keys go to ``missing``.
+    """
+    chunk_size = current_app.config["API_BATCH_CHUNK"]
+    base = _img_base()
+    person_cols = load_only(User.id, User.email, User.first_name, User.last_name)
+    keyed = [(User.id, ids), (User.email, emails)]
+    seen: set[int] = set()
+    for column, keys in keyed:
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            users = {getattr(u, column.key): u
+                     for u in User.query.options(person_cols, lazyload(User.roles)).filter(column.in_(chunk))}
+            holdings = defaultdict(list)
+            user_ids = [u.id for u in users.values() if u.id not in seen]
+            if user_ids:
+                for ach in (_achievement_query(fields)
+                            .filter(Achievement.participant_id.in_(user_ids))
+                            .order_by(Achievement.participant_id, Achievement.issued_at.desc())):
+                    holdings[ach.participant_id].append(ach)
+            rows = []
+            for key in chunk:
+                user = users.get(key)
+                if user is None:
+                    missing.append(key)
+                    continue
+                if user.id in seen:  # asked for by both id and email
+                    continue
+                seen.add(user.id)
+                detail_url = _url_template("api.api_award_for_participant", "award_slug", participant_id=user.id)
+                rows.append({
+                    "id": user.id, "name": user.full_name, "email": user.email,
+                    "awards": [achievement_to_dict(a, award_snapshot(a.award_id), fields, base, detail_url)
+                               for a in holdings[user.id]],
+                })
+            yield rows
+
+@bp.route("/participants/awards", methods=["GET", "POST"])
+@csrf.exempt
+def api_participants_awards():
+    fields = _participant_award_fields()
+    ids, emails = _batch_keys()
+    missing: list = []
+    batches = _holdings_batches(ids, emails, fields, missing)
+
+    if len(ids) + len(emails) <= current_app.config["API_BATCH_STREAM_THRESHOLD"]:
+        participants = [row for rows in batches for row in rows]
+        return json_response({"participants": participants, "missing": missing})
+
+    # Large batches: write each chunk out as soon as it is loaded
+    def generate():
+        yield b'{"participants":['
+        first = True
+        for rows in batches:
+            for row in rows:
+                yield dumps(row) if first else b"," + dumps(row)
+                first = False
+        yield b'],"missing":' + dumps(missing) + b"}"
+
+    return current_app.response_class(stream_with_context(generate()), mimetype="application/json")
+
 @bp.get("/participants/<int:participant_id>/awards/<award_slug>")
 def api_award_for_participant(participant_id: int, award_slug: str):
-    ach = (Achievement.query
-           .join(Award)
-           .filter(Achievement.participant_id == participant_id, Award.slug == award_slug)
+    fields = _fields(AWARD_DETAIL_FIELDS, nested={"award": AWARD_FIELDS})
+    award = award_catalogue().by_slug.get(award_slug) or abort(404)
+    ach = (_achievement_query(fields)
+           .filter(Achievement.participant_id == participant_id, Achievement.award_id == award.id)
            .first_or_404())
-    return jsonify({
-        "participant_id": participant_id,
-        "award": award_to_dict(ach.award),
-        "issued_at": ach.issued_at.isoformat(),
-        "issued_by": {
-            "id": ach.issued_by.id if ach.issued_by else None,
-            "name": ach.issued_by.full_name() if getattr(ach, "issued_by", None) and hasattr(ach.issued_by, "full_name") else (
-                f"{getattr(ach.issued_by, 'first_name', '')} {getattr(ach.issued_by, 'last_name', '')}".strip() if ach.issued_by else None
-            ),
-        },
-        "note": ach.note,
-    })
+    return json_response({"participant_id": participant_id,
+                          **achievement_to_dict(ach, award, fields, _img_base(), "")})
 
 @bp.get("/awards")
 def api_awards():
-    awards = Award.query.order_by(Award.points.desc(), Award.name.asc()).all()
-    return jsonify({
-        "awards": [{
-            **award_to_dict(a),
-            "participants_url": url_for("api.api_award_participants", award_slug=a.slug, _external=True)
-        } for a in awards]
-    })
+    fields = _fields(AWARD_LIST_FIELDS)
+    base = _img_base()
+    award_fields = None if fields.top.issuperset(AWARD_FIELDS) else fields.top
+    with_url = "participants_url" in fields
+    url = _url_template("api.api_award_participants", "award_slug")
+    awards = []
+    for a in award_catalogue():
+        row = award_to_dict(a, base, award_fields)
+        if with_url:
+            row["participants_url"] = url.replace("__slug__", a.slug)
+        awards.append(row)
+    return json_response({"awards": awards})
 
-@bp.get("/awards/<award_slug>/participants")
-def api_award_participants(award_slug: str):
-    award = Award.query.filter_by(slug=award_slug).first_or_404()
+def _holders_cache() -> SWRCache:
+    cache = current_app.extensions.get("microcred.award_holders")
+    if cache is None:
+        cfg = current_app.config
+        cache = SWRCache("award_holders", ttl=cfg["API_CACHE_TTL"], stale_ttl=cfg["API_CACHE_STALE_TTL"],
+                         flight=SingleFlight("award_holders", timeout=cfg["SINGLEFLIGHT_TIMEOUT"],
+                                             lock_dir=cfg["SINGLEFLIGHT_LOCK_DIR"]))
+        for ns in ("achievements", "awards", "users"):
+            coherence.on_change(ns, cache.expire)
+        cache = current_app.extensions.setdefault("microcred.award_holders", cache)
+    return cache
+
+def _load_holders(award_id: int) -> list[dict]:
     rows = (Achievement.query
-            .filter_by(award_id=award.id)
+            .filter_by(award_id=award_id)
             .join(User, Achievement.participant_id == User.id)
+            .options(load_only(Achievement.issued_at, Achievement.participant_id, Achievement.issued_by_id),
+                     joinedload(Achievement.participant)
+                     .options(load_only(User.id, User.email, User.first_name, User.last_name),
+                              lazyload(User.roles)),
+                     joinedload(Achievement.issued_by)
+                     .options(load_only(User.id, User.first_name, User.last_name), lazyload(User.roles)))
             .order_by(User.last_name.asc(), User.first_name.asc())
             .all())
-    return jsonify({
-        "award": award_to_dict(award),
-        "participants": [{
-            "id": r.participant.id,
-            "name": r.participant.full_name() if hasattr(r.participant, "full_name") else f"{r.participant.first_name or ''} {r.participant.last_name or ''}".strip(),
-            "email": r.participant.email,
-            "issued_at": r.issued_at.isoformat(),
-            "issued_by": {
-                "id": r.issued_by.id if r.issued_by else None,
-                "name": r.issued_by.full_name() if getattr(r, "issued_by", None) and hasattr(r.issued_by, "full_name") else (
-                    f"{getattr(r.issued_by, 'first_name', '')} {getattr(r.issued_by, 'last_name', '')}".strip() if r.issued_by else None
-                ),
-            }
-        } for r in rows]
-    })
+    return [holder_to_dict(r.participant, r.issued_at, r.issued_by) for r in rows]
+
+@bp.get("/awards/<award_slug>/participants")
+def api_award_participants(award_slug: str):
+    fields = _fields(("award", "participants"), nested={"award": AWARD_FIELDS, "participants": HOLDER_FIELDS})
+    award = award_catalogue().by_slug.get(award_slug) or abort(404)
+    payload = {}
+    if "award" in fields:
+        payload["award"] = award_to_dict(award, _img_base(), fields.nested("award"))
+    if "participants" in fields:
+        # holder lists are cached in full; projection is applied on the way out
+        holders = _holders_cache().get(award.id, lambda: _load_holders(award.id))
+        wanted = fields.nested("participants")
+        payload["participants"] = holders if wanted is None else [
+            {k: v for k, v in h.items() if k in wanted} for h in holders]
+    return json_response(payload)
+
+@bp.get("/achievements/changes")
+def api_achievement_changes():
+    """Delta feed: events after ?since=<cursor>, oldest first. Resume from ``next_cursor``."""
+    since = request.args.get("since", 0, type=int)
+    max_limit = current_app.config["API_CHANGES_MAX_LIMIT"]
+    limit = min(max(request.args.get("limit", max_limit, type=int), 1), max_limit)
+    page = changes_since(since, limit)
+    if page.resync:
+        # History before the cursor was pruned: reload holdings, then follow from "cursor"
+        return json_response({"error": "cursor expired", "resync": True, "cursor": page.next_cursor}, 410)
+
+    by_id = award_catalogue().by_id
+    changes = [change_to_dict(e, by_id.get(e.award_id)) for e in page.events]
+    return json_response({"changes": changes, "next_cursor": page.next_cursor, "has_more": page.has_more})
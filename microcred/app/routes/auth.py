@@ -1,8 +1,11 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required
 from ..extensions import db
-from ..models import User, Role
+from ..models import User
 from ..config import Config
+from ..services.invite_services import user_for_invite
+from ..services.principal_services import forget_principal
+from ..services.role_services import attached
 bp = Blueprint("auth", __name__, url_prefix="/auth")
 
 @bp.route("/login", methods=["GET", "POST"])
@@ -23,6 +26,7 @@ def login():
 @login_required
 def logout():
     logout_user()
+    forget_principal()
     return redirect(url_for("auth.login"))
 
 @bp.route("/register", methods=["GET", "POST"])
@@ -48,12 +52,30 @@ def register():
         else:
             u.password_hash = password  # fallback if you haven’t added hashing yet
 
-        participant = Role.query.filter_by(name="participant").first()
-        if participant:
-            u.roles.append(participant)
+        u.roles.extend(attached("participant"))
 
         db.session.add(u)
         db.session.commit()
         login_user(u)
         return redirect(url_for("participants.my_awards"))
     return render_template("register.html")
+
+@bp.route("/invite/<token>", methods=["GET", "POST"])
+def accept_invite(token: str):
+    user = user_for_invite(token)
+    if user is None:
+        flash("That invite link is invalid, expired or already used", "warning")
+        return redirect(url_for("auth.login"))
+    if request.method == "POST":
+        password = request.form.get("password") or ""
+        if not password:
+            flash("Choose a password", "warning")
+            return redirect(url_for("auth.accept_invite", token=token))
+        if password != (request.form.get("confirm") or ""):
+            flash("The passwords don't match", "warning")
+            return redirect(url_for("auth.accept_invite", token=token))
+        user.set_password(password)
+        db.session.commit()
+        login_user(user)
+        return redirect(url_for("participants.my_awards"))
+    return render_template("invite.html", user=user)
@@ -1,10 +1,11 @@
 # microcred/app/routes/forms.py
 from flask_wtf import FlaskForm
-from wtforms import StringField, IntegerField, TextAreaField, BooleanField
+from wtforms import StringField, IntegerField, TextAreaField, BooleanField, SelectMultipleField
 from wtforms.validators import DataRequired, Length, NumberRange, Optional, ValidationError
 from flask_wtf.file import FileField, FileAllowed
 import re
 from ..models import Award
+from ..criteria import CriteriaError, compile_criteria
 
 
 def slugify(value: str) -> str:
@@ -16,13 +17,24 @@ class AwardForm(FlaskForm):
     slug = StringField("Slug", validators=[Optional(), Length(max=120)])
     description = TextAreaField("Description", validators=[Optional(), Length(max=255)])
     points = IntegerField("Points", validators=[NumberRange(min=0)], default=0)
+    category = StringField("Category", validators=[Optional(), Length(max=64)])
+    criteria = TextAreaField("Criteria", validators=[Optional()])
+    auto_grant = BooleanField("Grant automatically when the criteria are met")
     icon = FileField(
         "Icon (PNG/JPG/WEBP)",
         validators=[FileAllowed(["png", "jpg", "jpeg", "webp"], "Images only")]
     )
 
+    def validate_criteria(self, field):
+        try:
+            compile_criteria(field.data)
+        except CriteriaError as e:
+            raise ValidationError(str(e))
+
 class AwardEditForm(AwardForm):
     remove_icon = BooleanField("Remove current icon")
+    # choices are filled in by the view from the catalogue
+    prerequisite_ids = SelectMultipleField("Prerequisites", coerce=int, validators=[Optional()])
 
     def validate_slug(self, field):
         # uniqueness check excluding the award being edited
@@ -6,9 +6,11 @@ from ._utils import roles_required
 from microcred.app.extensions import db
 from microcred.app.models.icons import Icon
 from microcred.app.models.award import Award
+from microcred.app.metrics import IMAGE_PROCESSING
+from microcred.app.db_routing import read_only
 from microcred.app.services.icon_service import (
     save_icon_file, create_icon, update_icon, delete_icon,
-    get_icon_by_id, get_icon_by_name, icons_root
+    get_icon_by_id, get_icon_by_name, icons_root, filter_by_name, icon_categories
 )
 
 from math import ceil
@@ -37,6 +39,7 @@ def icons_url_base() -> str:
 # ---------- CRUD UI ----------
 
 @icons_bp.route("/", methods=["GET"])
+@read_only
 @login_required
 def index():
     q = request.args.get("q", "").strip()
@@ -55,7 +58,7 @@ def index():
 
     query = Icon.query
     if q:
-        query = query.filter(Icon.name.ilike(f"%{q}%"))
+        query = filter_by_name(query, q)
     if category:
         query = query.filter(Icon.category == category)
 
@@ -67,8 +70,7 @@ def index():
 
 
 
-    categories = db.session.query(Icon.category).distinct().all()
-    categories = [c[0] for c in categories]
+    categories = icon_categories()
     start_page = max(1, pagination.page - 2)
     end_page = min(pagination.pages, pagination.page + 2)
     return render_template(
@@ -182,6 +184,7 @@ def remove(icon_id):
 # ---------- API/Utility endpoints ----------
 
 @icons_bp.route("/api/<int:icon_id>", methods=["GET"])
+@read_only
 def api_get_by_id(icon_id):
     icon = get_icon_by_id(icon_id)
     if not icon:
@@ -189,6 +192,7 @@ def api_get_by_id(icon_id):
     return jsonify({"id": icon.id, "name": icon.name, "category": icon.category, "filename": icon.filename, "url": icon.url})
 
 @icons_bp.route("/api/by-name/<string:name>", methods=["GET"])
+@read_only
 def api_get_by_name(name):
     icon = get_icon_by_name(name)
     if not icon:
@@ -207,6 +211,7 @@ def api_get_by_name(name):
 # ---------- Serve icon by id/name/url (returns the image file) ----------
 
 @icons_bp.route("/image/by-id/<int:icon_id>")
+@read_only
 def image_by_id(icon_id):
     icon = get_icon_by_id(icon_id)
     if not icon:
@@ -214,6 +219,7 @@ def image_by_id(icon_id):
     return send_from_directory(os.path.join(icons_root(), icon.category), icon.filename)
 
 @icons_bp.route("/image/by-name/<string:name>")
+@read_only
 def image_by_name(name):
     icon = get_icon_by_name(name)
     if not icon:
@@ -233,6 +239,7 @@ def image_by_name(name):
 #     return send_from_directory(os.path.join(icons_root(), icon.category), icon.filename)
 
 @icons_bp.route('/picker')
+@read_only
 def icon_picker():
     """HTML fragment for the popover: a small, clickable grid of icons."""
     page = max(int(request.args.get('page', 1)), 1)
@@ -315,9 +322,10 @@ def save_upload(file_storage, subdir='uploads') -> str:
         file_storage.save(fs_path)
     else:
         # Resize raster image to max 256x256, keep aspect
-        img = Image.open(file_storage.stream).convert('RGBA' if ext in {'.png', '.webp'} else 'RGB')
-        img.thumbnail((256, 256))
-        img.save(fs_path)
+        with IMAGE_PROCESSING.time(operation="library_icon"):
+            img = Image.open(file_storage.stream).convert('RGBA' if ext in {'.png', '.webp'} else 'RGB')
+            img.thumbnail((256, 256))
+            img.save(fs_path)
 
     # Return path relative to Icons root
     return f"{subdir}/{candidate}"
@@ -1,19 +1,24 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import current_user, login_required
+from sqlalchemy.orm import contains_eager, selectinload
 from ..extensions import db
 from ..models import Award, User, Achievement
 from ._utils import roles_required
+from ..db_routing import read_only
+from ..services.catalogue_services import award_catalogue
+from ..services.award_services import AwardService
 
 bp = Blueprint("issuers", __name__, url_prefix="/issuers")
+awards = AwardService()
 
 @bp.get("/awardable")
+@read_only
 @login_required
 @roles_required("issuer", "admin")
 def awardable_list():
-    awards = Award.query.order_by(Award.points.desc(), Award.name.asc()).all()
     return render_template(
         "issuer/awardable_list.html",
-        awards=awards,
+        awards=award_catalogue().awards,
         img_base=current_app.config.get("AWARD_IMAGE_BASE", "/static/awards")
     )
 
@@ -28,33 +33,28 @@ def award_post():
         flash("Participant and award are required", "warning")
         return redirect(url_for("issuers.awardable_list"))
 
-    if Achievement.query.filter_by(participant_id=participant_id, award_id=award_id).first():
-        flash("Participant already has this award", "info")
-        return redirect(url_for("issuers.awardable_list"))
-
-    ach = Achievement(
-        participant_id=participant_id,
-        award_id=award_id,
-        issued_by_id=current_user.id,
-        note=request.form.get("note", "")
-    )
-    db.session.add(ach)
     try:
-        db.session.commit()
-    except Exception as e:
+        ok, message = awards.grant_award(participant_id, award_id, issued_by_id=current_user.id,
+                                         note=request.form.get("note", ""))
+    except Exception:
         db.session.rollback()
         flash("Could not grant award, please try again", "danger")
         return redirect(url_for("issuers.awardable_list"))
 
-    flash("Award granted", "success")
+    flash(message, "success" if ok else "info")
     return redirect(url_for("issuers.awardable_list"))
 
 @bp.get("/issued")
+@read_only
 @roles_required("issuer", "admin")
 def issued_lists():
+    # participant and award come from the joins; issuers in one extra query
     achievements = (Achievement.query
                     .join(User, Achievement.participant_id == User.id)
                     .join(Award)
+                    .options(contains_eager(Achievement.participant).lazyload(User.roles),
+                             contains_eager(Achievement.award),
+                             selectinload(Achievement.issued_by).lazyload(User.roles))
                     .order_by(Award.points.desc(), User.last_name.asc(), User.first_name.asc())
                     .all())
     return render_template(
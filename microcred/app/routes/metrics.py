@@ -0,0 +1,14 @@
+import hmac
+from flask import Blueprint, Response, abort, current_app, request
+from ..metrics import registry
+
+bp = Blueprint("metrics", __name__)
+
+@bp.get("/metrics")
+def scrape():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied, token):
+            abort(401)
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
@@ -1,8 +1,15 @@
-from flask import Blueprint, render_template, current_app
+from flask import Blueprint, abort, render_template, current_app, request, url_for
 from flask_login import login_required, current_user
 from ..models import Award, Achievement
+from ..extensions import db
+from ..db_routing import read_only_blueprint
+from ..services.catalogue_services import award_catalogue
+from ..services.criteria_services import criteria_for, facts_from_awards
+from ..services.prerequisite_services import achievable_for
+from ..services.badge_services import FORMATS, assertion_id, build_assertion, signed_assertion
+from ..serializers import dumps
 
-bp = Blueprint("participants", __name__, url_prefix="/me")
+bp = read_only_blueprint(Blueprint("participants", __name__, url_prefix="/me"))
 
 @bp.get("/awards")
 @login_required
@@ -28,16 +35,48 @@ def my_award_detail(slug: str):
     return render_template(
         "participant/award_detail.html",
         ach=ach,
+        verify_url=url_for("verify.credential", aid=assertion_id(ach.id), _external=True),
         img_base=current_app.config.get("AWARD_IMAGE_BASE", "/static/awards")
     )
 
+def _assertion_args(slug: str):
+    fmt = request.args.get("format", "ob2")
+    if fmt not in FORMATS:
+        abort(400)
+    award = award_catalogue().by_slug.get(slug) or abort(404)
+    ach = Achievement.query.filter_by(participant_id=current_user.id, award_id=award.id).first_or_404()
+    return ach, award, fmt
+
+@bp.get("/awards/<slug>/assertion.json")
+@login_required
+def my_award_assertion(slug: str):
+    ach, award, fmt = _assertion_args(slug)
+    body = dumps(build_assertion(ach, award, current_user.email, fmt))
+    return current_app.response_class(body, mimetype="application/ld+json", headers={
+        "Content-Disposition": f'attachment; filename="{slug}-{fmt}.json"'})
+
+@bp.get("/awards/<slug>/assertion.jws")
+@login_required
+def my_award_assertion_signed(slug: str):
+    ach, award, fmt = _assertion_args(slug)
+    return current_app.response_class(signed_assertion(ach, award, current_user.email, fmt), mimetype="application/jwt",
+                                      headers={"Content-Disposition": f'attachment; filename="{slug}-{fmt}.jws"'})
+
 @bp.get("/achievable")
 @login_required
 def achievable():
-    have_ids = {a.award_id for a in current_user.achievements}  # type: ignore[attr-defined]
-    awards = Award.query.filter(~Award.id.in_(have_ids)).order_by(Award.points.desc()).all()
+    view = achievable_for(current_user.id)
+    # prerequisites are met for these; the award's own rules get the final say
+    facts = facts_from_awards((a.id for a in view.held), current_user.role_names, award_catalogue().by_id)
+    unlocked = []
+    for award in view.unlocked:
+        ok, reason = criteria_for(award).check(facts)
+        if ok:
+            unlocked.append(award)
+        else:
+            view.locked.append((award, reason.capitalize()))
     return render_template(
-        "participant/awards_list.html",
-        achievable=awards,
+        "participant/achievable.html",
+        unlocked=unlocked, locked=view.locked, held=view.held,
         img_base=current_app.config.get("AWARD_IMAGE_BASE", "/static/awards")
     )
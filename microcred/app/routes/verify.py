@@ -0,0 +1,127 @@
+import hashlib
+
+from flask import Blueprint, Flask, abort, current_app, request, send_file
+from flask.sessions import SecureCookieSessionInterface
+from ..db_routing import read_only_blueprint
+from ..serializers import dumps
+from ..services.badge_image_services import IMAGE_FORMATS, badge_image
+from ..services.badge_services import FORMATS, hosted_assertion, signer
+from ..services.catalogue_services import award_snapshot
+from ..services.verify_services import ASSERTION_ID_RE, Rendered, find_achievement, verify_cache
+
+bp = read_only_blueprint(Blueprint("verify", __name__, url_prefix="/verify"))
+
+# what ?format= / Accept can ask for, and the cache key part for each
+_OFFERED = ("application/ld+json", "application/json", "text/html")
+
+
+class StatelessPathsSession(SecureCookieSessionInterface):
+    """Cookie sessions everywhere except under ``prefixes``, which never read or write one."""
+
+    def __init__(self, prefixes: tuple[str, ...]) -> None:
+        self.prefixes = prefixes
+
+    def open_session(self, app, request):
+        if request.path.startswith(self.prefixes):
+            return None  # Flask substitutes a null session, which is never saved
+        return super().open_session(app, request)
+
+
+def init_app(app: Flask) -> None:
+    # Verifiers are anonymous: no session cookie to unsign, no user to load
+    app.session_interface = StatelessPathsSession((bp.url_prefix + "/",))
+    verify_cache.max_entries = app.config.get("VERIFY_CACHE_SIZE", 20000)
+
+
+def _representation() -> str:
+    fmt = request.args.get("format")
+    if fmt in FORMATS:
+        return fmt
+    if fmt == "html":
+        return "html"
+    if fmt is not None:
+        abort(400)
+    best = request.accept_mimetypes.best_match(_OFFERED, default=_OFFERED[0])
+    return "html" if best == "text/html" else "ob2"
+
+
+def _render(aid: str, rep: str) -> tuple[int | None, Rendered | None]:
+    ach = find_achievement(aid)
+    award = award_snapshot(ach.award_id) if ach is not None else None
+    if award is None:
+        return None, None
+    if rep == "html":
+        # straight from the Jinja env: context processors would load current_user
+        body = current_app.jinja_env.get_template("verify/credential.html").render(
+            ach=ach, award=award, issuer_name=current_app.config["ISSUER_NAME"],
+            issuer_url=current_app.config["ISSUER_URL"],
+            img_base=current_app.config.get("AWARD_IMAGE_BASE", "/static/awards"),
+            json_url=f"{request.base_url}?format=ob2",
+            image_url=f"{request.base_url}/badge.png").encode("utf-8")
+        mimetype = "text/html"
+    else:
+        body = dumps(hosted_assertion(ach, award, ach.email, rep))
+        mimetype = "application/ld+json"
+    return ach.id, Rendered(body, hashlib.sha1(body).hexdigest(), mimetype)
+
+
+def _cached(body: bytes, etag: str, mimetype: str, max_age: int):
+    if etag in request.if_none_match:
+        resp = current_app.response_class(status=304)
+    else:
+        resp = current_app.response_class(body, mimetype=mimetype)
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = f"public, max-age={max_age}"
+    resp.headers["Vary"] = "Accept"
+    resp.headers["Access-Control-Allow-Origin"] = "*"
+    return resp
+
+
+@bp.get("/<aid>")
+def credential(aid: str):
+    rep = _representation()
+    if not ASSERTION_ID_RE.match(aid):
+        abort(404)
+    key = (aid, rep)
+    hit, rendered = verify_cache.get(key)
+    if not hit:
+        achievement_id, rendered = _render(aid, rep)
+        verify_cache.put(key, achievement_id, rendered)
+    if rendered is None:
+        # unknown or revoked; only briefly cacheable, it may be issued (or re-issued) soon
+        resp = current_app.response_class(dumps({"error": "No such credential, or it has been revoked."}),
+                                          status=404, mimetype="application/json")
+        resp.headers["Cache-Control"] = f"public, max-age={current_app.config['VERIFY_NOT_FOUND_MAX_AGE']}"
+        return resp
+    return _cached(rendered.body, rendered.etag, rendered.mimetype, current_app.config["VERIFY_MAX_AGE"])
+
+
+@bp.get("/<aid>/badge.<ext>")
+def badge_card(aid: str, ext: str):
+    if ext not in IMAGE_FORMATS or not ASSERTION_ID_RE.match(aid):
+        abort(404)
+    # looked up every time (one indexed query) so a revoked badge stops rendering at once
+    ach = find_achievement(aid)
+    award = award_snapshot(ach.award_id) if ach is not None else None
+    if award is None:
+        abort(404)
+    path, etag = badge_image(ach, award, ext)
+    return send_file(path, mimetype=IMAGE_FORMATS[ext][1], etag=etag, conditional=True,
+                     max_age=current_app.config["VERIFY_MAX_AGE"])
+
+
+@bp.get("/keys/<kid>")
+def public_key(kid: str):
+    sign = signer()
+    pem = sign.public_key_pem()
+    if kid != sign.kid or pem is None:
+        abort(404)  # HS256 deployments have nothing to publish
+    issuer = current_app.config["ISSUER_URL"]
+    body = dumps({
+        "@context": "https://w3id.org/openbadges/v2",
+        "type": "CryptographicKey",
+        "id": request.base_url,
+        "owner": issuer,
+        "publicKeyPem": pem,
+    })
+    return _cached(body, hashlib.sha1(body).hexdigest(), "application/ld+json", current_app.config["VERIFY_MAX_AGE"])
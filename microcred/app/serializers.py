@@ -0,0 +1,155 @@
+# microcred/app/serializers.py
+"""
+JSON encoding and field projection shared by the API.
+
+``dumps`` uses orjson when it is installed (it encodes dicts and datetimes in
+C) and falls back to the stdlib encoder otherwise. ``FieldSet`` parses a
+``?fields=`` sparse fieldset (``slug,name,award.points``) so views can load
+and emit only what the client asked for. Nothing here depends on Flask, so
+other front ends can reuse the same representations.
+"""
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Iterable
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+AWARD_FIELDS = ("id", "slug", "name", "description", "image", "points", "criteria", "category")
+# Fields a client may pick with ?fields=...; "award.<field>" narrows the nested award
+PARTICIPANT_AWARD_FIELDS = ("award", "issued_at", "issued_by", "note", "detail_url")
+PARTICIPANT_AWARD_DEFAULT = ("award", "issued_at", "issued_by", "detail_url")
+AWARD_DETAIL_FIELDS = ("award", "issued_at", "issued_by", "note")
+AWARD_LIST_FIELDS = (*AWARD_FIELDS, "participants_url")
+HOLDER_FIELDS = ("id", "name", "email", "issued_at", "issued_by")
+
+
+class FieldSetError(ValueError):
+    """The client asked for a field the resource doesn't have."""
+
+
+def _default(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FieldSet:
+    """
+    Parsed ``?fields=`` value. ``"award" in fs`` says whether a top-level field
+    is wanted; ``fs.nested("award")`` gives the requested sub-fields, or None
+    for all of them.
+    """
+
+    def __init__(self, raw: str | None, allowed: Iterable[str], *,
+                 default: Iterable[str] | None = None,
+                 nested_allowed: dict[str, Iterable[str]] | None = None) -> None:
+        allowed = tuple(allowed)
+        nested_allowed = {k: set(v) for k, v in (nested_allowed or {}).items()}
+        self._nested: dict[str, set[str]] = defaultdict(set)
+        if not raw or not raw.strip():
+            self.top = set(default if default is not None else allowed)
+            return
+        self.top = set()
+        for part in (p.strip() for p in raw.split(",")):
+            if not part:
+                continue
+            head, _, sub = part.partition(".")
+            if head not in allowed:
+                raise FieldSetError(f"Unknown field '{head}'. Allowed: {', '.join(allowed)}")
+            self.top.add(head)
+            if sub:
+                if sub not in nested_allowed.get(head, ()):
+                    raise FieldSetError(f"Unknown field '{part}'.")
+                self._nested[head].add(sub)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.top
+
+    def nested(self, name: str) -> set[str] | None:
+        return self._nested.get(name) or None
+
+    def pick(self, row: dict) -> dict:
+        """Filter an already-built dict down to the requested top-level keys."""
+        return {k: v for k, v in row.items() if k in self.top}
+
+
+def award_to_dict(a, image_base: str | None, fields: set[str] | None = None) -> dict:
+    """Award (model or snapshot) representation; ``fields`` limits the keys."""
+    if fields is None:
+        return {
+            "id": a.id,
+            "slug": a.slug,
+            "name": a.name,
+            "description": a.description,
+            "image": a.image_url(image_base),
+            "points": a.points,
+            "criteria": a.criteria,
+            "category": a.category,
+        }
+    out = {}
+    for key in AWARD_FIELDS:
+        if key in fields:
+            out[key] = a.image_url(image_base) if key == "image" else getattr(a, key)
+    return out
+
+
+def person_to_dict(user) -> dict:
+    if user is None:
+        return {"id": None, "name": None}
+    return {"id": user.id, "name": user.full_name}
+
+
+def achievement_to_dict(ach, award, fields: FieldSet, image_base: str | None, detail_url: str) -> dict:
+    """
+    One held award. ``ach`` needs ``issued_at``, ``issued_by`` and ``note``;
+    ``detail_url`` is a template with ``__slug__`` where the award slug goes.
+    """
+    item = {}
+    if "award" in fields:
+        item["award"] = award_to_dict(award, image_base, fields.nested("award"))
+    if "issued_at" in fields:
+        item["issued_at"] = ach.issued_at
+    if "issued_by" in fields:
+        item["issued_by"] = person_to_dict(ach.issued_by)
+    if "note" in fields:
+        item["note"] = ach.note
+    if "detail_url" in fields:
+        item["detail_url"] = detail_url.replace("__slug__", award.slug)
+    return item
+
+
+def holder_to_dict(participant, issued_at, issued_by) -> dict:
+    return {
+        "id": participant.id,
+        "name": participant.full_name,
+        "email": participant.email,
+        "issued_at": issued_at,
+        "issued_by": person_to_dict(issued_by),
+    }
+
+
+def change_to_dict(e, award) -> dict:
+    """One change-feed event; ``award`` is its catalogue entry, if it still exists."""
+    return {
+        "seq": e.seq,
+        "kind": e.kind,
+        "participant_id": e.participant_id,
+        "award_id": e.award_id,
+        "award_slug": award.slug if award else None,
+        "issued_at": e.issued_at,
+        "note": e.note,
+        "actor_id": e.actor_id,
+        "occurred_at": e.occurred_at,
+    }
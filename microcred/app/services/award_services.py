@@ -1,14 +1,20 @@
+import logging
 from typing import Tuple, Optional
 from ..extensions import db
 from ..models import Achievement, Award, User
 from .criteria_services import CriteriaService
 from .audit_services import AuditService
+from .rule_engine import RuleEngine, rule_engine
+
+logger = logging.getLogger("microcred.awards")
 
 class AwardService:
     def __init__(self, criteria: Optional[CriteriaService] = None,
-                 audit: Optional[AuditService] = None) -> None:
+                 audit: Optional[AuditService] = None,
+                 rules: Optional[RuleEngine] = None) -> None:
         self.criteria = criteria or CriteriaService()
         self.audit = audit or AuditService()
+        self.rules = rules or rule_engine
 
     def grant_award(self, participant_id: int, award_id: int, *,
                     issued_by_id: int, note: str = "") -> Tuple[bool, str]:
@@ -44,4 +50,21 @@ class AwardService:
             })
         except Exception:
             pass
-        return True, "Award granted."
\ No newline at end of file
+
+        unlocked = self.unlock_after(participant_id, [award_id])
+        if unlocked:
+            return True, f"Award granted. Also unlocked: {', '.join(s.name for s in unlocked)}."
+        return True, "Award granted."
+
+    def unlock_after(self, participant_id: int, award_ids: list[int]) -> list:
+        """
+        Grant the automatic awards that committed grants of ``award_ids`` unlock.
+        A failure here must not undo those grants, so it is logged and nothing
+        is unlocked; `flask rules backfill` catches up later.
+        """
+        try:
+            return self.rules.on_granted(participant_id, award_ids)
+        except Exception:
+            db.session.rollback()
+            logger.exception("rule engine failed after granting award(s) %s to user %s", award_ids, participant_id)
+            return []
\ No newline at end of file
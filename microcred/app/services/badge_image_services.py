@@ -0,0 +1,225 @@
+# microcred/app/services/badge_image_services.py
+"""
+Shareable badge images.
+
+``badge_image`` composites the award icon, the award name and the earner's
+name into a 1200x630 card (the size link previews use) and returns the file
+to send. Rendering takes tens of milliseconds, so each image is rendered once
+and kept in ``DiskLRU`` under ``BADGE_IMAGE_CACHE_DIR``. The file name is a
+digest of everything drawn on the card (award name, icon file and its mtime,
+earner name, format), so an edit simply produces a new file and the old one
+ages out; nothing has to be invalidated. Revocation is handled by the caller,
+which only asks for images of achievements that still exist.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from flask import current_app
+from PIL import Image, ImageDraw, ImageFont
+
+from ..metrics import IMAGE_PROCESSING, record_cache
+from ..singleflight import SingleFlight
+from .catalogue_services import AwardSnapshot
+from .storage_services import ensure_awards_dir
+
+logger = logging.getLogger("microcred.badge_images")
+
+IMAGE_FORMATS = {"png": ("PNG", "image/png"), "webp": ("WEBP", "image/webp")}
+CARD_SIZE = (1200, 630)
+ICON_SIZE = 360
+# bump when the layout changes so old renders stop matching
+LAYOUT_VERSION = 1
+
+_FONT_CANDIDATES = ("DejaVuSans-Bold.ttf", "DejaVuSans.ttf", "Arial.ttf")
+
+
+class DiskLRU:
+    """
+    Files in one directory, evicted least-recently-used once they add up to
+    more than ``max_bytes``. A hit touches the file's mtime, so recency
+    survives restarts and is shared by every worker using the directory.
+    Each process only estimates the total between scans; a scan (at start-up
+    and whenever the estimate crosses the limit) gets the real figure.
+    """
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._estimate: int | None = None
+
+    def get(self, name: str) -> Path | None:
+        path = self.directory / name
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, name: str, data: bytes) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / name
+        tmp = path.with_name(f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._estimate is None:
+                self._estimate = self._scan_total()
+            else:
+                self._estimate += len(data)
+            over = self._estimate > self.max_bytes
+        if over:
+            self.evict()
+        return path
+
+    def evict(self, target: float = 0.9) -> int:
+        """Delete the oldest files until the directory is under ``target`` of the limit."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes * target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue  # another worker got there first
+            total -= size
+            removed += 1
+        with self._lock:
+            self._estimate = total
+        if removed:
+            logger.info("badge image cache: evicted %d file(s), %d bytes left", removed, total)
+        return removed
+
+    def _scan_total(self) -> int:
+        return sum(e.stat().st_size for e in os.scandir(self.directory)
+                   if e.is_file() and not e.name.startswith("."))
+
+
+@lru_cache(maxsize=8)
+def _font(size: int, path: str | None) -> ImageFont.ImageFont:
+    for candidate in ([path] if path else []) + list(_FONT_CANDIDATES):
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font, width: int, max_lines: int) -> list[str]:
+    lines, line = [], ""
+    for word in text.split():
+        trial = f"{line} {word}".strip()
+        if draw.textlength(trial, font=font) <= width or not line:
+            line = trial
+        else:
+            lines.append(line)
+            line = word
+    if line:
+        lines.append(line)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = lines[-1].rstrip(".") + "…"
+    return lines
+
+
+def render_card(award: AwardSnapshot, icon_path: Path | None, earner: str, issuer: str,
+                issued: str, fmt: str, font_path: str | None = None) -> bytes:
+    """Encode one badge card; pure Pillow, no app context needed."""
+    with IMAGE_PROCESSING.time(operation="badge_card"):
+        card = Image.new("RGB", CARD_SIZE, (248, 249, 250))
+        draw = ImageDraw.Draw(card)
+        draw.rectangle((0, 0, CARD_SIZE[0], 12), fill=(13, 110, 253))
+
+        left, top = 60, (CARD_SIZE[1] - ICON_SIZE) // 2
+        icon = None
+        if icon_path is not None:
+            try:
+                icon = Image.open(icon_path).convert("RGBA")
+            except OSError:
+                logger.warning("badge image: can't read icon %s", icon_path)
+        if icon is not None:
+            icon.thumbnail((ICON_SIZE, ICON_SIZE), Image.LANCZOS)
+            card.paste(icon, (left + (ICON_SIZE - icon.width) // 2, top + (ICON_SIZE - icon.height) // 2), icon)
+        else:
+            draw.ellipse((left, top, left + ICON_SIZE, top + ICON_SIZE), fill=(108, 117, 125))
+
+        x, width = left + ICON_SIZE + 60, CARD_SIZE[0] - (left + ICON_SIZE + 60) - 60
+        title_font, body_font, small_font = _font(64, font_path), _font(40, font_path), _font(28, font_path)
+        title = _wrap(draw, award.name, title_font, width, 3)
+        y = CARD_SIZE[1] // 2 - (len(title) * 76 + 150) // 2
+        for line in title:
+            draw.text((x, y), line, font=title_font, fill=(33, 37, 41))
+            y += 76
+        y += 20
+        for line in _wrap(draw, f"Awarded to {earner}", body_font, width, 2):
+            draw.text((x, y), line, font=body_font, fill=(73, 80, 87))
+            y += 50
+        draw.text((x, y + 10), f"{issuer} · {issued}", font=small_font, fill=(108, 117, 125))
+
+        out = io.BytesIO()
+        pil_format = IMAGE_FORMATS[fmt][0]
+        card.save(out, format=pil_format, **({"optimize": True} if fmt == "png" else {"quality": 90}))
+        return out.getvalue()
+
+
+_flight = SingleFlight("badge_image")
+
+
+def _state() -> DiskLRU:
+    ext = current_app.extensions
+    lru = ext.get("microcred.badge_images")
+    if lru is None:
+        config = current_app.config
+        lru = ext.setdefault("microcred.badge_images", DiskLRU(
+            config["BADGE_IMAGE_CACHE_DIR"], config["BADGE_IMAGE_CACHE_MAX_MB"] * 1024 * 1024))
+    return lru
+
+
+def badge_image(ach, award: AwardSnapshot, fmt: str = "png") -> tuple[Path, str]:
+    """(path, etag) of the card for ``ach``; renders it on the first request only."""
+    config = current_app.config
+    icon_path, icon_stamp = None, ""
+    if award.image_filename:
+        icon_path = ensure_awards_dir() / award.image_filename
+        try:
+            st = icon_path.stat()
+            icon_stamp = f"{st.st_mtime_ns}:{st.st_size}"
+        except OSError:
+            icon_path = None
+    earner = ach.earner_name or "a participant"
+    issued = ach.issued_at.strftime("%d %b %Y").lstrip("0")
+    issuer = config["ISSUER_NAME"]
+    digest = hashlib.sha1(repr((LAYOUT_VERSION, award.name, award.image_filename, icon_stamp,
+                                earner, issuer, issued)).encode("utf-8")).hexdigest()[:20]
+    name = f"{ach.award_id}-{ach.id}-{digest}.{fmt}"
+    etag = f"{digest}-{fmt}"
+
+    lru = _state()
+    path = lru.get(name)
+    record_cache("badge_image", path is not None)
+    if path is None:
+        font_path = config.get("BADGE_IMAGE_FONT")
+
+        def render() -> Path:
+            # another worker may have rendered it while this one waited
+            return lru.get(name) or lru.put(name, render_card(award, icon_path, earner, issuer, issued, fmt,
+                                                              font_path))
+        path = _flight.do(name, render)
+    return path, etag
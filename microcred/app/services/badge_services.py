@@ -0,0 +1,215 @@
+# microcred/app/services/badge_services.py
+"""
+Open Badges assertions.
+
+``build_assertion`` renders an achievement as an Open Badges 2.0 Assertion
+("ob2") or a 3.0 OpenBadgeCredential ("ob3"). ``signed_assertion`` returns it
+as a compact JWS. Signing (RSA in production) is the expensive part, so
+signatures are cached in memory and under ``ASSERTION_CACHE_DIR``, keyed by
+key version, format and achievement id; each entry also remembers a digest of
+the unsigned payload and is re-signed if the award or recipient changed.
+Assertion ids are derived from the achievement id with an HMAC, so they are
+stable but not guessable.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from flask import current_app
+
+from ..metrics import record_cache
+from ..serializers import dumps
+from ..signing import Signer, b64url
+from .catalogue_services import AwardSnapshot
+
+FORMATS = ("ob2", "ob3")
+OB2_CONTEXT = "https://w3id.org/openbadges/v2"
+OB3_CONTEXT = ["https://www.w3.org/ns/credentials/v2",
+               "https://purl.imsglobal.org/spec/ob/v3p0/context-3.0.3.json"]
+
+
+def assertion_id(achievement_id: int, config=None) -> str:
+    config = config or current_app.config
+    secret = (config.get("ASSERTION_HMAC_SECRET") or config["SECRET_KEY"]).encode("utf-8")
+    digest = hmac.new(secret, f"assertion:{achievement_id}".encode("ascii"), hashlib.sha256).digest()
+    return b64url(digest[:16])
+
+
+def _iso(dt: datetime) -> str:
+    return dt.replace(microsecond=0).isoformat() + "Z"
+
+
+def _recipient_hash(email: str, salt: str) -> str:
+    return "sha256$" + hashlib.sha256((email.strip().lower() + salt).encode("utf-8")).hexdigest()
+
+
+def build_assertion(ach, award: AwardSnapshot, email: str, fmt: str = "ob2", config=None) -> dict:
+    """Unsigned assertion for ``ach`` (an Achievement row) held by ``email``."""
+    config = config or current_app.config
+    base = config["PUBLIC_BASE_URL"].rstrip("/")
+    aid = assertion_id(ach.id, config)
+    url = f"{base}/verify/{aid}"
+    image = award.image_url(config.get("AWARD_IMAGE_BASE", "/static/awards"))
+    if image and image.startswith("/"):
+        image = base + image
+    issuer = {"id": config["ISSUER_URL"], "name": config["ISSUER_NAME"], "url": config["ISSUER_URL"]}
+    if config.get("ISSUER_EMAIL"):
+        issuer["email"] = config["ISSUER_EMAIL"]
+    salt = aid  # per-assertion, so the same email hashes differently on each badge
+    narrative = award.criteria_text or award.description
+
+    if fmt == "ob2":
+        return {
+            "@context": OB2_CONTEXT,
+            "type": "Assertion",
+            "id": url,
+            "recipient": {"type": "email", "hashed": True, "salt": salt,
+                          "identity": _recipient_hash(email, salt)},
+            "badge": {
+                "type": "BadgeClass",
+                "id": f"urn:microcred:badge:{award.slug}",
+                "name": award.name,
+                "description": award.description,
+                "image": image,
+                "criteria": {"narrative": narrative},
+                "issuer": {"type": "Profile", **issuer},
+            },
+            "issuedOn": _iso(ach.issued_at),
+            "verification": {"type": "SignedBadge",
+                             "creator": f"{base}/verify/keys/{config['ASSERTION_KEY_ID']}"},
+        }
+    if fmt == "ob3":
+        achievement = {
+            "id": f"urn:microcred:badge:{award.slug}",
+            "type": ["Achievement"],
+            "name": award.name,
+            "description": award.description,
+            "criteria": {"narrative": narrative},
+        }
+        if image:
+            achievement["image"] = {"id": image, "type": "Image"}
+        return {
+            "@context": OB3_CONTEXT,
+            "id": url,
+            "type": ["VerifiableCredential", "OpenBadgeCredential"],
+            "issuer": {"type": ["Profile"], **issuer},
+            "validFrom": _iso(ach.issued_at),
+            "name": award.name,
+            "credentialSubject": {
+                "type": ["AchievementSubject"],
+                "identifier": [{"type": "IdentityObject", "identityType": "emailAddress", "hashed": True,
+                                "salt": salt, "identityHash": _recipient_hash(email, salt)}],
+                "achievement": achievement,
+            },
+        }
+    raise ValueError(f"Unknown assertion format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def _jwt_claims(payload: dict, fmt: str) -> dict:
+    if fmt != "ob3":
+        return payload
+    # VC-JWT: the credential plus the registered claims verifiers look at
+    valid_from = datetime.fromisoformat(payload["validFrom"].rstrip("Z")).replace(tzinfo=timezone.utc)
+    return {**payload, "iss": payload["issuer"]["id"], "jti": payload["id"], "nbf": int(valid_from.timestamp())}
+
+
+class AssertionCache:
+    """Signed assertions: a bounded in-memory LRU in front of files on disk."""
+
+    def __init__(self, directory: str | os.PathLike | None, max_entries: int = 4096) -> None:
+        self.directory = Path(directory) if directory else None
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[tuple, tuple[str, str]] = OrderedDict()
+
+    def _path(self, key: tuple) -> Path:
+        version, fmt, ach_id = key
+        return self.directory / version / fmt / f"{ach_id}.jws"
+
+    def get(self, key: tuple, digest: str) -> str | None:
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                self._memory.move_to_end(key)
+        if hit is None and self.directory is not None:
+            try:
+                stored_digest, _, jws = self._path(key).read_text("ascii").partition("\n")
+                hit = (stored_digest, jws)
+                self._remember(key, hit)
+            except OSError:
+                pass
+        if hit is not None and hit[0] == digest:
+            return hit[1]
+        return None
+
+    def put(self, key: tuple, digest: str, jws: str) -> None:
+        self._remember(key, (digest, jws))
+        if self.directory is not None:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(f"{digest}\n{jws}", "ascii")
+            os.replace(tmp, path)
+
+    def discard(self, achievement_id: int) -> None:
+        """Forget every cached signature of one achievement (e.g. after revocation)."""
+        with self._lock:
+            for key in [k for k in self._memory if k[2] == achievement_id]:
+                del self._memory[key]
+        if self.directory is not None and self.directory.exists():
+            for path in self.directory.glob(f"*/*/{achievement_id}.jws"):
+                path.unlink(missing_ok=True)
+
+    def _remember(self, key: tuple, value: tuple[str, str]) -> None:
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+def _state():
+    ext = current_app.extensions
+    state = ext.get("microcred.assertions")
+    if state is None:
+        state = ext.setdefault("microcred.assertions", (
+            Signer.from_config(current_app.config),
+            AssertionCache(current_app.config.get("ASSERTION_CACHE_DIR"))))
+    return state
+
+
+def signer() -> Signer:
+    return _state()[0]
+
+
+def assertion_cache() -> AssertionCache:
+    return _state()[1]
+
+
+def hosted_assertion(ach, award: AwardSnapshot, email: str, fmt: str = "ob2") -> dict:
+    """The assertion as published at its ``/verify`` URL and embedded in the JWS."""
+    payload = build_assertion(ach, award, email, fmt)
+    if signer().alg != "RS256" and fmt == "ob2":
+        # an HMAC signature can't be checked by outside verifiers; point them at the hosted copy
+        payload["verification"] = {"type": "HostedBadge"}
+    return payload
+
+
+def signed_assertion(ach, award: AwardSnapshot, email: str, fmt: str = "ob2") -> str:
+    """Compact JWS of the assertion; signs only on a cache miss."""
+    sign, cache = _state()
+    payload = hosted_assertion(ach, award, email, fmt)
+    digest = hashlib.sha1(dumps(payload)).hexdigest()
+    key = (sign.version, fmt, ach.id)
+    jws = cache.get(key, digest)
+    record_cache("assertion", jws is not None)
+    if jws is None:
+        jws = sign.sign(_jwt_claims(payload, fmt), typ="JWT")
+        cache.put(key, digest, jws)
+    return jws
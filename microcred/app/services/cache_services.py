@@ -0,0 +1,178 @@
+# microcred/app/services/cache_services.py
+"""
+Cross-worker cache coherence.
+
+Each cache namespace ("awards", "icons", "users", "roles", "achievements") has a row in
+``cache_versions``. Any flush that changes a model in a namespace bumps that
+row inside the same transaction, so the bump commits or rolls back together
+with the data. Every worker reads the (tiny) table at most once per
+``CACHE_COHERENCE_INTERVAL_MS`` at the start of a request and fires the
+invalidation callbacks of the namespaces whose version moved.
+
+Versions come from one sequence shared by all rows (a bump sets its row to
+the table's max + 1), so a worker only reads the rows above the highest
+version it has seen. That keeps the read small even with a row per edited
+user: every change to a user also bumps ``users:<id>`` (see
+``user_namespace``), which is what a principal is stamped with. The bump
+runs inside the writer's transaction, and SQLite serialises writers, so
+versions commit in increasing order and the high-water read can't skip one.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from itertools import chain
+from typing import Callable
+
+from flask import Flask
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import Achievement, Award, CacheVersion, Role, User
+from ..models.icons import Icon
+
+logger = logging.getLogger("microcred.cache")
+
+NAMESPACES = ("awards", "icons", "users", "roles", "achievements")
+
+_MODEL_NAMESPACES: dict[type, str] = {
+    Award: "awards", Icon: "icons", User: "users", Role: "roles", Achievement: "achievements",
+}
+# New rows in these namespaces can't be in anyone's cache yet
+_INSERTS_IGNORED = {"users"}
+_PENDING = "cache_namespaces"
+
+_BUMP_SQL = text(
+    "INSERT INTO cache_versions (namespace, version) "
+    "VALUES (:ns, (SELECT coalesce(max(version), 0) + 1 FROM cache_versions)) "
+    "ON CONFLICT (namespace) DO UPDATE SET version = excluded.version"
+)
+
+
+def user_namespace(user_id: int) -> str:
+    """The namespace bumped whenever user ``user_id`` or their roles change."""
+    return f"users:{user_id}"
+
+
+def register_model(model: type, namespace: str) -> None:
+    """Make flushes of ``model`` bump ``namespace``."""
+    _MODEL_NAMESPACES[model] = namespace
+
+
+class Coherence:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}
+        self._high_water = 0
+        self._callbacks: dict[str, list[Callable[[], object]]] = defaultdict(list)
+        self._next_check = 0.0
+        self.interval = 0.25
+        self.enabled = True
+        self._failing = False
+
+    def version(self, namespace: str) -> int:
+        """Last shared version this worker has seen for ``namespace``."""
+        return self._versions.get(namespace, 0)
+
+    def on_change(self, namespace: str, callback: Callable[[], object]) -> None:
+        self._callbacks[namespace].append(callback)
+
+    def request_sync(self) -> None:
+        """Re-read the version table at the start of the next request."""
+        self._next_check = 0.0
+
+    def sync(self, force: bool = False) -> list[str]:
+        """Pick up version changes from other workers; returns the stale namespaces."""
+        now = time.monotonic()
+        if not self.enabled or (not force and now < self._next_check):
+            return []
+        if not self._lock.acquire(blocking=False):
+            return []  # another thread of this worker is syncing right now
+        try:
+            self._next_check = now + self.interval
+            with db.engine.connect() as conn:
+                rows = conn.execute(select(CacheVersion.namespace, CacheVersion.version)
+                                    .where(CacheVersion.version > self._high_water)).all()
+            stale = [ns for ns, v in rows if v != self._versions.get(ns, 0)]
+            self._versions.update(dict(rows))
+            self._high_water = max((v for _, v in rows), default=self._high_water)
+        except SQLAlchemyError:
+            # transient (a locked SQLite file, say): keep the schedule and try again next interval
+            if not self._failing:
+                logger.exception("cache_versions unavailable; retrying every %.2fs", self.interval)
+            self._failing = True
+            return []
+        finally:
+            self._lock.release()
+        if self._failing:
+            logger.info("cache_versions readable again")
+            self._failing = False
+        self.invalidate(stale)
+        return stale
+
+    def invalidate(self, namespaces) -> None:
+        for ns in namespaces:
+            for callback in self._callbacks.get(ns, ()):
+                callback()
+
+
+coherence = Coherence()
+
+
+def init_app(app: Flask) -> None:
+    app.config.setdefault("CACHE_COHERENCE_INTERVAL_MS", 250)
+    coherence.interval = float(app.config["CACHE_COHERENCE_INTERVAL_MS"]) / 1000
+
+    @app.before_request
+    def _sync_cache_versions():
+        coherence.sync()
+
+
+# --- bump inside the writing transaction ---
+
+def _touched_namespaces(session) -> set[str]:
+    touched = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        ns = _MODEL_NAMESPACES.get(type(obj))
+        if ns is None:
+            continue
+        if obj in session.new and ns in _INSERTS_IGNORED:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        touched.add(ns)
+        if ns == "users" and obj not in session.new:
+            touched.add(user_namespace(obj.id))
+    return touched
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_versions(session, flush_context, instances):
+    touch(session, *_touched_namespaces(session))
+
+
+def touch(session, *namespaces: str) -> None:
+    """Bump ``namespaces`` in ``session``'s transaction, for writes that bypass the ORM flush."""
+    if not namespaces:
+        return
+    # fixed order keeps concurrent writers from deadlocking
+    session.execute(_BUMP_SQL, [{"ns": ns} for ns in sorted(set(namespaces))])
+    session.info.setdefault(_PENDING, set()).update(namespaces)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_locally(session):
+    touched = session.info.pop(_PENDING, None)
+    if touched:
+        # this worker drops its caches now; the others follow on their next sync
+        coherence.invalidate(touched)
+        coherence.request_sync()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
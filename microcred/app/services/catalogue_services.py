@@ -0,0 +1,128 @@
+# microcred/app/services/catalogue_services.py
+"""
+Versioned, in-process award catalogue.
+
+The catalogue is a tuple of immutable ``AwardSnapshot``s, ordered the way
+every list view shows it (points desc, name asc), plus id/slug lookups. It is
+rebuilt lazily when the catalogue version moves. The version is bumped
+whenever the "awards" or "icons" cache namespace changes, in this worker or
+(via ``cache_versions``) in any other.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+from ..criteria import split_criteria
+from ..metrics import record_cache
+from ..models import Award
+from ..singleflight import SingleFlight
+from .cache_services import coherence
+
+
+@dataclass(frozen=True, slots=True)
+class AwardSnapshot:
+    id: int
+    slug: str
+    name: str
+    description: str
+    image_filename: str | None
+    points: int
+    criteria: str | None
+    category: str | None = None
+    auto_grant: bool = False
+
+    @property
+    def criteria_text(self) -> str:
+        return split_criteria(self.criteria)[0]
+
+    def image_url(self, base: str | None) -> str | None:
+        if not self.image_filename:
+            return None
+        return f"{base.rstrip('/')}/{self.image_filename}" if base else self.image_filename
+
+    @classmethod
+    def from_model(cls, a: Award) -> "AwardSnapshot":
+        return cls(a.id, a.slug, a.name, a.description, a.image_filename, a.points or 0, a.criteria,
+                   a.category, bool(a.auto_grant))
+
+
+@dataclass(frozen=True, slots=True)
+class Catalogue:
+    version: int
+    awards: tuple[AwardSnapshot, ...]
+    by_id: dict[int, AwardSnapshot]
+    by_slug: dict[str, AwardSnapshot]
+
+    def __iter__(self):
+        return iter(self.awards)
+
+    def __len__(self) -> int:
+        return len(self.awards)
+
+
+class CatalogueCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version = 0
+        self._catalogue: Catalogue | None = None
+        self._stale: Catalogue | None = None
+        self._flight = SingleFlight("award_catalogue")
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self) -> Catalogue:
+        cached = self._catalogue
+        if cached is not None and cached.version == self._version:
+            record_cache("awards", True)
+            return cached
+        record_cache("awards", False)
+        # One thread rebuilds; the others keep serving the previous catalogue meanwhile
+        if self._stale is not None:
+            return self._flight.do("catalogue", self._load, stale=self._stale)
+        return self._flight.do("catalogue", self._load)
+
+    def _load(self) -> Catalogue:
+        # Snapshot the version first: a bump during the load forces a reload next time
+        version = self._version
+        rows = Award.query.order_by(Award.points.desc(), Award.name.asc()).all()
+        awards = tuple(AwardSnapshot.from_model(a) for a in rows)
+        catalogue = Catalogue(version, awards,
+                              {a.id: a for a in awards}, {a.slug: a for a in awards})
+        with self._lock:
+            if version == self._version:
+                self._catalogue = self._stale = catalogue
+        return catalogue
+
+    def bump(self) -> int:
+        with self._lock:
+            self._version += 1
+            self._catalogue = None
+            return self._version
+
+
+catalogue_cache = CatalogueCache()
+
+
+def award_catalogue() -> Catalogue:
+    """The current catalogue; served from memory unless the version moved."""
+    return catalogue_cache.get()
+
+
+def award_snapshot(award_id: int) -> AwardSnapshot | None:
+    """Catalogue entry for ``award_id``, falling back to the DB for brand-new awards."""
+    snap = award_catalogue().by_id.get(award_id)
+    if snap is None:
+        award = Award.query.filter_by(id=award_id).first()
+        snap = AwardSnapshot.from_model(award) if award is not None else None
+    return snap
+
+
+def bump_catalogue_version() -> int:
+    return catalogue_cache.bump()
+
+
+coherence.on_change("awards", bump_catalogue_version)
+coherence.on_change("icons", bump_catalogue_version)
@@ -1,9 +1,123 @@
-from typing import Tuple
-from ..models import User, Award
+# microcred/app/services/criteria_services.py
+"""
+Award eligibility.
+
+Each award's ``criteria`` text is compiled once (see ``microcred.app.criteria``)
+and cached under (award id, hash of the text), so an edited award simply
+misses and compiles again. Facts about users come from two IN (...) queries
+per chunk of users plus the in-process catalogue, so checking one award for
+thousands of users, or every award for one user, is one pass over memory.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import Counter, defaultdict
+from typing import Iterable, Tuple
+
+from sqlalchemy import select
+
+from ..criteria import ALWAYS, CompiledCriteria, CriteriaError, Facts, compile_criteria
+from ..extensions import db
+from ..metrics import record_cache
+from ..models import Achievement, Role
+from ..models.associations import user_roles
+from .catalogue_services import award_catalogue
+
+FACTS_CHUNK = 500  # ids per IN (...); SQLite allows 999 bound parameters by default
+
+
+class CompiledCriteriaCache:
+    def __init__(self, max_entries: int = 4096) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[int, str], CompiledCriteria] = {}
+        self.max_entries = max_entries
+
+    def get(self, award_id: int, text: str | None) -> CompiledCriteria:
+        if not text:
+            return ALWAYS
+        key = (award_id, hashlib.sha1(text.encode("utf-8")).hexdigest())
+        compiled = self._entries.get(key)
+        if compiled is not None:
+            record_cache("criteria", True)
+            return compiled
+        record_cache("criteria", False)
+        try:
+            compiled = compile_criteria(text)
+        except CriteriaError:
+            # Saved before validation existed; never make such an award ungrantable by accident
+            compiled = ALWAYS
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()  # old hashes of edited awards; cheap to rebuild
+            self._entries[key] = compiled
+        return compiled
+
+
+compiled_criteria = CompiledCriteriaCache()
+
+
+def criteria_for(award) -> CompiledCriteria:
+    """Compiled rules of an ``Award`` or ``AwardSnapshot``."""
+    return compiled_criteria.get(award.id, award.criteria)
+
+
+def facts_for_users(user_ids: Iterable[int]) -> dict[int, Facts]:
+    """Facts for many users: per chunk, one query for holdings and one for roles."""
+    ids = list(dict.fromkeys(user_ids))
+    by_id = award_catalogue().by_id
+    held: dict[int, list[int]] = defaultdict(list)
+    roles: dict[int, set[str]] = defaultdict(set)
+    for start in range(0, len(ids), FACTS_CHUNK):
+        chunk = ids[start:start + FACTS_CHUNK]
+        for uid, award_id in db.session.execute(
+                select(Achievement.participant_id, Achievement.award_id)
+                .where(Achievement.participant_id.in_(chunk))):
+            held[uid].append(award_id)
+        for uid, name in db.session.execute(
+                select(user_roles.c.user_id, Role.name)
+                .join(Role, Role.id == user_roles.c.role_id)
+                .where(user_roles.c.user_id.in_(chunk))):
+            roles[uid].add(name)
+    return {uid: facts_from_awards(held.get(uid, ()), roles.get(uid, ()), by_id) for uid in ids}
+
+
+def facts_for(user_id: int, role_names: Iterable[str] | None = None) -> Facts:
+    """Facts for one user; pass ``role_names`` (e.g. from the principal) to skip the roles query."""
+    if role_names is None:
+        return facts_for_users([user_id])[user_id]
+    award_ids = db.session.scalars(select(Achievement.award_id).where(Achievement.participant_id == user_id))
+    return facts_from_awards(award_ids, role_names, award_catalogue().by_id)
+
+
+def facts_from_awards(award_ids: Iterable[int], role_names: Iterable[str], by_id) -> Facts:
+    slugs, points, categories = set(), 0, Counter()
+    for award_id in award_ids:
+        snap = by_id.get(award_id)
+        if snap is None:
+            continue
+        slugs.add(snap.slug)
+        points += snap.points
+        if snap.category:
+            categories[snap.category] += 1
+    return Facts(frozenset(slugs), points, categories, frozenset(role_names))
+
 
 class CriteriaService:
-    def is_eligible(self, user: User, award: Award) -> Tuple[bool, str]:
-        # Simple default: everything is achievable unless award.criteria encodes rules
-        # You can parse a criteria DSL, check points, prior awards, enrolment, etc.
-        # Example rule: disallow if award.points > 100 for non‑admin issuers (placeholder)
-        return True, "OK"
+    def is_eligible(self, user, award) -> Tuple[bool, str]:
+        rules = criteria_for(award)
+        if not rules:
+            return True, "OK"
+        return rules.check(facts_for(user.id, getattr(user, "role_names", None)))
+
+    def eligible_awards(self, facts: Facts, awards: Iterable) -> list:
+        """The awards (models or snapshots) whose criteria ``facts`` meet."""
+        return [a for a in awards if criteria_for(a)(facts)]
+
+    def eligible_users(self, award, user_ids: Iterable[int]) -> dict[int, Tuple[bool, str]]:
+        """Eligibility of many users for one award, with one facts load."""
+        rules = criteria_for(award)
+        ids = list(user_ids)
+        if not rules:
+            return {uid: (True, "OK") for uid in ids}
+        return {uid: rules.check(facts) for uid, facts in facts_for_users(ids).items()}
@@ -1,5 +1,6 @@
 import smtplib, os
 from email.message import EmailMessage
+from ..metrics import EMAIL_QUEUE_DEPTH
 
 class EmailService:
     def __init__(self):
@@ -16,9 +17,14 @@ class EmailService:
         msg["From"] = self.smtp_user or "no-reply@example.com"
         msg["To"] = to_email
         msg.set_content(f"Congrats! You received the '{award_name}' badge.")
-        with smtplib.SMTP(self.smtp_host, self.smtp_port) as s:
-            s.starttls()
-            if self.smtp_user and self.smtp_pass:
-                s.login(self.smtp_user, self.smtp_pass)
-            s.send_message(msg)
+        # sends are synchronous; the gauge tracks messages accepted but not yet delivered
+        EMAIL_QUEUE_DEPTH.inc()
+        try:
+            with smtplib.SMTP(self.smtp_host, self.smtp_port) as s:
+                s.starttls()
+                if self.smtp_user and self.smtp_pass:
+                    s.login(self.smtp_user, self.smtp_pass)
+                s.send_message(msg)
+        finally:
+            EMAIL_QUEUE_DEPTH.dec()
         return True
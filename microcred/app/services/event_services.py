@@ -0,0 +1,132 @@
+# microcred/app/services/event_services.py
+"""
+Achievement change feed.
+
+Every flush that grants, revokes or re-notes an ``Achievement`` appends rows
+to ``achievement_events`` on the same connection, so an event exists exactly
+when its change committed. ``seq`` only grows, and SQLite serialises writers,
+so events become visible in ``seq`` order and a consumer that remembers the
+last ``seq`` it saw never misses one. The same flush fills the webhook outbox.
+
+Retention: ``compact`` drops events that a newer event for the same
+(participant, award) supersedes; ``prune`` drops everything older than the
+retention window. A cursor older than what is left gets a "resync" answer
+from ``changes_since``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from flask import has_request_context
+from flask_login import current_user
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Session, aliased
+
+from ..extensions import db
+from ..models import Achievement, AchievementEvent
+from . import webhook_services
+
+GRANTED = "granted"
+REVOKED = "revoked"
+NOTE_UPDATED = "note_updated"
+
+
+def _actor_id() -> int | None:
+    if has_request_context() and current_user and current_user.is_authenticated:
+        return current_user.id
+    return None
+
+
+def _event_row(kind: str, ach: Achievement, actor_id: int | None, now: datetime) -> dict:
+    return {
+        "kind": kind, "achievement_id": ach.id, "participant_id": ach.participant_id,
+        "award_id": ach.award_id, "actor_id": actor_id, "issued_at": ach.issued_at,
+        "note": ach.note, "occurred_at": now,
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _record_achievement_events(session, flush_context):
+    # after_flush: new rows have their ids, deleted rows still have their values
+    rows = []
+    actor_id, now = None, datetime.utcnow()
+    for obj in session.new:
+        if isinstance(obj, Achievement):
+            rows.append(_event_row(GRANTED, obj, obj.issued_by_id, now))
+    for obj in session.dirty:
+        if isinstance(obj, Achievement) and inspect(obj).attrs.note.history.has_changes():
+            actor_id = actor_id or _actor_id()
+            rows.append(_event_row(NOTE_UPDATED, obj, actor_id, now))
+    for obj in session.deleted:
+        if isinstance(obj, Achievement):
+            actor_id = actor_id or _actor_id()
+            rows.append(_event_row(REVOKED, obj, actor_id, now))
+    if rows:
+        seqs = session.execute(
+            insert(AchievementEvent).returning(AchievementEvent.seq, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        for row, seq in zip(rows, seqs):
+            row["seq"] = seq
+        webhook_services.enqueue(session, rows)
+
+
+# --- reading the feed ---
+
+@dataclass(frozen=True, slots=True)
+class ChangePage:
+    events: list[AchievementEvent]
+    next_cursor: int
+    has_more: bool
+    resync: bool = False  # the cursor predates retained history
+
+
+def latest_cursor() -> int:
+    return db.session.execute(select(func.coalesce(func.max(AchievementEvent.seq), 0))).scalar_one()
+
+
+def changes_since(since: int, limit: int) -> ChangePage:
+    """Up to ``limit`` events after ``since``, oldest first."""
+    events = (AchievementEvent.query
+              .filter(AchievementEvent.seq > since)
+              .order_by(AchievementEvent.seq.asc())
+              .limit(limit + 1)
+              .all())
+    if events and events[0].seq > since + 1:
+        oldest = db.session.execute(select(func.min(AchievementEvent.seq))).scalar_one()
+        if oldest > since + 1:
+            # Events between the cursor and the oldest kept one are gone. That
+            # may only have been compaction, but pruning looks the same from
+            # here, so play safe and have the consumer resync.
+            return ChangePage([], latest_cursor(), False, resync=True)
+    has_more = len(events) > limit
+    events = events[:limit]
+    return ChangePage(events, events[-1].seq if events else since, has_more)
+
+
+# --- retention ---
+
+def compact(older_than: timedelta) -> int:
+    """Delete events older than ``older_than`` that a later event for the same pair supersedes."""
+    newer = aliased(AchievementEvent)
+    superseded = (select(newer.seq)
+                  .where(newer.participant_id == AchievementEvent.participant_id,
+                         newer.award_id == AchievementEvent.award_id,
+                         newer.seq > AchievementEvent.seq)
+                  .exists())
+    cutoff = datetime.utcnow() - older_than
+    result = db.session.execute(
+        delete(AchievementEvent).where(AchievementEvent.occurred_at < cutoff, superseded))
+    db.session.commit()
+    return result.rowcount
+
+
+def prune(keep: timedelta) -> int:
+    """Delete every event older than ``keep``; consumers further behind must resync."""
+    cutoff = datetime.utcnow() - keep
+    # The newest event always stays, so an emptied log can't hide a gap from changes_since
+    newest = select(func.max(AchievementEvent.seq)).scalar_subquery()
+    result = db.session.execute(
+        delete(AchievementEvent).where(AchievementEvent.occurred_at < cutoff, AchievementEvent.seq < newest))
+    db.session.commit()
+    return result.rowcount
@@ -2,8 +2,10 @@
 import os
 from werkzeug.utils import secure_filename
 from flask import current_app
+from sqlalchemy import inspect, text
 from microcred.app.extensions import db
-from microcred.app.models.icons import Icon
+from microcred.app.models.icons import Icon, ICON_SEARCH_DDL
+from microcred.app.services.cache_services import coherence
 
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp", "svg"}
 
@@ -83,3 +85,49 @@ def get_icon_by_name(name: str) -> Icon | None:
 #def get_icon_by_url(url: str) -> Icon | None:
   # normalise: stored url looks like /Icons/<category>/<filename>
   #  return Icon.query.filter(Icon.url == url).first()
+
+
+# --- search ---
+
+TRIGRAM_MIN = 3  # shorter terms have no trigram to look up
+
+def icon_search_available() -> bool:
+    """Whether this database has the icons_fts trigram index (created with the table on SQLite)."""
+    ext = current_app.extensions
+    if "microcred.icon_fts" not in ext:
+        ext["microcred.icon_fts"] = (db.engine.dialect.name == "sqlite"
+                                     and inspect(db.engine).has_table("icons_fts"))
+    return ext["microcred.icon_fts"]
+
+def filter_by_name(query, q: str):
+    """Substring match on Icon.name; goes through the trigram index when it can."""
+    if len(q) >= TRIGRAM_MIN and icon_search_available():
+        matches = text("SELECT rowid FROM icons_fts WHERE icons_fts.name LIKE :icon_q")
+        return query.filter(Icon.id.in_(matches)).params(icon_q=f"%{q}%")
+    return query.filter(Icon.name.ilike(f"%{q}%"))
+
+def rebuild_icon_search() -> None:
+    """Create icons_fts and its triggers if missing and re-index every icon."""
+    for stmt in ICON_SEARCH_DDL:
+        db.session.execute(text(stmt))
+    db.session.execute(text("INSERT INTO icons_fts(icons_fts) VALUES ('rebuild')"))
+    db.session.commit()
+    current_app.extensions.pop("microcred.icon_fts", None)
+
+
+# --- categories (read on every icon page, change only with the icons) ---
+
+_categories: list[str] | None = None
+
+def icon_categories() -> list[str]:
+    global _categories
+    cached = _categories
+    if cached is None:
+        cached = _categories = sorted(c for (c,) in db.session.query(Icon.category).distinct())
+    return cached
+
+def _forget_categories() -> None:
+    global _categories
+    _categories = None
+
+coherence.on_change("icons", _forget_categories)
@@ -0,0 +1,45 @@
+# microcred/app/services/invite_services.py
+"""
+Invite links for users created without a password (roster imports).
+
+The token is signed with SECRET_KEY and carries the user id and a
+fingerprint of the user's current password hash. Setting a password changes
+the hash, so a link works once; it also expires after INVITE_MAX_AGE.
+"""
+from __future__ import annotations
+
+import hashlib
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from ..extensions import db
+from ..models import User
+
+
+def _serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt="invite")
+
+
+def _fingerprint(password_hash: str | None) -> str:
+    return hashlib.sha256((password_hash or "").encode("utf-8")).hexdigest()[:16]
+
+
+def invite_token(user_id: int, password_hash: str | None = None) -> str:
+    return _serializer().dumps([user_id, _fingerprint(password_hash)])
+
+
+def invite_url(token: str) -> str:
+    return f"{current_app.config['PUBLIC_BASE_URL'].rstrip('/')}/auth/invite/{token}"
+
+
+def user_for_invite(token: str) -> User | None:
+    """The invited user, or None if the token is forged, expired or already used."""
+    try:
+        user_id, fingerprint = _serializer().loads(token, max_age=current_app.config["INVITE_MAX_AGE"])
+    except (BadSignature, ValueError, TypeError):
+        return None
+    user = db.session.get(User, user_id)
+    if user is None or _fingerprint(user.password_hash) != fingerprint:
+        return None
+    return user
@@ -0,0 +1,113 @@
+# microcred/app/services/prerequisite_services.py
+"""
+Award prerequisite graph.
+
+Direct edges live in ``award_prerequisites``; ``award_prerequisite_closure``
+holds every (award, ancestor) pair with its distance. Edits go through
+``set_prerequisites``, which refuses cycles (one indexed lookup in the
+closure) and rebuilds the closure in the same transaction. The graph is a
+few hundred edges at most, so a full rebuild is cheaper than being clever.
+
+``achievable_for`` answers the participant's "what next" page with a single
+anti-join: every award, whether it is held, and which ancestors are missing.
+"""
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+from sqlalchemy import and_, delete, exists, insert, select
+
+from ..extensions import db
+from ..models import Achievement, Award
+from ..models.associations import award_prerequisite_closure as closure, award_prerequisites as edges
+from .catalogue_services import AwardSnapshot, award_catalogue
+
+
+class PrerequisiteCycleError(ValueError):
+    """The new prerequisites would make an award (indirectly) require itself."""
+
+
+def set_prerequisites(award: Award, prerequisite_ids) -> None:
+    """Replace ``award``'s direct prerequisites and rebuild the closure (caller commits)."""
+    ids = {int(i) for i in prerequisite_ids}
+    if award.id in ids:
+        raise PrerequisiteCycleError(f"“{award.name}” can't require itself.")
+    if ids:
+        # a cycle appears iff the award is already an ancestor of a new prerequisite
+        looped = db.session.execute(
+            select(closure.c.award_id)
+            .where(closure.c.award_id.in_(ids), closure.c.ancestor_id == award.id)
+            .limit(1)).scalar()
+        if looped is not None:
+            other = db.session.get(Award, looped)
+            raise PrerequisiteCycleError(f"“{other.name}” already requires “{award.name}”.")
+    award.prerequisites = Award.query.filter(Award.id.in_(ids)).all() if ids else []
+    db.session.flush()
+    rebuild_closure()
+
+
+def rebuild_closure() -> int:
+    """Recompute the closure table from the direct edges; returns the row count."""
+    parents: dict[int, list[int]] = defaultdict(list)
+    for award_id, prereq_id in db.session.execute(select(edges.c.award_id, edges.c.prerequisite_id)):
+        parents[award_id].append(prereq_id)
+    rows = []
+    for award_id in parents:
+        # BFS upwards gives the shortest distance to each ancestor
+        seen = {award_id: 0}
+        queue = deque([award_id])
+        while queue:
+            node = queue.popleft()
+            for parent in parents.get(node, ()):
+                if parent not in seen:
+                    seen[parent] = seen[node] + 1
+                    queue.append(parent)
+        rows.extend({"award_id": award_id, "ancestor_id": a, "depth": d}
+                    for a, d in seen.items() if a != award_id)
+    db.session.execute(delete(closure))
+    if rows:
+        db.session.execute(insert(closure), rows)
+    return len(rows)
+
+
+@dataclass(slots=True)
+class Achievable:
+    unlocked: list[AwardSnapshot] = field(default_factory=list)
+    locked: list[tuple[AwardSnapshot, str]] = field(default_factory=list)  # (award, why)
+    held: list[AwardSnapshot] = field(default_factory=list)
+
+
+def achievable_for(user_id: int) -> Achievable:
+    """Held / unlocked / locked (with the missing ancestors, nearest first) in one query."""
+    held = Achievement.__table__.alias("held")
+    owned = Achievement.__table__.alias("owned")
+    stmt = (select(Award.id, held.c.id.isnot(None), closure.c.ancestor_id)
+            .select_from(Award)
+            .outerjoin(held, and_(held.c.award_id == Award.id, held.c.participant_id == user_id))
+            # only for awards not held: their ancestors the user doesn't have (anti-join)
+            .outerjoin(closure, and_(
+                held.c.id.is_(None),
+                closure.c.award_id == Award.id,
+                ~exists().where(owned.c.participant_id == user_id, owned.c.award_id == closure.c.ancestor_id)))
+            .order_by(closure.c.depth))
+    is_held: dict[int, bool] = {}
+    missing: dict[int, list[int]] = defaultdict(list)
+    for award_id, has_it, ancestor_id in db.session.execute(stmt):
+        is_held[award_id] = has_it
+        if ancestor_id is not None:
+            missing[award_id].append(ancestor_id)
+
+    result = Achievable()
+    by_id = award_catalogue().by_id
+    for snap in award_catalogue():  # catalogue order: points desc, name
+        if snap.id not in is_held:
+            continue  # created after the catalogue was built
+        if is_held[snap.id]:
+            result.held.append(snap)
+        elif missing.get(snap.id):
+            names = [by_id[a].name for a in missing[snap.id] if a in by_id]
+            result.locked.append((snap, "Missing " + ", ".join(names)))
+        else:
+            result.unlocked.append(snap)
+    return result
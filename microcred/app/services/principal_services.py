@@ -0,0 +1,157 @@
+# microcred/app/services/principal_services.py
+"""
+Cached authenticated principal.
+
+``load_user`` returns a lightweight, immutable ``Principal`` (id, email,
+name, frozenset of role names) instead of an ORM ``User``. Principals are
+cached per process, keyed by user id and a version stamp, and also carried in
+the signed session cookie so most requests authenticate without touching the
+database. The stamp is derived from the user's own ``users:<id>`` namespace
+and the shared "roles" one, so it means the same thing in every worker; a
+committed change to that user (or to any role) moves it and drops both
+copies on the next request, while everybody else's principals stay put.
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+from flask import current_app, g, has_app_context, session
+from flask_login import UserMixin
+
+from ..extensions import db
+from ..metrics import record_cache
+from .cache_services import coherence, user_namespace
+
+SESSION_KEY = "_principal"
+
+
+class Principal(UserMixin):
+    """What a request needs to know about the logged-in user."""
+
+    def __init__(self, id: int, email: str, first_name: str | None, last_name: str | None,
+                 role_names: frozenset[str], version: int) -> None:
+        self.id = id
+        self.email = email
+        self.first_name = first_name
+        self.last_name = last_name
+        self.role_names = role_names
+        self.version = version
+
+    @property
+    def full_name(self) -> str:
+        first = (self.first_name or "").strip()
+        last = (self.last_name or "").strip()
+        return " ".join(p for p in (first, last) if p)
+
+    def has_role(self, *role_names: str) -> bool:
+        return not self.role_names.isdisjoint(role_names)
+
+    # --- session round-trip ---
+
+    def to_session(self) -> dict:
+        return {"id": self.id, "email": self.email, "first_name": self.first_name,
+                "last_name": self.last_name, "roles": sorted(self.role_names),
+                "v": self.version, "ts": int(time.time())}
+
+    @classmethod
+    def from_session(cls, data: dict) -> "Principal":
+        return cls(data["id"], data["email"], data.get("first_name"), data.get("last_name"),
+                   frozenset(data.get("roles", ())), data["v"])
+
+    # --- ORM fallback ---
+
+    def orm_user(self):
+        """The full ``User`` row, loaded at most once per request."""
+        from ..models import User
+        if not has_app_context():
+            return None
+        key = f"_principal_user_{self.id}"
+        if key not in g:
+            setattr(g, key, db.session.get(User, self.id))
+        return g.get(key)
+
+    def __getattr__(self, name: str):
+        # Relationships and helpers the principal doesn't carry (e.g. achievements)
+        if name.startswith("__"):
+            raise AttributeError(name)
+        user = self.orm_user()
+        if user is None:
+            raise AttributeError(name)
+        return getattr(user, name)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<Principal {self.email} roles={sorted(self.role_names)} v{self.version}>"
+
+
+class PrincipalCache:
+    """Process-local principal cache keyed by user id + version stamp."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._principals: dict[int, Principal] = {}
+
+    def version(self, user_id: int) -> int:
+        # both components only ever grow, so their sum does too
+        return coherence.version(user_namespace(user_id)) + coherence.version("roles")
+
+    def get(self, user_id: int) -> Principal | None:
+        version = self.version(user_id)
+        cached = self._principals.get(user_id)
+        if cached is not None and cached.version == version:
+            record_cache("principal", True)
+            return cached
+        record_cache("principal", False)
+        principal = self._load(user_id, version)
+        if principal is not None:
+            with self._lock:
+                self._principals[user_id] = principal
+        return principal
+
+    @staticmethod
+    def _load(user_id: int, version: int) -> Principal | None:
+        from ..models import User
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        return Principal(user.id, user.email, user.first_name, user.last_name,
+                         frozenset(r.name for r in user.roles), version)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._principals.pop(user_id, None)
+        coherence.request_sync()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._principals.clear()
+
+
+principals = PrincipalCache()
+
+
+def load_principal(user_id: int) -> Principal | None:
+    """Session copy if still current, else the process cache, else the DB."""
+    data = session.get(SESSION_KEY)
+    ttl = current_app.config.get("PRINCIPAL_SESSION_TTL", 300)
+    if (data and data.get("id") == user_id and data.get("v") == principals.version(user_id)
+            and time.time() - data.get("ts", 0) < ttl):
+        record_cache("principal_session", True)
+        return Principal.from_session(data)
+    record_cache("principal_session", False)
+
+    principal = principals.get(user_id)
+    if principal is None:
+        session.pop(SESSION_KEY, None)
+    else:
+        session[SESSION_KEY] = principal.to_session()
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop this worker's copy now; other workers follow via cache_versions."""
+    principals.invalidate(user_id)
+
+
+def forget_principal() -> None:
+    session.pop(SESSION_KEY, None)
@@ -0,0 +1,99 @@
+# microcred/app/services/role_services.py
+"""
+Role registry and bulk role assignment.
+
+Roles are a handful of rows that almost never change, yet registration and
+every save in the user editor used to query them. ``role_registry`` keeps
+them per process as detached ``Role`` objects, reloaded after the "roles"
+namespace moves; ``attached`` hands them to a session with
+``merge(load=False)``, which doesn't query either.
+
+``add_role`` and ``remove_role`` change a role for any number of users in
+one statement against ``user_roles``. That bypasses the ORM flush, so they
+bump the ``users:<id>`` namespace of each user they changed themselves (as
+editing ``User.roles`` would), and every worker reloads just those
+principals.
+"""
+from __future__ import annotations
+
+import threading
+
+from sqlalchemy import Select, delete, exists, insert, literal, select
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..metrics import record_cache
+from ..models import Role, User
+from ..models.associations import user_roles
+from .cache_services import coherence, touch, user_namespace
+
+
+class RoleRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version = 0
+        self._roles: dict[str, Role] | None = None
+
+    def get(self) -> dict[str, Role]:
+        roles = self._roles
+        if roles is not None:
+            record_cache("roles", True)
+            return roles
+        record_cache("roles", False)
+        version = self._version
+        # a session of its own: closing it detaches the rows without touching the request's session
+        with Session(db.engine) as session:
+            loaded = {r.name: r for r in session.scalars(select(Role).order_by(Role.name))}
+        with self._lock:
+            if version == self._version:
+                self._roles = loaded
+        return loaded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._roles = None
+
+
+role_registry = RoleRegistry()
+coherence.on_change("roles", role_registry.clear)
+
+
+def role_names() -> list[str]:
+    return list(role_registry.get())
+
+
+def attached(*names: str) -> list[Role]:
+    """The named roles (unknown names skipped) as instances of the current session."""
+    roles = role_registry.get()
+    return [db.session.merge(roles[n], load=False) for n in names if n in roles]
+
+
+def user_ids_matching(q: str) -> Select:
+    """Ids of the users the admin search for ``q`` lists."""
+    like = f"%{q}%"
+    return select(User.id).where(db.or_(User.email.ilike(like), User.first_name.ilike(like),
+                                        User.last_name.ilike(like)))
+
+
+def add_role(name: str, users: Select) -> int:
+    """Give role ``name`` to every user id ``users`` selects; returns how many didn't have it. The caller commits."""
+    role_id = role_registry.get()[name].id
+    users = users.subquery()
+    added = db.session.scalars(insert(user_roles).from_select(
+        ["user_id", "role_id"],
+        select(users.c.id, literal(role_id)).where(~exists().where(user_roles.c.user_id == users.c.id,
+                                                                   user_roles.c.role_id == role_id)))
+        .returning(user_roles.c.user_id)).all()
+    touch(db.session, *map(user_namespace, added))
+    return len(added)
+
+
+def remove_role(name: str, users: Select) -> int:
+    """Take role ``name`` from every user id ``users`` selects; returns how many had it. The caller commits."""
+    role_id = role_registry.get()[name].id
+    removed = db.session.scalars(delete(user_roles).where(user_roles.c.role_id == role_id,
+                                                          user_roles.c.user_id.in_(users))
+                                 .returning(user_roles.c.user_id)).all()
+    touch(db.session, *map(user_namespace, removed))
+    return len(removed)
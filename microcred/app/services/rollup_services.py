@@ -0,0 +1,253 @@
+# microcred/app/services/rollup_services.py
+"""
+Dashboard rollups.
+
+The admin dashboard reads small tables instead of counting achievements:
+issuance and distinct earners per day and per week, holders per award,
+grants per issuer, and a few totals (see ``models/rollup.py``). They describe
+the achievements that exist now. A revocation takes its achievement back out
+of the day, week, award and issuer it was counted under, so ``rebuild`` from
+the achievements table always lands on the same numbers.
+
+The flush that grants or revokes also applies the deltas (``after_flush``,
+like the change feed), so the counts commit or roll back with the change.
+Whether a participant starts or stops being an earner on a day or in a week
+depends on their other achievements; one indexed query per flush reads them
+for every participant the flush touches.
+"""
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+from sqlalchemy import Date, bindparam, delete, event, func, select, text
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import (Achievement, AwardIssuance, DailyIssuance, IssuerIssuance, RollupTotal, User,
+                      WeeklyIssuance)
+from .catalogue_services import AwardSnapshot, award_catalogue
+
+NO_ISSUER = 0  # rollup_issuers key for grants without an issuer (automatic ones)
+_CHUNK = 500
+
+
+def day_of(ts: datetime) -> date:
+    return ts.date()
+
+
+def week_of(ts: datetime) -> date:
+    d = ts.date()
+    return d - timedelta(days=d.weekday())
+
+
+def _upsert(table: str, key: str, columns: tuple[str, ...], key_type=None):
+    sets = ", ".join(f"{c} = {table}.{c} + excluded.{c}" for c in columns)
+    stmt = text(f"INSERT INTO {table} ({key}, {', '.join(columns)}) "
+                f"VALUES (:key, {', '.join(':' + c for c in columns)}) "
+                f"ON CONFLICT ({key}) DO UPDATE SET {sets}")
+    return stmt.bindparams(bindparam("key", type_=key_type)) if key_type is not None else stmt
+
+
+_UPSERT_DAILY = _upsert("rollup_daily", "day", ("issued", "earners"), Date())
+_UPSERT_WEEKLY = _upsert("rollup_weekly", "week", ("issued", "earners"), Date())
+_UPSERT_AWARD = _upsert("rollup_awards", "award_id", ("holders",))
+_UPSERT_ISSUER = _upsert("rollup_issuers", "issuer_id", ("issued",))
+_UPSERT_TOTAL = _upsert("rollup_totals", "name", ("value",))
+
+
+@dataclass
+class Rollups:
+    """Counts per rollup row: the deltas of one flush, or the full set from ``compute``."""
+    daily: defaultdict = field(default_factory=lambda: defaultdict(lambda: [0, 0]))   # day -> [issued, earners]
+    weekly: defaultdict = field(default_factory=lambda: defaultdict(lambda: [0, 0]))  # week -> [issued, earners]
+    awards: Counter = field(default_factory=Counter)
+    issuers: Counter = field(default_factory=Counter)
+    totals: Counter = field(default_factory=Counter)
+
+    def count(self, award_id: int, issuer_id: int | None, issued_at: datetime, n: int) -> None:
+        self.daily[day_of(issued_at)][0] += n
+        self.weekly[week_of(issued_at)][0] += n
+        self.awards[award_id] += n
+        self.issuers[issuer_id or NO_ISSUER] += n
+        self.totals["achievements"] += n
+
+    def as_rows(self) -> dict[str, dict]:
+        """Non-zero rows, keyed per table, in a shape ``check`` can compare."""
+        return {
+            "rollup_daily": {k: tuple(v) for k, v in self.daily.items() if any(v)},
+            "rollup_weekly": {k: tuple(v) for k, v in self.weekly.items() if any(v)},
+            "rollup_awards": {k: v for k, v in self.awards.items() if v},
+            "rollup_issuers": {k: v for k, v in self.issuers.items() if v},
+            "rollup_totals": {k: v for k, v in self.totals.items() if v},
+        }
+
+    def write(self, session) -> None:
+        params = [
+            (_UPSERT_DAILY, [{"key": k, "issued": i, "earners": e} for k, (i, e) in self.daily.items() if i or e]),
+            (_UPSERT_WEEKLY, [{"key": k, "issued": i, "earners": e} for k, (i, e) in self.weekly.items() if i or e]),
+            (_UPSERT_AWARD, [{"key": k, "holders": v} for k, v in self.awards.items() if v]),
+            (_UPSERT_ISSUER, [{"key": k, "issued": v} for k, v in self.issuers.items() if v]),
+            (_UPSERT_TOTAL, [{"key": k, "value": v} for k, v in self.totals.items() if v]),
+        ]
+        for stmt, rows in params:
+            if rows:
+                session.execute(stmt, rows)
+
+
+def _became(before: int, after: int) -> int:
+    """+1 when a count leaves zero, -1 when it reaches zero."""
+    return (after > 0) - (before > 0)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_rollups(session, flush_context):
+    granted = [obj for obj in session.new if isinstance(obj, Achievement)]
+    revoked = [obj for obj in session.deleted if isinstance(obj, Achievement)]
+    new_users = sum(1 for obj in session.new if isinstance(obj, User))
+    if not (granted or revoked or new_users):
+        return
+    deltas = Rollups()
+    deltas.totals["users"] += new_users
+    changed: dict[int, list[tuple[datetime, int]]] = defaultdict(list)
+    for objs, n in ((granted, 1), (revoked, -1)):
+        for ach in objs:
+            deltas.count(ach.award_id, ach.issued_by_id, ach.issued_at, n)
+            changed[ach.participant_id].append((ach.issued_at, n))
+
+    # What each touched participant holds now (after this flush), by day and week
+    held: dict[int, list[datetime]] = defaultdict(list)
+    ids = list(changed)
+    for i in range(0, len(ids), _CHUNK):
+        for pid, issued_at in session.execute(
+                select(Achievement.participant_id, Achievement.issued_at)
+                .where(Achievement.participant_id.in_(ids[i:i + _CHUNK]))):
+            held[pid].append(issued_at)
+    for pid, changes in changed.items():
+        now = held.get(pid, ())
+        deltas.totals["participants"] += _became(len(now) - sum(n for _, n in changes), len(now))
+        for period, rows in ((day_of, deltas.daily), (week_of, deltas.weekly)):
+            after = Counter(period(ts) for ts in now)
+            moved = Counter()
+            for ts, n in changes:
+                moved[period(ts)] += n
+            for key, n in moved.items():
+                rows[key][1] += _became(after[key] - n, after[key])
+    deltas.write(session)
+
+
+def add_users(n: int) -> None:
+    """For bulk inserts into users that bypass the ORM flush (and so ``_apply_rollups``)."""
+    if n:
+        db.session.execute(_UPSERT_TOTAL, {"key": "users", "value": n})
+
+
+def compute(chunk_size: int = 5000) -> Rollups:
+    """All rollups from scratch: one pass over the achievements, grouped by participant."""
+    out = Rollups()
+    rows = db.session.execute(
+        select(Achievement.participant_id, Achievement.award_id, Achievement.issued_by_id, Achievement.issued_at)
+        .order_by(Achievement.participant_id)
+        .execution_options(yield_per=chunk_size))
+    for _, achievements in groupby(rows, key=lambda r: r[0]):
+        days, weeks = set(), set()
+        for _, award_id, issuer_id, issued_at in achievements:
+            out.count(award_id, issuer_id, issued_at, 1)
+            days.add(day_of(issued_at))
+            weeks.add(week_of(issued_at))
+        for d in days:
+            out.daily[d][1] += 1
+        for w in weeks:
+            out.weekly[w][1] += 1
+        out.totals["participants"] += 1
+    out.totals["users"] = db.session.execute(select(func.count(User.id))).scalar_one()
+    return out
+
+
+_MODELS = (DailyIssuance, WeeklyIssuance, AwardIssuance, IssuerIssuance, RollupTotal)
+
+
+def rebuild(chunk_size: int = 5000) -> Rollups:
+    """Replace every rollup row with freshly computed counts."""
+    fresh = compute(chunk_size)
+    for model in _MODELS:
+        db.session.execute(delete(model))
+    fresh.write(db.session)
+    db.session.commit()
+    return fresh
+
+
+def stored() -> Rollups:
+    """The rollup tables as they are now."""
+    out = Rollups()
+    for day, issued, earners in db.session.execute(select(DailyIssuance.day, DailyIssuance.issued,
+                                                          DailyIssuance.earners)):
+        out.daily[day] = [issued, earners]
+    for week, issued, earners in db.session.execute(select(WeeklyIssuance.week, WeeklyIssuance.issued,
+                                                           WeeklyIssuance.earners)):
+        out.weekly[week] = [issued, earners]
+    out.awards.update(dict(db.session.execute(select(AwardIssuance.award_id, AwardIssuance.holders)).all()))
+    out.issuers.update(dict(db.session.execute(select(IssuerIssuance.issuer_id, IssuerIssuance.issued)).all()))
+    out.totals.update(dict(db.session.execute(select(RollupTotal.name, RollupTotal.value)).all()))
+    return out
+
+
+# --- reading, for the dashboard ---
+
+@dataclass(frozen=True, slots=True)
+class Dashboard:
+    users: int
+    awards: int
+    achievements: int
+    participants: int
+    days: list[tuple[date, int, int]]    # (day, issued, earners), oldest first, gaps filled with 0
+    weeks: list[tuple[date, int, int]]   # (monday, issued, earners)
+    top_awards: list[tuple[AwardSnapshot, int]]
+    top_issuers: list[tuple[str, int]]
+
+
+def _series(model, key_col, start: date, step: timedelta, n: int) -> list[tuple[date, int, int]]:
+    found = {k: (issued, earners) for k, issued, earners in db.session.execute(
+        select(key_col, model.issued, model.earners).where(key_col >= start))}
+    return [(start + step * i, *found.get(start + step * i, (0, 0))) for i in range(n)]
+
+
+def dashboard(days: int = 30, weeks: int = 26, top: int = 8, today: date | None = None) -> Dashboard:
+    """Everything the admin dashboard shows; reads only the rollup tables (and the catalogue)."""
+    today = today or datetime.utcnow().date()
+    totals = dict(db.session.execute(select(RollupTotal.name, RollupTotal.value)).all())
+    catalogue = award_catalogue()
+
+    top_awards = []
+    for award_id, holders in db.session.execute(
+            select(AwardIssuance.award_id, AwardIssuance.holders)
+            .where(AwardIssuance.holders > 0)
+            .order_by(AwardIssuance.holders.desc()).limit(top)):
+        snap = catalogue.by_id.get(award_id)
+        if snap is not None:
+            top_awards.append((snap, holders))
+
+    issuers = db.session.execute(
+        select(IssuerIssuance.issuer_id, IssuerIssuance.issued)
+        .where(IssuerIssuance.issued > 0)
+        .order_by(IssuerIssuance.issued.desc()).limit(top)).all()
+    names = {uid: " ".join(p for p in ((first or "").strip(), (last or "").strip()) if p) or email
+             for uid, first, last, email in db.session.execute(
+                 select(User.id, User.first_name, User.last_name, User.email)
+                 .where(User.id.in_([i for i, _ in issuers if i != NO_ISSUER])))}
+    top_issuers = [("Automatic" if i == NO_ISSUER else names.get(i, f"User #{i}"), n) for i, n in issuers]
+
+    this_week = today - timedelta(days=today.weekday())
+    return Dashboard(
+        users=totals.get("users", 0),
+        awards=len(catalogue),
+        achievements=totals.get("achievements", 0),
+        participants=totals.get("participants", 0),
+        days=_series(DailyIssuance, DailyIssuance.day, today - timedelta(days=days - 1), timedelta(days=1), days),
+        weeks=_series(WeeklyIssuance, WeeklyIssuance.week, this_week - timedelta(weeks=weeks - 1),
+                      timedelta(weeks=1), weeks),
+        top_awards=top_awards,
+        top_issuers=top_issuers,
+    )
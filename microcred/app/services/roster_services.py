@@ -0,0 +1,129 @@
+# microcred/app/services/roster_services.py
+"""
+Bulk user import from a roster CSV.
+
+``read_roster`` validates and normalises every row (emails are lower-cased,
+like registration and login do) and drops duplicates, both within the file
+and against ``users.email``, before anything is written. ``insert_users``
+then writes one batch: a multi-row INSERT into ``users`` and a single
+INSERT ... SELECT into ``user_roles`` for the whole batch.
+
+Password hashing is what makes a roster slow (werkzeug's hash is
+deliberately expensive), so callers hash in a process pool and hand the
+results in; rows without a password get an invite instead. Invites are
+written after their batch commits, so ``Roster.passwordless`` lists the
+existing users a rerun may still have to invite.
+"""
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass, field
+from typing import IO
+
+from email_validator import EmailNotValidError, validate_email
+from sqlalchemy import insert, select, true
+
+from ..extensions import db
+from ..models import Role, User
+from ..models.associations import user_roles
+from .rollup_services import add_users
+
+_CHUNK = 500
+NAME_MAX = 64  # users.first_name / last_name
+EMAIL_MAX = 255
+
+
+class RosterError(ValueError):
+    """The file can't be imported at all (as opposed to individual bad rows)."""
+
+
+@dataclass(slots=True)
+class RosterRow:
+    line: int
+    email: str
+    first_name: str
+    last_name: str
+    password: str | None
+
+
+@dataclass
+class Roster:
+    rows: list[RosterRow] = field(default_factory=list)     # to create
+    invalid: list[tuple[int, str]] = field(default_factory=list)  # (line, reason)
+    duplicates: int = 0   # repeated within the file; the first one wins
+    existing: int = 0     # already in users
+    # already in users, still without a password, and no password in the file either:
+    # (row, user id) pairs that may still need an invite
+    passwordless: list[tuple[RosterRow, int]] = field(default_factory=list)
+
+
+def _clean(row: dict, key: str) -> str:
+    return (row.get(key) or "").strip()
+
+
+def read_roster(stream: IO[str]) -> Roster:
+    """
+    Parse a CSV with an ``email`` column and optional ``first_name``,
+    ``last_name`` and ``password`` columns (header names are case-insensitive).
+    """
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None:
+        raise RosterError("The roster is empty")
+    reader.fieldnames = [(name or "").strip().lower() for name in reader.fieldnames]
+    if "email" not in reader.fieldnames:
+        raise RosterError("The roster needs an 'email' column")
+
+    roster = Roster()
+    seen: set[str] = set()
+    for row in reader:
+        line = reader.line_num
+        try:
+            email = validate_email(_clean(row, "email"), check_deliverability=False).normalized.lower()
+        except EmailNotValidError as exc:
+            roster.invalid.append((line, f"{_clean(row, 'email') or '(blank)'}: {exc}"))
+            continue
+        first, last = _clean(row, "first_name"), _clean(row, "last_name")
+        if len(email) > EMAIL_MAX or len(first) > NAME_MAX or len(last) > NAME_MAX:
+            roster.invalid.append((line, f"{email}: longer than the users table allows"))
+            continue
+        if email in seen:
+            roster.duplicates += 1
+            continue
+        seen.add(email)
+        roster.rows.append(RosterRow(line, email, first, last, _clean(row, "password") or None))
+
+    taken: dict[str, tuple[int, bool]] = {}  # email -> (id, has no password)
+    emails = [r.email for r in roster.rows]
+    for i in range(0, len(emails), _CHUNK):
+        taken.update((email, (uid, no_password)) for email, uid, no_password in db.session.execute(
+            select(User.email, User.id, User.password_hash.is_(None)).where(User.email.in_(emails[i:i + _CHUNK]))))
+    if taken:
+        roster.existing = len(taken)
+        roster.passwordless = [(r, taken[r.email][0]) for r in roster.rows
+                               if r.email in taken and taken[r.email][1] and r.password is None]
+        roster.rows = [r for r in roster.rows if r.email not in taken]
+    return roster
+
+
+def role_ids(names: tuple[str, ...]) -> list[int]:
+    found = dict(db.session.execute(select(Role.name, Role.id).where(Role.name.in_(names))).all())
+    missing = sorted(set(names) - found.keys())
+    if missing:
+        raise RosterError(f"No such role(s): {', '.join(missing)}")
+    return list(found.values())
+
+
+def insert_users(rows: list[RosterRow], password_hashes: list[str | None], roles: list[int]) -> dict[str, int]:
+    """Create one batch of users with the given roles; returns email -> new id. The caller commits."""
+    ids = dict(db.session.execute(
+        insert(User).returning(User.email, User.id),
+        [{"email": r.email, "first_name": r.first_name or None, "last_name": r.last_name or None,
+          "password_hash": h} for r, h in zip(rows, password_hashes)]).all())
+    if roles:
+        db.session.execute(insert(user_roles).from_select(
+            ["user_id", "role_id"],
+            select(User.id, Role.id).join(Role, true())  # every new user x every role
+            .where(User.id.in_(ids.values()), Role.id.in_(roles))))
+    # a Core insert doesn't pass through the ORM flush the rollups listen to
+    add_users(len(ids))
+    return ids
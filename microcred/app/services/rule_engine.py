@@ -0,0 +1,190 @@
+# microcred/app/services/rule_engine.py
+"""
+Automatic awards.
+
+Awards flagged ``auto_grant`` are granted as soon as their criteria hold.
+After a grant, ``RuleEngine.on_granted`` looks only at the auto awards whose
+rules depend on the award just gained (``has()`` it, count its category, or
+use points/award totals), re-checks them against the participant's facts
+and keeps going through whatever those grants unlock in turn. The dependency
+index is rebuilt when the catalogue changes.
+
+``backfill`` does the full recompute for everyone (after adding or editing
+rules), spreading chunks of users over a process pool; only the parent
+process writes.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Iterable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from ..criteria import CompiledCriteria, Facts
+from ..extensions import db
+from ..models import Achievement, User
+from ..process_pool import app_pool, worker_app
+from .catalogue_services import AwardSnapshot, Catalogue, award_catalogue
+from .criteria_services import criteria_for, facts_for, facts_for_users
+
+logger = logging.getLogger("microcred.rules")
+
+AUTO_NOTE = "Granted automatically"
+# Below this many users, spawning workers (each builds its own app) costs more than it saves
+POOL_MIN_USERS = 20_000
+
+
+class RuleIndex:
+    """Auto awards of one catalogue, indexed by what their rules depend on."""
+
+    def __init__(self, catalogue: Catalogue) -> None:
+        self.catalogue = catalogue
+        self.rules: list[tuple[AwardSnapshot, CompiledCriteria]] = []
+        self._by_slug: dict[str, list[int]] = defaultdict(list)
+        self._by_category: dict[str, list[int]] = defaultdict(list)
+        self._aggregate: list[int] = []
+        for snap in catalogue:
+            rules = criteria_for(snap)
+            if not (snap.auto_grant and rules):
+                continue  # auto awards without rules would go to everyone
+            i = len(self.rules)
+            self.rules.append((snap, rules))
+            for slug in rules.slugs:
+                self._by_slug[slug].append(i)
+            for category in rules.categories:
+                self._by_category[category].append(i)
+            if rules.aggregate:
+                self._aggregate.append(i)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def dependents(self, snap: AwardSnapshot) -> Iterator[tuple[AwardSnapshot, CompiledCriteria]]:
+        hits = set(self._by_slug.get(snap.slug, ()))
+        hits.update(self._aggregate)
+        if snap.category:
+            hits.update(self._by_category.get(snap.category, ()))
+        for i in sorted(hits):
+            yield self.rules[i]
+
+
+class RuleEngine:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._index: RuleIndex | None = None
+
+    def index(self) -> RuleIndex:
+        catalogue = award_catalogue()
+        index = self._index
+        if index is None or index.catalogue is not catalogue:
+            index = RuleIndex(catalogue)
+            with self._lock:
+                self._index = index
+        return index
+
+    # --- pure evaluation ---
+
+    def cascade(self, facts: Facts, gained: Iterable[AwardSnapshot]) -> list[AwardSnapshot]:
+        """Auto awards unlocked, directly or transitively, by gaining ``gained``."""
+        index = self.index()
+        if not index:
+            return []
+        granted = []
+        work = deque(gained)
+        while work:
+            for snap, rules in index.dependents(work.popleft()):
+                if snap.slug in facts.held or not rules(facts):
+                    continue
+                facts = facts.plus(snap.slug, snap.points, snap.category)
+                granted.append(snap)
+                work.append(snap)
+        return granted
+
+    def closure(self, facts: Facts) -> list[AwardSnapshot]:
+        """Every auto award ``facts`` qualify for, including ones unlocked by those."""
+        index = self.index()
+        granted = []
+        changed = True
+        while changed:
+            changed = False
+            for snap, rules in index.rules:
+                if snap.slug not in facts.held and rules(facts):
+                    facts = facts.plus(snap.slug, snap.points, snap.category)
+                    granted.append(snap)
+                    changed = True
+        return granted
+
+    # --- reacting to grants ---
+
+    def on_granted(self, participant_id: int, award_ids: Iterable[int]) -> list[AwardSnapshot]:
+        """Grant (and commit) whatever the new awards unlock for this participant."""
+        if not self.index():
+            return []
+        by_id = award_catalogue().by_id
+        gained = [by_id[a] for a in award_ids if a in by_id]
+        unlocked = self.cascade(facts_for(participant_id), gained)
+        if unlocked:
+            db.session.add_all(Achievement(participant_id=participant_id, award_id=snap.id, note=AUTO_NOTE)
+                               for snap in unlocked)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # granted concurrently by someone else; the next grant will re-check
+                db.session.rollback()
+                return []
+            logger.info("auto-granted %s to user %s", [s.slug for s in unlocked], participant_id)
+        return unlocked
+
+
+rule_engine = RuleEngine()
+
+
+# --- full recompute ---
+
+def _evaluate_chunk(user_ids: list[int]) -> list[tuple[int, int]]:
+    with worker_app().app_context():
+        return [(uid, snap.id) for uid, facts in facts_for_users(user_ids).items()
+                for snap in rule_engine.closure(facts)]
+
+
+def _save_grants(pairs: list[tuple[int, int]]) -> int:
+    if not pairs:
+        return 0
+    db.session.add_all(Achievement(participant_id=u, award_id=a, note=AUTO_NOTE) for u, a in pairs)
+    try:
+        db.session.commit()
+        return len(pairs)
+    except IntegrityError:
+        db.session.rollback()
+    saved = 0  # someone granted one of these meanwhile; fall back to one at a time
+    for u, a in pairs:
+        db.session.add(Achievement(participant_id=u, award_id=a, note=AUTO_NOTE))
+        try:
+            db.session.commit()
+            saved += 1
+        except IntegrityError:
+            db.session.rollback()
+    return saved
+
+
+def backfill(*, workers: int = 1, chunk_size: int = 500, env_name: str | None = None,
+             dry_run: bool = False) -> tuple[int, int]:
+    """Grant every auto award anyone qualifies for; returns (users checked, grants)."""
+    if not rule_engine.index():
+        return 0, 0
+    user_ids = db.session.scalars(select(User.id).order_by(User.id)).all()
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+    if workers > 1 and len(chunks) > 1 and len(user_ids) >= POOL_MIN_USERS:
+        with app_pool(workers, env_name) as pool:
+            results = pool.map(_evaluate_chunk, chunks)
+            granted = sum(len(r) if dry_run else _save_grants(r) for r in results)
+    else:
+        granted = 0
+        for chunk in chunks:
+            pairs = [(uid, snap.id) for uid, facts in facts_for_users(chunk).items()
+                     for snap in rule_engine.closure(facts)]
+            granted += len(pairs) if dry_run else _save_grants(pairs)
+    return len(user_ids), granted
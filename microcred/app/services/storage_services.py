@@ -4,6 +4,7 @@ from pathlib import Path
 from werkzeug.utils import secure_filename
 from flask import current_app
 from PIL import Image
+from ..metrics import IMAGE_PROCESSING
 
 ALLOWED_EXTS = {"png", "jpg", "jpeg", "webp"}
 MAX_SIZE = (256, 256)  # resize bounding box
@@ -34,9 +35,10 @@ def save_award_icon(file_storage, slug: str, *, max_size: tuple[int, int] = MAX_
     awards_dir = ensure_awards_dir()
     dest = awards_dir / filename
 
-    img = Image.open(file_storage.stream).convert("RGBA")
-    img.thumbnail(max_size, Image.LANCZOS)
-    img.save(dest, format="PNG", optimize=True)
+    with IMAGE_PROCESSING.time(operation="award_icon"):
+        img = Image.open(file_storage.stream).convert("RGBA")
+        img.thumbnail(max_size, Image.LANCZOS)
+        img.save(dest, format="PNG", optimize=True)
     return filename
 
 
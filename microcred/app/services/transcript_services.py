@@ -0,0 +1,184 @@
+# microcred/app/services/transcript_services.py
+"""
+Participant transcripts: every award a participant holds, with its points,
+as CSV or PDF.
+
+``load_transcripts`` reads a batch of participants in two queries (users,
+then their achievements) and takes award names and points from the
+catalogue. The renderers are pure functions of a ``Transcript``, so they run
+equally well in a request or in a process pool worker.
+
+The PDF writer is deliberately small: text only, in the standard Helvetica
+fonts every reader ships with (nothing to embed), one compressed content
+stream per page. A transcript renders in well under a millisecond.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import Achievement, User
+from .catalogue_services import award_catalogue
+
+FORMATS = ("pdf", "csv")
+CSV_HEADER = ("award", "award_name", "category", "points", "issued_at")
+
+
+@dataclass(frozen=True, slots=True)
+class TranscriptLine:
+    slug: str
+    name: str
+    category: str | None
+    points: int
+    issued_at: datetime
+
+
+@dataclass(slots=True)
+class Transcript:
+    participant_id: int
+    name: str
+    email: str
+    lines: list[TranscriptLine] = field(default_factory=list)  # oldest first
+
+    @property
+    def points(self) -> int:
+        return sum(line.points for line in self.lines)
+
+
+def load_transcripts(participant_ids: list[int]) -> list[Transcript]:
+    """Transcripts for these participants, in the given order; unknown ids are skipped."""
+    by_id = award_catalogue().by_id
+    found = {
+        uid: Transcript(uid, " ".join(p for p in ((first or "").strip(), (last or "").strip()) if p) or email,
+                        email)
+        for uid, first, last, email in db.session.execute(
+            select(User.id, User.first_name, User.last_name, User.email).where(User.id.in_(participant_ids)))
+    }
+    for pid, award_id, issued_at in db.session.execute(
+            select(Achievement.participant_id, Achievement.award_id, Achievement.issued_at)
+            .where(Achievement.participant_id.in_(participant_ids))
+            .order_by(Achievement.participant_id, Achievement.issued_at)):
+        award = by_id.get(award_id)
+        transcript = found.get(pid)
+        if award is None or transcript is None:
+            continue
+        transcript.lines.append(TranscriptLine(award.slug, award.name, award.category, award.points, issued_at))
+    return [found[pid] for pid in participant_ids if pid in found]
+
+
+# --- CSV ---
+
+def render_csv(transcript: Transcript) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(CSV_HEADER)
+    for line in transcript.lines:
+        writer.writerow((line.slug, line.name, line.category or "", line.points, line.issued_at.isoformat()))
+    return buf.getvalue().encode("utf-8")
+
+
+# --- PDF ---
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4, in points
+MARGIN = 50
+ROW_HEIGHT = 16
+# Helvetica digits are all 556/1000 em wide, which is enough to right-align the points column
+_DIGIT_EM = 0.556
+_COLUMNS = (("Award", MARGIN, 48), ("Category", 330, 16), ("Issued", 440, 12))
+_POINTS_RIGHT = PAGE_WIDTH - MARGIN
+
+
+def _pdf_text(value: str, limit: int | None = None) -> bytes:
+    if limit is not None and len(value) > limit:
+        value = value[:limit - 3].rstrip() + "..."
+    raw = value.encode("cp1252", errors="replace")  # WinAnsiEncoding
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _text(x: float, y: float, value: str, *, size: int = 10, bold: bool = False, limit: int | None = None) -> bytes:
+    return b"BT /F%d %d Tf %.1f %.1f Td %s Tj ET\n" % (2 if bold else 1, size, x, y, _pdf_text(value, limit))
+
+
+def _number(right: float, y: float, value: int, *, size: int = 10, bold: bool = False) -> bytes:
+    digits = str(value)
+    return _text(right - len(digits) * _DIGIT_EM * size, y, digits, size=size, bold=bold)
+
+
+def _pages(transcript: Transcript, title: str) -> list[bytes]:
+    rows_first = (PAGE_HEIGHT - 2 * MARGIN - 130) // ROW_HEIGHT
+    rows_other = (PAGE_HEIGHT - 2 * MARGIN - 60) // ROW_HEIGHT
+    chunks = [transcript.lines[:rows_first]]
+    for i in range(rows_first, len(transcript.lines), rows_other):
+        chunks.append(transcript.lines[i:i + rows_other])
+
+    pages = []
+    for n, lines in enumerate(chunks, start=1):
+        y = PAGE_HEIGHT - MARGIN - 14
+        out = [_text(MARGIN, y, title, size=16, bold=True)]
+        if n == 1:
+            y -= 26
+            out.append(_text(MARGIN, y, transcript.name, size=12, bold=True))
+            y -= 16
+            out.append(_text(MARGIN, y, transcript.email))
+            y -= 22
+            out.append(_text(MARGIN, y, f"{len(transcript.lines)} award(s)", bold=True))
+            out.append(_text(_POINTS_RIGHT - 150, y, "Total points", bold=True))
+            out.append(_number(_POINTS_RIGHT, y, transcript.points, bold=True))
+        else:
+            out.append(_text(MARGIN, y - 18, f"{transcript.name} (continued)"))
+            y -= 18
+        y -= 34
+        for label, x, _ in _COLUMNS:
+            out.append(_text(x, y, label, bold=True))
+        out.append(_text(_POINTS_RIGHT - 32, y, "Points", bold=True))
+        out.append(b"%.1f %.1f m %.1f %.1f l 0.5 w S\n" % (MARGIN, y - 5, _POINTS_RIGHT, y - 5))
+        if not lines:
+            out.append(_text(MARGIN, y - ROW_HEIGHT - 4, "No awards yet."))
+        for line in lines:
+            y -= ROW_HEIGHT
+            for value, (_, x, limit) in zip((line.name, line.category or "", f"{line.issued_at:%Y-%m-%d}"),
+                                            _COLUMNS):
+                out.append(_text(x, y, value, limit=limit))
+            out.append(_number(_POINTS_RIGHT, y, line.points))
+        out.append(_text(MARGIN, MARGIN - 20, f"Page {n} of {len(chunks)}", size=8))
+        pages.append(b"".join(out))
+    return pages
+
+
+def render_pdf(transcript: Transcript, title: str = "Transcript") -> bytes:
+    pages = _pages(transcript, title)
+    # 1 catalog, 2 page tree, 3-4 fonts, then a (page, content) pair per page
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % (5 + 2 * i) for i in range(len(pages))), len(pages)),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    for i, content in enumerate(pages):
+        stream = zlib.compress(content)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                       b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+                       % (PAGE_WIDTH, PAGE_HEIGHT, 6 + 2 * i))
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render(transcript: Transcript, fmt: str, title: str = "Transcript") -> bytes:
+    return render_pdf(transcript, title) if fmt == "pdf" else render_csv(transcript)
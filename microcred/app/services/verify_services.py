@@ -0,0 +1,206 @@
+# microcred/app/services/verify_services.py
+"""
+Public credential verification.
+
+``/verify/<assertion id>`` is hit anonymously and often, so each worker keeps
+the rendered responses in ``VerifyCache``. The achievement is found through
+``achievements.verify_hash`` (sha256 of the assertion id, filled in by the
+same flush that inserts the row), never by scanning or by reversing the HMAC.
+
+Staying correct without a TTL: grants and revocations bump the
+"achievements" cache namespace. The cache doesn't throw everything away on a
+bump; the next lookup reads the change feed from where it last was and drops
+only the achievements revoked since. Award and user edits (name, description,
+email) are rare and change what a page shows, so they clear the cache.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import bindparam, event, func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..extensions import db
+from ..metrics import record_cache
+from ..models import Achievement, AchievementEvent, User
+from .badge_services import assertion_id
+from .cache_services import coherence
+from .event_services import REVOKED
+
+# b64url of 16 bytes, as made by assertion_id
+ASSERTION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{22}$")
+
+_ach = Achievement.__table__
+
+
+def verify_hash(aid: str) -> str:
+    return hashlib.sha256(aid.encode("ascii")).hexdigest()
+
+
+def hash_for(achievement_id: int, config=None) -> str:
+    return verify_hash(assertion_id(achievement_id, config))
+
+
+@event.listens_for(Session, "after_flush")
+def _fill_verify_hashes(session, flush_context):
+    new = [obj for obj in session.new if isinstance(obj, Achievement) and obj.verify_hash is None]
+    if not new:
+        return
+    config = current_app.config
+    hashes = [(obj, hash_for(obj.id, config)) for obj in new]
+    session.execute(
+        update(_ach).where(_ach.c.id == bindparam("_id")).values(verify_hash=bindparam("_hash")),
+        [{"_id": obj.id, "_hash": h} for obj, h in hashes])
+    for obj, h in hashes:
+        set_committed_value(obj, "verify_hash", h)  # written above; not a pending change
+
+
+def reindex(*, everything: bool = False, chunk_size: int = 2000) -> int:
+    """Fill ``verify_hash`` for rows without one (all rows after a secret rotation)."""
+    config = current_app.config
+    query = select(Achievement.id).order_by(Achievement.id)
+    if not everything:
+        query = query.where(Achievement.verify_hash.is_(None))
+    ids = db.session.scalars(query).all()
+    stmt = update(_ach).where(_ach.c.id == bindparam("_id")).values(verify_hash=bindparam("_hash"))
+    if everything and ids:
+        # clear first so a recomputed hash can't collide with a stale one under the unique index
+        db.session.execute(update(_ach).values(verify_hash=None))
+    for i in range(0, len(ids), chunk_size):
+        db.session.execute(stmt, [{"_id": a, "_hash": hash_for(a, config)} for a in ids[i:i + chunk_size]])
+    db.session.commit()
+    return len(ids)
+
+
+@dataclass(frozen=True, slots=True)
+class VerifiedAchievement:
+    """What a verification page needs; shaped like an Achievement for build_assertion."""
+    id: int
+    award_id: int
+    issued_at: datetime
+    email: str
+    first_name: str | None
+    last_name: str | None
+
+    @property
+    def earner_name(self) -> str:
+        return " ".join(p for p in ((self.first_name or "").strip(), (self.last_name or "").strip()) if p)
+
+
+def find_achievement(aid: str) -> VerifiedAchievement | None:
+    row = db.session.execute(
+        select(Achievement.id, Achievement.award_id, Achievement.issued_at,
+               User.email, User.first_name, User.last_name)
+        .join(User, User.id == Achievement.participant_id)
+        .where(Achievement.verify_hash == verify_hash(aid))
+    ).first()
+    return VerifiedAchievement(*row) if row is not None else None
+
+
+@dataclass(frozen=True, slots=True)
+class Rendered:
+    body: bytes
+    etag: str
+    mimetype: str
+
+
+class VerifyCache:
+    """
+    Rendered verification responses, keyed by (assertion id, representation).
+    ``None`` entries remember ids that don't exist; those go whenever anything
+    is granted, since the id may have just become valid.
+    """
+
+    def __init__(self, max_entries: int = 20000) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], tuple[int | None, Rendered | None]] = OrderedDict()
+        self._by_achievement: dict[int, set[tuple[str, str]]] = {}
+        self._cursor: int | None = None
+        self._events_pending = False
+
+    def get(self, key: tuple[str, str]) -> tuple[bool, Rendered | None]:
+        """(hit, response); a cached ``None`` is a hit for an unknown id."""
+        if self._events_pending:
+            self._catch_up()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        record_cache("verify", entry is not None)
+        if entry is None and self._cursor is None:
+            # start following the feed before the caller reads the row it will put()
+            self._cursor = self._latest_seq()
+        return (True, entry[1]) if entry is not None else (False, None)
+
+    def put(self, key: tuple[str, str], achievement_id: int | None, value: Rendered | None) -> None:
+        with self._lock:
+            self._entries[key] = (achievement_id, value)
+            self._entries.move_to_end(key)
+            if achievement_id is not None:
+                self._by_achievement.setdefault(achievement_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                old, (old_id, _) = self._entries.popitem(last=False)
+                keys = self._by_achievement.get(old_id)
+                if keys is not None:
+                    keys.discard(old)
+                    if not keys:
+                        del self._by_achievement[old_id]
+
+    def discard(self, achievement_id: int) -> None:
+        with self._lock:
+            for key in self._by_achievement.pop(achievement_id, ()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_achievement.clear()
+            self._cursor = None
+            self._events_pending = False
+
+    def achievements_changed(self) -> None:
+        self._events_pending = True
+
+    @staticmethod
+    def _latest_seq() -> int:
+        return db.session.execute(select(func.coalesce(func.max(AchievementEvent.seq), 0))).scalar_one()
+
+    def _catch_up(self) -> None:
+        self._events_pending = False
+        cursor = self._cursor
+        if cursor is None:
+            return
+        oldest = db.session.execute(select(func.min(AchievementEvent.seq))).scalar()
+        if oldest is not None and oldest > cursor + 1:
+            self.clear()  # events we never saw were pruned; can't tell what was revoked
+            return
+        rows = db.session.execute(
+            select(AchievementEvent.seq, AchievementEvent.achievement_id, AchievementEvent.kind)
+            .where(AchievementEvent.seq > cursor)
+            .order_by(AchievementEvent.seq)
+        ).all()
+        with self._lock:
+            if any(kind != REVOKED for _, _, kind in rows):
+                # something was granted: misses remembered so far may now be real
+                for key in [k for k, (_, v) in self._entries.items() if v is None]:
+                    del self._entries[key]
+        for _, achievement_id, kind in rows:
+            if kind == REVOKED:
+                self.discard(achievement_id)
+        if rows:
+            self._cursor = rows[-1][0]
+
+
+verify_cache = VerifyCache()
+
+coherence.on_change("achievements", verify_cache.achievements_changed)
+coherence.on_change("awards", verify_cache.clear)
+coherence.on_change("users", verify_cache.clear)
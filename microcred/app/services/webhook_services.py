@@ -0,0 +1,74 @@
+# microcred/app/services/webhook_services.py
+"""
+Webhook outbox.
+
+``enqueue`` is called from the achievement-event hook, inside the flush that
+records the change, and writes one ``webhook_outbox`` row per interested
+subscription. The row commits or rolls back with the grant itself; the
+dispatcher (``webhook_dispatcher``) delivers it later. Active subscriptions
+are cached per process and reloaded when the "webhooks" namespace changes.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from ..models import WebhookOutbox, WebhookSubscription
+from ..serializers import dumps
+from .cache_services import coherence, register_model
+
+register_model(WebhookSubscription, "webhooks")
+
+
+class SubscriptionCache:
+    """(id, event kinds) of the active subscriptions; ``None`` kinds means all."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version = 0
+        self._subs: list[tuple[int, frozenset[str] | None]] | None = None
+
+    def get(self, connection) -> list[tuple[int, frozenset[str] | None]]:
+        subs = self._subs
+        if subs is None:
+            version = self._version
+            # Core query on the flushing connection: an ORM query here would autoflush
+            rows = connection.execute(
+                select(WebhookSubscription.id, WebhookSubscription.events)
+                .where(WebhookSubscription.active.is_(True))).all()
+            subs = [(sid, None if events == "*" else frozenset(events.split(","))) for sid, events in rows]
+            with self._lock:
+                if version == self._version:
+                    self._subs = subs
+        return subs
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._subs = None
+
+
+subscriptions = SubscriptionCache()
+coherence.on_change("webhooks", subscriptions.clear)
+
+
+def enqueue(session, events: list[dict]) -> int:
+    """Add outbox rows for ``events`` (achievement event dicts incl. ``seq``) to the current flush."""
+    connection = session.connection()
+    subs = subscriptions.get(connection)
+    if not subs:
+        return 0
+    now = datetime.utcnow()
+    rows = []
+    for ev in events:
+        body = None
+        for sid, kinds in subs:
+            if kinds is None or ev["kind"] in kinds:
+                body = body or dumps(ev).decode("utf-8")
+                rows.append({"subscription_id": sid, "event": ev["kind"], "payload": body,
+                             "created_at": now, "next_attempt_at": now, "attempts": 0})
+    if rows:
+        connection.execute(insert(WebhookOutbox.__table__), rows)
+    return len(rows)
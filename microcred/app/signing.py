@@ -0,0 +1,79 @@
+# microcred/app/signing.py
+"""
+Compact JWS signing for badge assertions.
+
+With ``cryptography`` installed and an RSA private key configured, assertions
+are signed RS256 (what Open Badges verifiers expect) and the public key can be
+published. Without either, an HMAC-SHA256 (HS256) signature with a local secret
+is used; that still detects tampering with downloaded files but can only be
+checked by this deployment, so treat it as a development fallback.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+
+try:
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+except ImportError:  # optional; HS256 fallback
+    serialization = None
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+class SigningKeyError(RuntimeError):
+    """A key is configured but can't be used."""
+
+
+class Signer:
+    def __init__(self, kid: str, *, private_key_pem: bytes | None = None,
+                 hmac_secret: str | bytes | None = None) -> None:
+        self.kid = kid
+        self._private_key = None
+        if private_key_pem:
+            if serialization is None:
+                raise SigningKeyError("ASSERTION_PRIVATE_KEY_PATH is set but 'cryptography' is not installed")
+            self._private_key = serialization.load_pem_private_key(private_key_pem, password=None)
+            self.alg = "RS256"
+        elif hmac_secret:
+            self._secret = hmac_secret.encode("utf-8") if isinstance(hmac_secret, str) else hmac_secret
+            self.alg = "HS256"
+        else:
+            raise SigningKeyError("No assertion signing key configured")
+
+    @property
+    def version(self) -> str:
+        """Cache namespace: changes whenever the key or algorithm does."""
+        return f"{self.kid}-{self.alg}"
+
+    def sign(self, payload: dict, *, typ: str = "JWT") -> str:
+        header = {"alg": self.alg, "kid": self.kid, "typ": typ}
+        signing_input = (b64url(json.dumps(header, separators=(",", ":")).encode("utf-8")) + "."
+                         + b64url(json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")))
+        data = signing_input.encode("ascii")
+        if self.alg == "RS256":
+            signature = self._private_key.sign(data, padding.PKCS1v15(), hashes.SHA256())
+        else:
+            signature = hmac.new(self._secret, data, hashlib.sha256).digest()
+        return f"{signing_input}.{b64url(signature)}"
+
+    def public_key_pem(self) -> str | None:
+        if self._private_key is None:
+            return None
+        return self._private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode("ascii")
+
+    @classmethod
+    def from_config(cls, config) -> "Signer":
+        path = config.get("ASSERTION_PRIVATE_KEY_PATH")
+        pem = None
+        if path:
+            with open(path, "rb") as fh:
+                pem = fh.read()
+        return cls(config["ASSERTION_KEY_ID"], private_key_pem=pem,
+                   hmac_secret=config.get("ASSERTION_HMAC_SECRET") or config["SECRET_KEY"])
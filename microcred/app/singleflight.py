@@ -0,0 +1,204 @@
+# microcred/app/singleflight.py
+"""
+Single-flight request coalescing.
+
+``SingleFlight.do(key, fn)`` makes sure only one caller per key runs ``fn``
+at a time; concurrent callers wait for that result (up to ``timeout``) or,
+if they pass ``stale=``, get the stale value back immediately. With a
+``lock_dir`` the leader also takes a file lock, so the same key is computed
+by one process at a time and the others pick up its pickled result. Since
+such a process never runs ``fn``, side effects belong in ``on_result``,
+which sees the result however this process got it.
+
+``SWRCache`` builds stale-while-revalidate on top: entries are fresh for
+``ttl`` seconds and may then be served stale for ``stale_ttl`` more while a
+single caller refreshes them.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Hashable, Iterator
+
+from .metrics import registry, record_cache
+
+try:  # POSIX only; without it the cross-process lock is skipped
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+FLIGHTS = registry.counter(
+    "microcred_singleflight_total",
+    "Single-flight calls by outcome (leader/waited/stale/timeout/shared).",
+    ("name", "outcome"))
+FLIGHT_WAIT = registry.histogram(
+    "microcred_singleflight_wait_seconds", "Time followers spent waiting on a leader.", ("name",))
+
+_MISSING = object()
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self, name: str, *, timeout: float = 10.0, lock_dir: str | os.PathLike | None = None) -> None:
+        self.name = name
+        self.timeout = timeout
+        self.lock_dir = Path(lock_dir) if lock_dir and fcntl is not None else None
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], *, stale: Any = _MISSING,
+           on_result: Callable[[Any], Any] | None = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if stale is not _MISSING:
+                FLIGHTS.inc(name=self.name, outcome="stale")
+                return stale
+            started = time.perf_counter()
+            finished = call.done.wait(self.timeout)
+            FLIGHT_WAIT.observe(time.perf_counter() - started, name=self.name)
+            if finished:
+                FLIGHTS.inc(name=self.name, outcome="waited")
+                if call.error is not None:
+                    raise call.error
+                return call.value
+            # the leader is stuck; don't let it take this request down too
+            FLIGHTS.inc(name=self.name, outcome="timeout")
+            value = fn()
+            return on_result(value) if on_result is not None else value
+
+        FLIGHTS.inc(name=self.name, outcome="leader")
+        try:
+            value = self._run_leader(key, fn)
+            call.value = on_result(value) if on_result is not None else value
+            return call.value
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    # --- cross-process ---
+
+    def _paths(self, key: Hashable) -> tuple[Path, Path]:
+        digest = hashlib.sha1(repr((self.name, key)).encode("utf-8")).hexdigest()[:20]
+        return self.lock_dir / f"{digest}.lock", self.lock_dir / f"{digest}.pickle"
+
+    @contextmanager
+    def _file_lock(self, path: Path) -> Iterator[bool]:
+        """Poll for an exclusive flock until ``timeout``; yields whether we got it."""
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        yield False
+                        return
+                    time.sleep(0.01)
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _run_leader(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        if self.lock_dir is None:
+            return fn()
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        lock_path, result_path = self._paths(key)
+        started = time.time()
+        with self._file_lock(lock_path) as locked:
+            if locked:
+                # another process may have computed it while we waited for the lock
+                try:
+                    if result_path.stat().st_mtime >= started:
+                        with result_path.open("rb") as fh:
+                            value = pickle.load(fh)
+                        FLIGHTS.inc(name=self.name, outcome="shared")
+                        return value
+                except (OSError, pickle.PickleError, EOFError):
+                    pass
+            value = fn()
+            if locked:
+                tmp = result_path.with_suffix(f".{os.getpid()}.tmp")
+                try:
+                    with tmp.open("wb") as fh:
+                        pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(tmp, result_path)
+                except (OSError, pickle.PickleError, TypeError):
+                    tmp.unlink(missing_ok=True)
+            return value
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class SWRCache:
+    """Stale-while-revalidate cache with single-flight refreshes."""
+
+    def __init__(self, name: str, *, ttl: float, stale_ttl: float, flight: SingleFlight | None = None) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.flight = flight or SingleFlight(name)
+        self._entries: dict[Hashable, _Entry] = {}
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry.fresh_until:
+            record_cache(self.name, True)
+            return entry.value
+        record_cache(self.name, False)
+
+        # stored via on_result: a value another process computed must be cached here too
+        def store(value):
+            return self._store(key, value)
+
+        if entry is not None and now < entry.stale_until:
+            return self.flight.do(key, loader, stale=entry.value, on_result=store)
+        return self.flight.do(key, loader, on_result=store)
+
+    def _store(self, key: Hashable, value: Any) -> Any:
+        now = time.monotonic()
+        self._entries[key] = _Entry(value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        return value
+
+    def expire(self, key: Hashable = _MISSING) -> None:
+        """Mark one key (or everything) as needing a refresh; old values may still be served stale."""
+        entries = self._entries.items() if key is _MISSING else [(key, self._entries.get(key))]
+        for _, entry in list(entries):
+            if entry is not None:
+                entry.fresh_until = 0.0
+
+    def clear(self) -> None:
+        self._entries.clear()
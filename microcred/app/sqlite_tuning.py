@@ -0,0 +1,117 @@
+# microcred/app/sqlite_tuning.py
+"""
+SQLite performance profile.
+
+Every new DBAPI connection gets the configured PRAGMAs (WAL, synchronous,
+busy_timeout, mmap, cache, temp_store, foreign_keys). A cheap check at the
+end of each request runs ``wal_checkpoint(PASSIVE)`` + ``optimize`` once per
+``SQLITE_MAINTENANCE_INTERVAL`` seconds per process.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Mapping
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("microcred.db")
+
+DEFAULTS = {
+    "SQLITE_JOURNAL_MODE": "WAL",
+    "SQLITE_SYNCHRONOUS": "NORMAL",
+    "SQLITE_BUSY_TIMEOUT_MS": 5000,
+    "SQLITE_MMAP_SIZE": 256 * 1024 * 1024,
+    "SQLITE_CACHE_SIZE": -20000,  # negative = KiB, i.e. ~20 MB per connection
+    "SQLITE_TEMP_STORE": "MEMORY",
+    "SQLITE_FOREIGN_KEYS": True,
+    "SQLITE_MAINTENANCE_INTERVAL": 300.0,
+}
+
+
+def profile_pragmas(config: Mapping) -> list[str]:
+    """PRAGMA statements for a config mapping (Flask config or plain dict)."""
+    def get(key: str):
+        return config.get(key, DEFAULTS[key])
+
+    return [
+        f"PRAGMA busy_timeout = {int(get('SQLITE_BUSY_TIMEOUT_MS'))}",
+        f"PRAGMA journal_mode = {get('SQLITE_JOURNAL_MODE')}",
+        f"PRAGMA synchronous = {get('SQLITE_SYNCHRONOUS')}",
+        f"PRAGMA mmap_size = {int(get('SQLITE_MMAP_SIZE'))}",
+        f"PRAGMA cache_size = {int(get('SQLITE_CACHE_SIZE'))}",
+        f"PRAGMA temp_store = {get('SQLITE_TEMP_STORE')}",
+        f"PRAGMA foreign_keys = {'ON' if get('SQLITE_FOREIGN_KEYS') else 'OFF'}",
+    ]
+
+
+def apply_sqlite_profile(engine: Engine, config: Mapping, *, read_only: bool = False) -> None:
+    """Attach the profile to ``engine``; a no-op for non-SQLite engines."""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = profile_pragmas(config)
+    if read_only:
+        # the journal mode is a property of the file; only the primary may change it
+        pragmas = [p for p in pragmas if "journal_mode" not in p]
+    if engine.url.database in (None, "", ":memory:"):
+        # WAL and mmap are meaningless for in-memory databases
+        pragmas = [p for p in pragmas if "journal_mode" not in p and "mmap_size" not in p]
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for stmt in pragmas:
+                cursor.execute(stmt)
+        finally:
+            cursor.close()
+
+
+def run_maintenance(engine: Engine, checkpoint: str = "PASSIVE") -> None:
+    """Checkpoint the WAL and let SQLite refresh its planner statistics."""
+    with engine.connect() as conn:
+        conn.exec_driver_sql(f"PRAGMA wal_checkpoint({checkpoint})")
+        conn.exec_driver_sql("PRAGMA optimize")
+
+
+class SQLiteProfile:
+    """Flask extension applying the profile to the app's engines."""
+
+    def __init__(self, app: Flask | None = None) -> None:
+        self._lock = threading.Lock()
+        self._last_run = time.monotonic()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        from .extensions import db
+
+        for key, value in DEFAULTS.items():
+            app.config.setdefault(key, value)
+        with app.app_context():
+            engine = db.engine
+        if engine.dialect.name != "sqlite":
+            return
+        apply_sqlite_profile(engine, app.config)
+
+        interval = float(app.config["SQLITE_MAINTENANCE_INTERVAL"])
+        if interval > 0:
+            @app.teardown_request
+            def _periodic_maintenance(exc=None):
+                self.maybe_run(engine, interval)
+
+    def maybe_run(self, engine: Engine, interval: float) -> None:
+        if time.monotonic() - self._last_run < interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # another thread in this worker is already on it
+        try:
+            self._last_run = time.monotonic()
+            run_maintenance(engine)
+        except Exception:
+            logger.exception("SQLite maintenance failed")
+        finally:
+            self._lock.release()
@@ -0,0 +1,302 @@
+# microcred/app/webhook_dispatcher.py
+"""
+Background webhook delivery.
+
+The dispatcher loop claims due ``webhook_outbox`` rows (a short lease, so
+several dispatchers can share the table), groups them into batches per
+subscription and hands each batch to a thread pool. Each POST carries
+``{"events": [...]}`` signed with HMAC-SHA256 and goes out over a pooled
+keep-alive connection for its host.
+
+Backpressure: a subscription never has more than ``max_concurrency`` POSTs
+in flight and the dispatcher as a whole never more than ``max_in_flight``;
+rows beyond that stay unclaimed in the table. Failures are retried with
+exponential backoff plus jitter (or the endpoint's Retry-After, capped at
+``backoff_max`` like the backoff) until ``max_attempts``, after which the
+row is marked dead. Whatever goes wrong with one POST becomes a failed
+``Result`` for its batch, never an exception in the loop. Only the loop
+thread touches the database.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import http.client
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from sqlalchemy import Engine, func, or_, select, update
+
+from .metrics import registry
+from .models import WebhookOutbox, WebhookSubscription
+
+logger = logging.getLogger("microcred.webhooks")
+
+DELIVERIES = registry.counter(
+    "microcred_webhook_events_total", "Webhook events by outcome (delivered/retry/dead).", ("outcome",))
+DELIVERY_LATENCY = registry.histogram(
+    "microcred_webhook_delivery_latency_seconds", "Outbox insert to successful delivery.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600))
+POST_DURATION = registry.histogram(
+    "microcred_webhook_post_seconds", "Duration of one webhook POST.", ("status",))
+IN_FLIGHT = registry.gauge("microcred_webhook_in_flight", "Webhook POSTs currently in flight.")
+
+_outbox = WebhookOutbox.__table__
+_subs = WebhookSubscription.__table__
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port)."""
+
+    def __init__(self, timeout: float, max_idle: int = 8) -> None:
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: dict[tuple, queue.LifoQueue] = defaultdict(lambda: queue.LifoQueue(max_idle))
+        self._lock = threading.Lock()
+
+    def _get(self, key: tuple) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle[key]
+        try:
+            return idle.get_nowait()
+        except queue.Empty:
+            scheme, host, port = key
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            return cls(host, port, timeout=self.timeout)
+
+    def _put(self, key: tuple, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle[key].put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def post(self, url: str, body: bytes, headers: dict[str, str]) -> tuple[int, dict[str, str]]:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        for attempt in (1, 2):
+            conn = self._get(key)
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if attempt == 2:
+                    raise
+                continue  # a pooled connection the server had already closed; retry on a fresh one
+            except Exception:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._put(key, conn)
+            return resp.status, {k.lower(): v for k, v in resp.getheaders()}
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._idle = list(self._idle.values()), defaultdict(lambda: queue.LifoQueue(self.max_idle))
+        for idle in pools:
+            while not idle.empty():
+                idle.get_nowait().close()
+
+
+@dataclass(slots=True)
+class Batch:
+    subscription_id: int
+    url: str
+    secret: str
+    ids: list[int]
+    attempts: int  # highest attempt count in the batch
+    created_at: list[datetime]
+    body: bytes
+
+
+@dataclass(slots=True)
+class Result:
+    batch: Batch
+    ok: bool
+    error: str | None = None
+    retry_after: float | None = None
+
+
+def sign(secret: str, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+class Dispatcher:
+    def __init__(self, engine: Engine, *, max_in_flight: int = 16, timeout: float = 10.0,
+                 max_attempts: int = 12, backoff_base: float = 2.0, backoff_max: float = 3600.0,
+                 lease: float = 60.0, poll_interval: float = 1.0) -> None:
+        self.engine = engine
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = timedelta(seconds=lease)
+        self.poll_interval = poll_interval
+        self.pool = ConnectionPool(timeout)
+        self._executor = ThreadPoolExecutor(max_in_flight, thread_name_prefix="webhook")
+        self._futures: set[Future] = set()
+        self._in_flight: dict[int, int] = defaultdict(int)
+
+    @classmethod
+    def from_config(cls, engine: Engine, config) -> "Dispatcher":
+        return cls(engine, max_in_flight=config["WEBHOOK_MAX_IN_FLIGHT"], timeout=config["WEBHOOK_TIMEOUT"],
+                   max_attempts=config["WEBHOOK_MAX_ATTEMPTS"], backoff_base=config["WEBHOOK_BACKOFF_BASE"],
+                   backoff_max=config["WEBHOOK_BACKOFF_MAX"], lease=config["WEBHOOK_LEASE_SECONDS"],
+                   poll_interval=config["WEBHOOK_POLL_INTERVAL"])
+
+    # --- loop ---
+
+    def run(self, stop: threading.Event | None = None, *, drain: bool = False) -> None:
+        """Dispatch until ``stop`` is set, or (``drain``) until nothing is left to deliver."""
+        stop = stop or threading.Event()
+        try:
+            while not stop.is_set():
+                claimed = self.tick()
+                if self._futures:
+                    done, _ = wait(self._futures, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    self._finish(done)
+                elif not claimed:
+                    if drain and self.pending() == 0:
+                        break
+                    stop.wait(self.poll_interval)
+                registry.maybe_flush()
+        finally:
+            done, _ = wait(self._futures)
+            self._finish(done)
+            self.close()
+
+    def tick(self) -> int:
+        """Claim what the concurrency limits allow and start delivering it."""
+        room = self.max_in_flight - len(self._futures)
+        if room <= 0:
+            return 0
+        now = datetime.utcnow()
+        claimed = 0
+        with self.engine.begin() as conn:
+            subs = conn.execute(select(_subs.c.id, _subs.c.url, _subs.c.secret, _subs.c.batch_size,
+                                       _subs.c.max_concurrency)
+                                .where(_subs.c.active.is_(True))).all()
+            for sub in subs:
+                slots = min(sub.max_concurrency - self._in_flight[sub.id], room)
+                if slots <= 0:
+                    continue
+                batch_size = max(sub.batch_size, 1)
+                token = uuid.uuid4().hex
+                due = (select(_outbox.c.id)
+                       .where(_outbox.c.subscription_id == sub.id,
+                              _outbox.c.delivered_at.is_(None), _outbox.c.dead_at.is_(None),
+                              _outbox.c.next_attempt_at <= now,
+                              or_(_outbox.c.claimed_until.is_(None), _outbox.c.claimed_until < now))
+                       .order_by(_outbox.c.id)
+                       .limit(slots * batch_size))
+                conn.execute(update(_outbox).where(_outbox.c.id.in_(due))
+                             .values(claim_token=token, claimed_until=now + self.lease))
+                rows = conn.execute(select(_outbox.c.id, _outbox.c.payload, _outbox.c.attempts,
+                                           _outbox.c.created_at)
+                                    .where(_outbox.c.claim_token == token)
+                                    .order_by(_outbox.c.id)).all()
+                for start in range(0, len(rows), batch_size):
+                    chunk = rows[start:start + batch_size]
+                    body = b'{"events":[' + ",".join(r.payload for r in chunk).encode("utf-8") + b"]}"
+                    self._submit(Batch(sub.id, sub.url, sub.secret, [r.id for r in chunk],
+                                       max(r.attempts for r in chunk), [r.created_at for r in chunk], body))
+                    room -= 1
+                claimed += len(rows)
+                if room <= 0:
+                    break
+        return claimed
+
+    def pending(self) -> int:
+        """Undelivered rows that ``tick`` could still claim; rows of inactive subscriptions wait, so don't count."""
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count())
+                                .select_from(_outbox.join(_subs, _subs.c.id == _outbox.c.subscription_id))
+                                .where(_subs.c.active.is_(True),
+                                       _outbox.c.delivered_at.is_(None), _outbox.c.dead_at.is_(None))).scalar_one()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+    # --- delivery (worker threads; no DB access) ---
+
+    def _submit(self, batch: Batch) -> None:
+        self._in_flight[batch.subscription_id] += 1
+        IN_FLIGHT.inc()
+        self._futures.add(self._executor.submit(self._deliver, batch))
+
+    def _deliver(self, batch: Batch) -> Result:
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "microcred-webhooks/1",
+            "X-Microcred-Signature": sign(batch.secret, batch.body),
+            "X-Microcred-Delivery": f"{batch.ids[0]}-{batch.ids[-1]}",
+        }
+        started = time.perf_counter()
+        try:
+            status, resp_headers = self.pool.post(batch.url, batch.body, headers)
+        except Exception as exc:  # network errors, but also a URL that urlsplit can't take apart
+            POST_DURATION.observe(time.perf_counter() - started, status="error")
+            return Result(batch, False, f"{type(exc).__name__}: {exc}"[:255])
+        POST_DURATION.observe(time.perf_counter() - started, status=status)
+        if 200 <= status < 300:
+            return Result(batch, True)
+        retry_after = resp_headers.get("retry-after")
+        return Result(batch, False, f"HTTP {status}",
+                      min(float(retry_after), self.backoff_max) if retry_after and retry_after.isdigit() else None)
+
+    # --- results (loop thread) ---
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_base * (2 ** attempts), self.backoff_max)
+        return random.uniform(delay / 2, delay)  # jitter spreads retries of a failed endpoint
+
+    def _finish(self, done: set[Future]) -> None:
+        if not done:
+            return
+        now = datetime.utcnow()
+        with self.engine.begin() as conn:
+            for future in done:
+                self._futures.discard(future)
+                result: Result = future.result()
+                batch = result.batch
+                self._in_flight[batch.subscription_id] -= 1
+                IN_FLIGHT.dec()
+                rows = _outbox.c.id.in_(batch.ids)
+                if result.ok:
+                    conn.execute(update(_outbox).where(rows)
+                                 .values(delivered_at=now, claim_token=None, claimed_until=None))
+                    DELIVERIES.inc(len(batch.ids), outcome="delivered")
+                    for created in batch.created_at:
+                        DELIVERY_LATENCY.observe((now - created).total_seconds())
+                    continue
+                attempts = batch.attempts + 1
+                if attempts >= self.max_attempts:
+                    conn.execute(update(_outbox).where(rows)
+                                 .values(attempts=_outbox.c.attempts + 1, dead_at=now, claim_token=None,
+                                         claimed_until=None, last_error=result.error))
+                    DELIVERIES.inc(len(batch.ids), outcome="dead")
+                    logger.warning("webhook %s: giving up on %d event(s): %s",
+                                   batch.url, len(batch.ids), result.error)
+                    continue
+                delay = result.retry_after if result.retry_after is not None else self._backoff(attempts)
+                conn.execute(update(_outbox).where(rows)
+                             .values(attempts=_outbox.c.attempts + 1, claim_token=None, claimed_until=None,
+                                     next_attempt_at=now + timedelta(seconds=delay), last_error=result.error))
+                DELIVERIES.inc(len(batch.ids), outcome="retry")
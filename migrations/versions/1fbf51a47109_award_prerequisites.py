@@ -0,0 +1,51 @@
+"""award prerequisites: direct edges and their transitive closure
+
+Revision ID: 1fbf51a47109
+Revises: 994acc9f37fe
+Create Date: 2026-10-19 16:30:00
+
+Both tables start empty, which is consistent: no award had prerequisites
+before them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "1fbf51a47109"
+down_revision = "994acc9f37fe"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table("award_prerequisites"):
+        op.create_table(
+            "award_prerequisites",
+            sa.Column("award_id", sa.Integer(), nullable=False),
+            sa.Column("prerequisite_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["award_id"], ["awards.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["prerequisite_id"], ["awards.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("award_id", "prerequisite_id"),
+        )
+        op.create_index("ix_award_prerequisites_prerequisite_id", "award_prerequisites", ["prerequisite_id"])
+    if not _has_table("award_prerequisite_closure"):
+        op.create_table(
+            "award_prerequisite_closure",
+            sa.Column("award_id", sa.Integer(), nullable=False),
+            sa.Column("ancestor_id", sa.Integer(), nullable=False),
+            sa.Column("depth", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["award_id"], ["awards.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["ancestor_id"], ["awards.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("award_id", "ancestor_id"),
+        )
+        op.create_index("ix_award_prerequisite_closure_ancestor_id", "award_prerequisite_closure", ["ancestor_id"])
+
+
+def downgrade():
+    op.drop_table("award_prerequisite_closure")
+    op.drop_table("award_prerequisites")
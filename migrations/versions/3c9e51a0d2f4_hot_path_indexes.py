@@ -0,0 +1,74 @@
+"""hot path indexes: achievements by participant and date, user list order, icon name search
+
+Revision ID: 3c9e51a0d2f4
+Revises:
+Create Date: 2026-10-19 11:30:00
+
+Databases so far were created with ``db.create_all()``, some before these
+indexes were in the models and some after, so each step checks what is
+already there and the revision is safe to run on either.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3c9e51a0d2f4"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# As in models/icons.py at this revision; copied so later model edits don't change history
+ICON_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS icons_fts USING fts5("
+    "name, content='icons', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS icons_fts_ai AFTER INSERT ON icons BEGIN "
+    "INSERT INTO icons_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS icons_fts_ad AFTER DELETE ON icons BEGIN "
+    "INSERT INTO icons_fts(icons_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS icons_fts_au AFTER UPDATE OF name ON icons BEGIN "
+    "INSERT INTO icons_fts(icons_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO icons_fts(rowid, name) VALUES (new.id, new.name); END",
+)
+
+
+def _indexes(table):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # the new index first, so participant lookups are never left without one
+    if "ix_achievements_participant_issued" not in _indexes("achievements"):
+        op.create_index("ix_achievements_participant_issued", "achievements",
+                        ["participant_id", sa.text("issued_at DESC")])
+    if "ix_achievements_participant_id" in _indexes("achievements"):
+        op.drop_index("ix_achievements_participant_id", table_name="achievements")
+
+    if "ix_users_name" not in _indexes("users"):
+        op.create_index("ix_users_name", "users", ["first_name", "last_name", "email"])
+
+    if "ix_icon_name_ilike" in _indexes("icons"):
+        op.drop_index("ix_icon_name_ilike", table_name="icons")
+
+    if op.get_bind().dialect.name == "sqlite":
+        for stmt in ICON_SEARCH_DDL:
+            op.execute(stmt)
+        op.execute("INSERT INTO icons_fts(icons_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        for trigger in ("icons_fts_au", "icons_fts_ad", "icons_fts_ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS icons_fts")
+
+    if "ix_icon_name_ilike" not in _indexes("icons"):
+        op.create_index("ix_icon_name_ilike", "icons", ["name"])
+
+    if "ix_users_name" in _indexes("users"):
+        op.drop_index("ix_users_name", table_name="users")
+
+    if "ix_achievements_participant_id" not in _indexes("achievements"):
+        op.create_index("ix_achievements_participant_id", "achievements", ["participant_id"])
+    if "ix_achievements_participant_issued" in _indexes("achievements"):
+        op.drop_index("ix_achievements_participant_issued", table_name="achievements")
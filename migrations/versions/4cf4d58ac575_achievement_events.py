@@ -0,0 +1,49 @@
+"""achievement_events: the achievement change feed
+
+Revision ID: 4cf4d58ac575
+Revises: 5b785d0df3c6
+Create Date: 2026-10-19 16:50:00
+
+Existing achievements get one "granted" event each, in id order, so a
+consumer starting from cursor 0 still sees every award that is held. No
+webhook outbox rows are written for them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4cf4d58ac575"
+down_revision = "5b785d0df3c6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("achievement_events"):
+        return
+    op.create_table(
+        "achievement_events",
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("achievement_id", sa.Integer(), nullable=False),
+        sa.Column("participant_id", sa.Integer(), nullable=False),
+        sa.Column("award_id", sa.Integer(), nullable=False),
+        sa.Column("actor_id", sa.Integer(), nullable=True),
+        sa.Column("issued_at", sa.DateTime(), nullable=True),
+        sa.Column("note", sa.String(length=255), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("seq"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_achievement_events_pair", "achievement_events", ["participant_id", "award_id", "seq"])
+    op.create_index("ix_achievement_events_occurred_at", "achievement_events", ["occurred_at"])
+    op.execute(
+        "INSERT INTO achievement_events "
+        "(kind, achievement_id, participant_id, award_id, actor_id, issued_at, note, occurred_at) "
+        "SELECT 'granted', id, participant_id, award_id, issued_by_id, issued_at, note, issued_at "
+        "FROM achievements ORDER BY id")
+
+
+def downgrade():
+    op.drop_table("achievement_events")
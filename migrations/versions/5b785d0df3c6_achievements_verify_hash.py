@@ -0,0 +1,41 @@
+"""achievements.verify_hash, the /verify lookup key
+
+Revision ID: 5b785d0df3c6
+Revises: 1fbf51a47109
+Create Date: 2026-10-19 16:40:00
+
+The hash is derived from the public assertion id, which needs the app's
+HMAC secret, so this revision can't fill it. Existing achievements don't
+verify until you run, after upgrading:
+
+    flask badges reindex-verify --all
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5b785d0df3c6"
+down_revision = "1fbf51a47109"
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes(table):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    if "verify_hash" not in _columns("achievements"):
+        op.add_column("achievements", sa.Column("verify_hash", sa.String(length=64), nullable=True))
+    if "ix_achievements_verify_hash" not in _indexes("achievements"):
+        op.create_index("ix_achievements_verify_hash", "achievements", ["verify_hash"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_achievements_verify_hash", table_name="achievements")
+    op.drop_column("achievements", "verify_hash")  # native on SQLite 3.35+; a batch copy would lose the DESC index
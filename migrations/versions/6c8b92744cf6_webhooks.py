@@ -0,0 +1,61 @@
+"""webhook subscriptions and their delivery outbox
+
+Revision ID: 6c8b92744cf6
+Revises: 4cf4d58ac575
+Create Date: 2026-10-19 17:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6c8b92744cf6"
+down_revision = "4cf4d58ac575"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table("webhook_subscriptions"):
+        op.create_table(
+            "webhook_subscriptions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("url", sa.String(length=500), nullable=False),
+            sa.Column("secret", sa.String(length=128), nullable=False),
+            sa.Column("events", sa.String(length=255), nullable=False),
+            sa.Column("active", sa.Boolean(), nullable=False),
+            sa.Column("batch_size", sa.Integer(), nullable=False),
+            sa.Column("max_concurrency", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    if not _has_table("webhook_outbox"):
+        op.create_table(
+            "webhook_outbox",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("subscription_id", sa.Integer(), nullable=False),
+            sa.Column("event", sa.String(length=32), nullable=False),
+            sa.Column("payload", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+            sa.Column("claim_token", sa.String(length=32), nullable=True),
+            sa.Column("claimed_until", sa.DateTime(), nullable=True),
+            sa.Column("delivered_at", sa.DateTime(), nullable=True),
+            sa.Column("dead_at", sa.DateTime(), nullable=True),
+            sa.Column("last_error", sa.String(length=255), nullable=True),
+            sa.ForeignKeyConstraint(["subscription_id"], ["webhook_subscriptions.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_webhook_outbox_due", "webhook_outbox",
+                        ["subscription_id", "delivered_at", "dead_at", "next_attempt_at"])
+        op.create_index("ix_webhook_outbox_claim_token", "webhook_outbox", ["claim_token"])
+
+
+def downgrade():
+    op.drop_table("webhook_outbox")
+    op.drop_table("webhook_subscriptions")
@@ -0,0 +1,32 @@
+"""cache_versions: index on version, for the workers' high-water read
+
+Revision ID: 8f2d4b7c1e05
+Revises: b4461004caf2
+Create Date: 2026-10-19 15:10:00
+
+Existing rows need no renumbering: the next bump of any row takes the
+table's max + 1, and that is all the high-water read relies on.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8f2d4b7c1e05"
+down_revision = "b4461004caf2"
+branch_labels = None
+depends_on = None
+
+
+def _indexes(table):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    if "ix_cache_versions_version" not in _indexes("cache_versions"):
+        op.create_index("ix_cache_versions_version", "cache_versions", ["version"])
+
+
+def downgrade():
+    if "ix_cache_versions_version" in _indexes("cache_versions"):
+        op.drop_index("ix_cache_versions_version", table_name="cache_versions")
@@ -0,0 +1,87 @@
+"""dashboard rollup tables, filled from the achievements table
+
+Revision ID: 90bb5a900509
+Revises: 6c8b92744cf6
+Create Date: 2026-10-19 17:10:00
+
+The app only ever applies deltas to these tables, so they have to start out
+right. On SQLite the revision fills them the way ``rollup_services.compute``
+does (weeks start on Monday). On anything else, run ``flask rollups rebuild``
+before serving traffic. Either way, ``flask rollups check`` confirms the
+result.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "90bb5a900509"
+down_revision = "6c8b92744cf6"
+branch_labels = None
+depends_on = None
+
+FILL = (
+    "INSERT INTO rollup_daily (day, issued, earners) "
+    "SELECT date(issued_at), count(*), count(DISTINCT participant_id) FROM achievements GROUP BY 1",
+    # 'weekday 0' moves to the coming Sunday (or stays on one); six days back is that week's Monday
+    "INSERT INTO rollup_weekly (week, issued, earners) "
+    "SELECT date(issued_at, 'weekday 0', '-6 days'), count(*), count(DISTINCT participant_id) "
+    "FROM achievements GROUP BY 1",
+    "INSERT INTO rollup_awards (award_id, holders) SELECT award_id, count(*) FROM achievements GROUP BY 1",
+    # issuer 0 collects automatic grants (rollup_services.NO_ISSUER)
+    "INSERT INTO rollup_issuers (issuer_id, issued) "
+    "SELECT coalesce(issued_by_id, 0), count(*) FROM achievements GROUP BY 1",
+    "INSERT INTO rollup_totals (name, value) SELECT name, value FROM ("
+    "SELECT 'users' AS name, (SELECT count(*) FROM users) AS value "
+    "UNION ALL SELECT 'achievements', (SELECT count(*) FROM achievements) "
+    "UNION ALL SELECT 'participants', (SELECT count(DISTINCT participant_id) FROM achievements)"
+    ") WHERE value > 0",
+)
+
+TABLES = ("rollup_daily", "rollup_weekly", "rollup_awards", "rollup_issuers", "rollup_totals")
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if all(inspector.has_table(t) for t in TABLES):
+        return  # made by db.create_all(), and kept up to date since
+    op.create_table(
+        "rollup_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("issued", sa.Integer(), nullable=False),
+        sa.Column("earners", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+    op.create_table(
+        "rollup_weekly",
+        sa.Column("week", sa.Date(), nullable=False),
+        sa.Column("issued", sa.Integer(), nullable=False),
+        sa.Column("earners", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("week"),
+    )
+    op.create_table(
+        "rollup_awards",
+        sa.Column("award_id", sa.Integer(), nullable=False),
+        sa.Column("holders", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("award_id"),
+    )
+    op.create_table(
+        "rollup_issuers",
+        sa.Column("issuer_id", sa.Integer(), nullable=False),
+        sa.Column("issued", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("issuer_id"),
+    )
+    op.create_table(
+        "rollup_totals",
+        sa.Column("name", sa.String(length=32), nullable=False),
+        sa.Column("value", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    if op.get_bind().dialect.name == "sqlite":
+        for stmt in FILL:
+            op.execute(stmt)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_table(table)
@@ -0,0 +1,32 @@
+"""awards.auto_grant, for awards the rule engine grants by itself
+
+Revision ID: 994acc9f37fe
+Revises: cee1b7fe9a2c
+Create Date: 2026-10-19 16:20:00
+
+The server default fills the existing rows (all of them manual awards) and
+keeps inserts that don't mention the column valid.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "994acc9f37fe"
+down_revision = "cee1b7fe9a2c"
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    if "auto_grant" not in _columns("awards"):
+        op.add_column("awards", sa.Column("auto_grant", sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    with op.batch_alter_table("awards") as batch:
+        batch.drop_column("auto_grant")
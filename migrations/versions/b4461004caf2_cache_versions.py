@@ -0,0 +1,33 @@
+"""cache_versions: the shared version row per cache namespace
+
+Revision ID: b4461004caf2
+Revises: 3c9e51a0d2f4
+Create Date: 2026-10-19 16:00:00
+
+Every worker reads this table before each request, so it has to exist before
+the app serves anything. Databases created with ``db.create_all()`` after the
+table was added already have it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b4461004caf2"
+down_revision = "3c9e51a0d2f4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("cache_versions"):
+        op.create_table(
+            "cache_versions",
+            sa.Column("namespace", sa.String(length=32), nullable=False),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("namespace"),
+        )
+
+
+def downgrade():
+    op.drop_table("cache_versions")
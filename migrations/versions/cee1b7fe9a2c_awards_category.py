@@ -0,0 +1,36 @@
+"""awards.category, for count(category) rules
+
+Revision ID: cee1b7fe9a2c
+Revises: 8f2d4b7c1e05
+Create Date: 2026-10-19 16:10:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "cee1b7fe9a2c"
+down_revision = "8f2d4b7c1e05"
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes(table):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    if "category" not in _columns("awards"):
+        op.add_column("awards", sa.Column("category", sa.String(length=64), nullable=True))
+    if "ix_awards_category" not in _indexes("awards"):
+        op.create_index("ix_awards_category", "awards", ["category"])
+
+
+def downgrade():
+    op.drop_index("ix_awards_category", table_name="awards")
+    with op.batch_alter_table("awards") as batch:
+        batch.drop_column("category")